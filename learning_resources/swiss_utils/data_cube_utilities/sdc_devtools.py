@@ -147,6 +147,134 @@ def rolling_window(array, window=(0,), asteps=None, wsteps=None, axes=None, toen
     
     return np.lib.stride_tricks.as_strided(array, shape=new_shape, strides=new_strides)
 
+def _focal_window(window):
+    """Return a focal `window` (an int or a (height, width) tuple) as a tuple of two ints."""
+    window = (window, window) if np.isscalar(window) else tuple(window)
+    if len(window) != 2 or any(int(size) != size or size < 1 for size in window):
+        raise ValueError("`window` must be a positive integer or a tuple of two positive integers.")
+    return tuple(int(size) for size in window)
+
+
+def _focal_moments(array, window, moments):
+    """
+    Compute NaN-aware focal count, sum (and sum of squares if `moments` is 3) over the last two axes
+    of a NumPy array with integral images (summed-area tables), in O(pixels) whatever the window size.
+    Windows are centered and clipped at the array edges.
+    """
+    array = np.asarray(array, dtype=np.float64)
+    valid = np.isfinite(array)
+    values = np.where(valid, array, 0)
+    if moments == 3 and valid.any():
+        # Shift values to reduce the loss of precision of the sum of squares.
+        values = np.where(valid, values - values[valid].mean(), 0)
+
+    # Window bounds of every row and column, as indices in the integral images.
+    rows, cols = array.shape[-2:]
+    row_lo = np.clip(np.arange(rows) - window[0] // 2, 0, rows)
+    row_hi = np.clip(np.arange(rows) + (window[0] - 1) // 2 + 1, 0, rows)
+    col_lo = np.clip(np.arange(cols) - window[1] // 2, 0, cols)
+    col_hi = np.clip(np.arange(cols) + (window[1] - 1) // 2 + 1, 0, cols)
+
+    results = []
+    for moment in [valid, values, values ** 2][:moments]:
+        integral = np.zeros(array.shape[:-2] + (rows + 1, cols + 1))
+        np.cumsum(np.cumsum(moment, axis=-2), axis=-1, out=integral[..., 1:, 1:])
+        rows_hi, rows_lo = integral[..., row_hi, :], integral[..., row_lo, :]
+        results.append(rows_hi[..., col_hi] - rows_lo[..., col_hi] - rows_hi[..., col_lo] + rows_lo[..., col_lo])
+    return results
+
+
+def _focal_stat(array, window, stat):
+    """
+    Compute the focal `stat` (see `focal_stats`) for a NumPy or dask array,
+    with windows clipped at the array edges.
+    """
+    def compute(block, window):
+        moments = _focal_moments(block, window, 3 if stat == 'var' else 2 if stat in ['sum', 'mean'] else 1)
+        count = moments[0]
+        if stat == 'count':
+            return count
+        if stat == 'sum':
+            return moments[1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, moments[1] / count, np.nan)
+            if stat == 'mean':
+                return mean
+            return np.maximum(np.where(count > 0, moments[2] / count, np.nan) - mean ** 2, 0)
+
+    if hasattr(array, 'map_overlap') and not isinstance(array, np.ndarray):
+        # Blocks are read with a halo of half the window, so windows are only clipped at the array edges.
+        depth = {array.ndim - 2: window[0] // 2, array.ndim - 1: window[1] // 2}
+        return array.map_overlap(compute, depth=depth, boundary='none', window=window, dtype=np.float64)
+    return compute(array, window)
+
+
+def focal_stats(array, window, stat, mode='same'):
+    """
+    Compute a focal (moving window) sum, count, mean or variance over the last two dimensions of `array`
+    (e.g. latitude and longitude), ignoring NaN values.
+    Uses integral images (cumulative sums along y and x), so the cost does not depend on the window size.
+    
+    Parameters
+    ----------
+    array : numpy.ndarray, dask.array.Array or xarray.DataArray
+        Array to compute focal statistics on. Dask arrays (also within a xarray.DataArray) are
+        processed lazily with `map_overlap`, giving the same result as a NumPy array.
+    window : int or tuple
+        Window size, either a single integer for a square window or a (height, width) tuple.
+        Sizes must be odd in 'same' mode.
+    stat : string ('sum', 'count', 'mean', 'var')
+        Statistic to compute. 'count' is the number of non-NaN values, 'sum' the sum of non-NaN values
+        (0 if none), 'mean' and 'var' the mean and population variance of non-NaN values (NaN if none).
+    mode : string ('same', 'valid')
+        'same' returns an array of the shape of `array`, windows being clipped at the edges,
+        'valid' returns only windows fully within `array` (as `rolling_window`).
+    
+    Returns
+    -------
+    A float64 array of the type of `array` containing the focal statistic.
+    """
+    stat_args = ['sum', 'count', 'mean', 'var']
+    assert (stat in stat_args), \
+           '\n<stat> argument must be one element of the list %s !' % stat_args
+    mode_args = ['same', 'valid']
+    assert (mode in mode_args), \
+           '\n<mode> argument must be one element of the list %s !' % mode_args
+    window = _focal_window(window)
+    if mode == 'same':
+        assert (window[0] % 2 == 1 and window[1] % 2 == 1), \
+               '\n<window> sizes must be odd in \'same\' mode !'
+    
+    data = array.data if isinstance(array, xr.DataArray) else array
+    data = data if hasattr(data, 'map_overlap') else np.asarray(data)
+    result = _focal_stat(data, window, stat)
+    if isinstance(array, xr.DataArray):
+        result = xr.DataArray(result, dims=array.dims, coords=array.coords, attrs=array.attrs, name=array.name)
+    if mode == 'valid':
+        result = result[..., window[0] // 2:data.shape[-2] - (window[0] - 1) // 2,
+                        window[1] // 2:data.shape[-1] - (window[1] - 1) // 2]
+    return result
+
+
+def focal_sum(array, window, mode='same'):
+    """Focal sum of non-NaN values, see `focal_stats`."""
+    return focal_stats(array, window, 'sum', mode)
+
+
+def focal_count(array, window, mode='same'):
+    """Focal count of non-NaN values, see `focal_stats`."""
+    return focal_stats(array, window, 'count', mode)
+
+
+def focal_mean(array, window, mode='same'):
+    """Focal mean of non-NaN values, see `focal_stats`."""
+    return focal_stats(array, window, 'mean', mode)
+
+
+def focal_var(array, window, mode='same'):
+    """Focal population variance of non-NaN values, see `focal_stats`."""
+    return focal_stats(array, window, 'var', mode)
+
 def ds_focus(ds, dough_width, stat):
     """
     Select within an `array` the window (size given by `dough_width`) with sum of min, max values
@@ -184,7 +312,7 @@ def ds_focus(ds, dough_width, stat):
     arr = ds[list(ds.var())[0]].count(dim=['time']).values
     
     # apply a "rolling window" sum filter on the count
-    sums = rolling_window(arr, (dough_width * 2 + 1, dough_width * 2 + 1)).sum((2,3))
+    sums = focal_sum(arr, dough_width * 2 + 1, mode='valid').round().astype(arr.dtype)
     
     # get the coords of the first pixel with targimum sum value
     sums_da = xr.DataArray(sums, dims = ['latitude', 'longitude'])
@@ -197,8 +325,8 @@ def ds_focus(ds, dough_width, stat):
     targ_sum = targ_sum.to_dataframe(name = 'count').dropna().reset_index()[:1]
     
     # get new AOI
-    ctr_lat_index = np.where(ds.latitude.values == float(targ_sum['latitude']))[0]
-    ctr_lon_index = np.where(ds.longitude.values == float(targ_sum['longitude']))[0]
+    ctr_lat_index = np.where(ds.latitude.values == float(targ_sum['latitude'].iloc[0]))[0]
+    ctr_lon_index = np.where(ds.longitude.values == float(targ_sum['longitude'].iloc[0]))[0]
     # index seems inverted for latitude !!!
     targ_min_lat = ds.latitude.values[ctr_lat_index + dough_width][0]
     targ_max_lat = ds.latitude.values[ctr_lat_index - dough_width][0]
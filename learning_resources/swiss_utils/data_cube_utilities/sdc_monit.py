@@ -14,8 +14,11 @@
 # Import necessary stuff
 # import os
 # import sys
+import csv
 import time
 import datetime
+import threading
+import contextlib
 import psutil
 # from shutil import which
 from IPython.display import clear_output # , IFrame
@@ -139,3 +142,215 @@ def activity_logger(log_name = 'activity.log', interval_s = 10):
     f.close()
 
     return 0
+
+
+class StageProfiler(object):
+    """
+    Description:
+      Profile the stages of a processing (e.g. load, clean, index, composite, export) by sampling
+      the process RAM and CPU activity in a background thread (the processing is not blocked).
+      Samples are tagged with the active stage, and wall time, CPU time and peak RAM (RSS) are
+      recorded per stage. Stages are entered with the stage() context manager or decorator
+      and can be nested or run from several threads at once (samples are tagged with the
+      innermost stage of each thread, joined by '+'). The wall and CPU times of a stage
+      are measured from its first entry to its last exit, so re-entering a stage (e.g. a
+      recursive function or several threads) does not count the same time twice.
+      e.g. profiler = StageProfiler()
+           with profiler:
+               with profiler.stage('load'):
+                   ds = dc.load(...)
+               with profiler.stage('composite'):
+                   mosaic = create_median_mosaic(ds)
+           profiler.print_summary()
+           profiler.write('profile')
+      or   @profiler.stage('clean')
+           def clean(ds):
+               ...
+    -----
+    Input:
+      interval_s: (OPTIONAL) sampling interval in seconds (0.5 second by default)
+      include_children: (OPTIONAL) include child processes (e.g. dask or multiprocessing workers) in
+                        RAM and CPU use (True by default)
+    Output:
+      summary and timeline (on screen or as csv files)
+    """
+
+    def __init__(self, interval_s = 0.5, include_children = True):
+        self.interval_s = interval_s
+        self.include_children = include_children
+        self.process = psutil.Process()
+        self.timeline = []
+        self.stages = {}
+        # Stack of the active stage entries of each thread, and the first entry time
+        # and number of active entries of each stage
+        self._stacks = {}
+        self._open = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_time = None
+
+    def _processes(self):
+        processes = [self.process]
+        if self.include_children:
+            try:
+                processes += self.process.children(recursive = True)
+            except psutil.Error:
+                pass
+        return processes
+
+    def _rss(self):
+        rss = 0
+        for process in self._processes():
+            try:
+                rss += process.memory_info().rss
+            except psutil.Error:
+                pass
+        return rss
+
+    def _cpu_s(self):
+        cpu_times = self.process.cpu_times()
+        cpu_s = cpu_times.user + cpu_times.system
+        if self.include_children:
+            # Children already waited for, then the ones still running
+            cpu_s += cpu_times.children_user + cpu_times.children_system
+            for process in self._processes()[1:]:
+                try:
+                    cpu_times = process.cpu_times()
+                    cpu_s += cpu_times.user + cpu_times.system
+                except psutil.Error:
+                    pass
+        return cpu_s
+
+    def _sample(self):
+        rss = self._rss()
+        now = time.time()
+        with self._lock:
+            innermost = []
+            for stack in self._stacks.values():
+                for record in stack:
+                    record['peak_rss'] = max(record['peak_rss'], rss)
+                if stack[-1]['name'] not in innermost:
+                    innermost.append(stack[-1]['name'])
+            self.timeline.append({
+                'time': datetime.datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S.%f"),
+                'elapsed_s': round(now - self._start_time, 3),
+                'stage': '+'.join(innermost),
+                'rss_Mb': int(rss / 1024 / 1024),
+                'ram_used_Mb': int((psutil.virtual_memory().total - psutil.virtual_memory().available) / 1024 / 1024),
+                'swap_used_Mb': int(psutil.swap_memory().used / 1024 / 1024),
+                'cpu_pc': round(psutil.cpu_percent(), 1)})
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self._sample()
+
+    def start(self):
+        """Start the background sampling thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._start_time = time.time() if self._start_time is None else self._start_time
+        psutil.cpu_percent() # first call only initialise the measure
+        self._stop.clear()
+        self._thread = threading.Thread(target = self._run, daemon = True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background sampling thread."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def stage(self, name):
+        """
+        Return a context manager (or decorator) recording the stage <name>.
+        The background sampling thread is started if needed.
+        """
+        profiler = self
+
+        class _Stage(contextlib.ContextDecorator):
+            # A record per entry, in the stack of its thread, as a decorated function can be called
+            # recursively or from several threads at once
+
+            def __enter__(self):
+                profiler.start()
+                rss = profiler._rss()
+                record = {'name': name, 'peak_rss': rss, 'start_rss': rss}
+                start_time, start_cpu_s = time.time(), profiler._cpu_s()
+                with profiler._lock:
+                    profiler._stacks.setdefault(threading.get_ident(), []).append(record)
+                    opened = profiler._open.setdefault(name, {'entries': 0, 'start_time': start_time,
+                                                              'start_cpu_s': start_cpu_s})
+                    opened['entries'] += 1
+                profiler._sample()
+                return self
+
+            def __exit__(self, *exc):
+                profiler._sample()
+                end_time, end_cpu_s = time.time(), profiler._cpu_s()
+                with profiler._lock:
+                    stack = profiler._stacks[threading.get_ident()]
+                    record = stack.pop()
+                    if not stack:
+                        del profiler._stacks[threading.get_ident()]
+                    stage = profiler.stages.setdefault(name, {'stage': name, 'calls': 0, 'wall_s': 0.0,
+                                                              'cpu_s': 0.0, 'peak_rss_Mb': 0,
+                                                              'rss_increase_Mb': 0})
+                    stage['calls'] += 1
+                    opened = profiler._open[name]
+                    opened['entries'] -= 1
+                    if opened['entries'] == 0:
+                        # Last exit of the stage: count the time since its first entry once
+                        del profiler._open[name]
+                        stage['wall_s'] = round(stage['wall_s'] + end_time - opened['start_time'], 3)
+                        stage['cpu_s'] = round(stage['cpu_s'] + end_cpu_s - opened['start_cpu_s'], 3)
+                    stage['peak_rss_Mb'] = max(stage['peak_rss_Mb'], int(record['peak_rss'] / 1024 / 1024))
+                    stage['rss_increase_Mb'] = max(stage['rss_increase_Mb'],
+                        int((record['peak_rss'] - record['start_rss']) / 1024 / 1024))
+                return False
+
+        return _Stage()
+
+    def summary(self):
+        """Return the per stage summary as a list of dictionaries (in order of first call)."""
+        with self._lock:
+            return [dict(stage) for stage in self.stages.values()]
+
+    def print_summary(self):
+        """Print the per stage summary on screen."""
+        print('%-15s %6s %10s %10s %12s %16s' % ('stage', 'calls', 'wall_s', 'cpu_s', 'peak_rss_Mb',
+                                                  'rss_increase_Mb'))
+        for stage in self.summary():
+            print('%-15s %6i %10.1f %10.1f %12i %16i' % (stage['stage'], stage['calls'], stage['wall_s'],
+                                                          stage['cpu_s'], stage['peak_rss_Mb'],
+                                                          stage['rss_increase_Mb']))
+
+    def write(self, log_name = 'profile'):
+        """
+        Write the per stage summary and the raw timeline in <log_name>_summary.csv and
+        <log_name>_timeline.csv files.
+        """
+        fields = ['stage', 'calls', 'wall_s', 'cpu_s', 'peak_rss_Mb', 'rss_increase_Mb']
+        with open('%s_summary.csv' % (log_name), 'w', newline = '') as f:
+            writer = csv.DictWriter(f, fieldnames = fields)
+            writer.writeheader()
+            writer.writerows(self.summary())
+        fields = ['time', 'elapsed_s', 'stage', 'rss_Mb', 'ram_used_Mb', 'swap_used_Mb', 'cpu_pc']
+        with self._lock:
+            timeline = list(self.timeline)
+        with open('%s_timeline.csv' % (log_name), 'w', newline = '') as f:
+            writer = csv.DictWriter(f, fieldnames = fields)
+            writer.writeheader()
+            writer.writerows(timeline)
+
+        return 0
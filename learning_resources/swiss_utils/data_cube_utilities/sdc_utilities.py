@@ -13,16 +13,20 @@
 
 # Import necessary stuff
 import sys
-import rasterio
-import gdal
 
 import numpy as np
 import xarray as xr
 
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from numpy.lib.stride_tricks import as_strided
 
-from utils.data_cube_utilities.dc_utilities import clear_attrs
+from utils.data_cube_utilities.lazy_import import lazy_import
+from utils.data_cube_utilities.dc_utilities import clear_attrs, create_bit_field_mask, LANDSAT_C1_PIXEL_QA_FIELDS
+from utils.data_cube_utilities.dc_load import get_product_footprint
+
+gdal = lazy_import('gdal')
+rasterio = lazy_import('rasterio')
 
 
 def create_slc_clean_mask(slc, valid_cats = [4, 5, 6, 7, 11]):
@@ -103,42 +107,44 @@ def ls_qa_clean(dc_qa, valid_bits = [1, 2, 4]):
     if dc_qa.name != "pixel_qa":
         sys.exit("SCRIPT INTERRUPTED: dc_qa name  should be pixel_qa")
 
-    # List and count all dc_qa unique values
-    dc_qas, dc_cnt = unik_count(dc_qa.values)
-    # Return bit encoding
-    bit_len = bit_length(max(dc_qas))
+    return _ls_qa_clean_mask(dc_qa, valid_bits).values
 
-    # First keep only low confidence cloud (and cirrus)
-    ok_qas = []
-    ko_qas = []
 
-    if bit_len == 8: # Landsat 5 and 7
-        for v in sorted(dc_qas):
-            b = str(bin(v))[2:].zfill(bit_len)[::-1]
-            if b[6] == '1' and b[7] == '0':
-                ok_qas.append(v)
-            else:
-                ko_qas.append(v)
-
-    if bit_len >= 10: # Landsat 8 (>= as sometimes pixel_qa become 11 bit !!!)
-        for v in sorted(dc_qas):
-            b = str(bin(v))[2:].zfill(bit_len)[::-1]
-            if b[6] == '1' and b[7] == '0' and b[8] == '1' and b[9] == '0':
-                ok_qas.append(v)
-            else:
-                ko_qas.append(v)
+def _ls_qa_clean_mask(dc_qa, valid_bits):
+    """
+    Description:
+      create the clean mask of ls_qa_clean as an xarray.DataArray, lazily if dc_qa is a dask array
+    """
 
+    # First keep only low confidence cloud (and cirrus for Landsat 8)
+    ls57_confidences = {'cloud_confidence': 1}
+    ls8_confidences = {'cloud_confidence': 1, 'cirrus_confidence': 1}
     # Second keep only valid_bits
-    data_qas = []
-    nodata_qas = []
-    for v in sorted(ok_qas):
-        b = str(bin(v))[2:].zfill(bit_len)[::-1]
-        for c in valid_bits:
-            if b[c] == '1':
-                data_qas.append(v)
-                break
+    data_mask = create_bit_field_mask(dc_qa, {(c, 1): 1 for c in valid_bits}, how='any')
+
+    if dc_qa.chunks is not None:
+        # Select the bit encoding (8 bits for Landsat 5 and 7, >= 10 bits for Landsat 8) within
+        # the dask graph, so that dc_qa is not computed just to find its maximum
+        qa_max = dc_qa.max()
+        ok_mask = xr.where(qa_max >= 2 ** 9,
+                           create_bit_field_mask(dc_qa, ls8_confidences, LANDSAT_C1_PIXEL_QA_FIELDS),
+                           xr.where((qa_max >= 2 ** 7) & (qa_max < 2 ** 8),
+                                    create_bit_field_mask(dc_qa, ls57_confidences, LANDSAT_C1_PIXEL_QA_FIELDS),
+                                    False))
+        return ok_mask & data_mask
 
-    return xr.apply_ufunc(np.isin, dc_qa, data_qas, dask = 'allowed').values
+    # Return bit encoding
+    bit_len = bit_length(int(dc_qa.max()))
+
+    if bit_len == 8: # Landsat 5 and 7
+        confidences = ls57_confidences
+    elif bit_len >= 10: # Landsat 8 (>= as sometimes pixel_qa become 11 bit !!!)
+        confidences = ls8_confidences
+    else:
+        return xr.zeros_like(dc_qa, dtype=bool)
+    ok_mask = create_bit_field_mask(dc_qa, confidences, LANDSAT_C1_PIXEL_QA_FIELDS)
+
+    return ok_mask & data_mask
 
 
 def get_platform(dc, products):
@@ -273,6 +279,94 @@ def load_multi_clean(dc, products, time, lon, lat, measurements, dropna = False,
         return (0, 0)
 
 
+def _load_clean_product(dc, product, platform, prfx, time, lon, lat, measurements, valid_cats, dask_chunks):
+    """
+    Description:
+      load and clean one product for load_multi_clean_concurrent, lazily if dask_chunks is given
+    Output:
+      cleaned dataset or None if the product has no data
+    """
+    dataset_tmp = dc.load(platform = platform, product = product,
+                          time = time,
+                          lon = lon,
+                          lat = lat,
+                          measurements = measurements,
+                          dask_chunks = dask_chunks)
+
+    if len(dataset_tmp.variables) == 0:
+        return None
+
+    # Clean dataset_tmp
+    if prfx == "LANDSAT":
+        clean_mask_tmp = _ls_qa_clean_mask(dataset_tmp.pixel_qa, valid_cats)
+    else:
+        clean_mask_tmp = xr.apply_ufunc(np.isin, dataset_tmp.slc, kwargs = {'test_elements': valid_cats},
+                                        dask = 'parallelized', output_dtypes = [bool])
+    dataset_clean_tmp = dataset_tmp.where(clean_mask_tmp)
+
+    # Remove negative values
+    return dataset_clean_tmp.where(dataset_clean_tmp >= 0)
+
+
+def load_multi_clean_concurrent(dc, products, time, lon, lat, measurements, dropna = False, platforms = [],
+                                valid_cats = [], dask_chunks = None, max_workers = 4):
+    """
+    Description:
+      Same as load_multi_clean, but products are loaded and cleaned concurrently on a pool of threads
+      and concatenated once at the end, so the loading time is close to the one of the slowest product.
+      If dask_chunks is given, products are loaded and cleaned lazily (dask arrays).
+    Input:
+      dc:           datacube.api.core.Datacube
+                    The Datacube instance to load data with.
+    Args:
+      see load_multi_clean, and:
+      dask_chunks:  dict of dimension names to chunk sizes for dc.load (default: None, load in memory)
+      max_workers:  maximum number of products loaded at the same time (default: 4)
+    Output:
+      cleaned dataset and clean_mask sorted by ascending time
+      (with dask_chunks the clean_mask is a lazy xarray.DataArray)
+    """
+
+    # Check submitted input
+    # Convert product string into list
+    if isinstance(products, str):
+        products = products.split()
+    # Get platforms if not provided
+    if len(products) != len(platforms):
+        platforms = get_platform(dc, products)
+    # Check LANDSAT and SENTINEL products are not mixed using products prefix
+    prfx = set(platform.split('_')[0] for platform in platforms)
+    if len(prfx) > 1:
+        sys.exit('Mixed platforms %s' % (prfx))
+    prfx = prfx.pop() if len(prfx) == 1 else None
+    if prfx != "LANDSAT" and platforms[0] != "SENTINEL_2":
+        sys.exit('Unsupported platform %s' % (platforms[0]))
+
+    if len(valid_cats) == 0:
+        valid_cats = [1, 2, 4] if prfx == "LANDSAT" else [4, 5, 6, 7, 11]
+
+    # Load and clean products concurrently
+    with ThreadPoolExecutor(max_workers = max(1, min(max_workers, len(products)))) as executor:
+        datasets_clean = list(executor.map(
+            lambda product_platform: _load_clean_product(dc, product_platform[0], product_platform[1], prfx,
+                                                         time, lon, lat, measurements, valid_cats, dask_chunks),
+            zip(products, platforms)))
+    datasets_clean = [dataset_clean for dataset_clean in datasets_clean if dataset_clean is not None]
+
+    if len(datasets_clean) == 0:
+        return (0, 0)
+
+    # Concatenate once and sort dataset by ascending time
+    dataset_clean = xr.concat(datasets_clean, dim = 'time').sortby('time')
+
+    if dropna:
+        # remove time without any data
+        dataset_clean = dataset_clean.dropna('time', how='all')
+
+    clean_mask = dataset_clean[measurements[0]].notnull()
+    return (dataset_clean, clean_mask if dask_chunks is not None else clean_mask.values)
+
+
 # source: https://stackoverflow.com/questions/32846846/quick-way-to-upsample-numpy-array-by-nearest-neighbor-tiling
 def tile_array(a, x0, x1, x2):
     t, r, c = a.shape                                    # number of rows/columns
@@ -567,45 +661,26 @@ def write_geotiff_from_xr(tif_path, dataset, bands, no_data=-9999, crs="EPSG:432
 def new_get_query_metadata(dc, product, quick = False):
     """
     Gets a descriptor based on a request.
+    Extents are computed from the dataset index (no data is loaded) and memoized per product.
 
     Args:
         dc: The Datacube instance to load data with.
         product (string): The name of the product associated with the desired dataset.
-        quick (boolean): Attempt to quickly get metadata from a small dataset, and process
-                         the full dataset if not possible. tile_count will not be evaluated
-                         with this option.
+        quick (boolean): Kept for backward compatibility, the index query is always quick.
 
     Returns:
         scene_metadata (dict): Dictionary containing a variety of data that can later be
                                accessed.
     """
-    todo = True
-    if quick:
-        limit = 10
-        ds = dc.load(product, measurements = [], limit = limit)
-        if len(ds.time) == limit:
-            todo = False
-            tile_count = 'not calculated with quick option'
-    if todo:
-        ds = dc.load(product, measurements = [])
-        tile_count = ds.time.size
-    try:
-        ds = ds.rename({'longitude': 'x', 'latitude': 'y'})
-    except: 
-        pass
-    resx = (max(ds.x.values) - min(ds.x.values)) / (len(ds.x) -1)
-    resy = (max(ds.y.values) - min(ds.y.values)) / (len(ds.y) -1)
-    minx = min(ds.x.values) - resx / 2
-    miny = min(ds.y.values) - resy / 2
-    maxx = max(ds.x.values) + resx / 2
-    maxy = max(ds.y.values) + resy / 2
-    
-    return {'lat_extents': (miny, maxy),
-            'lon_extents': (minx, maxx),
-            'time_extents': (ds.time[0].values.astype('M8[ms]').tolist(),
-                             ds.time[-1].values.astype('M8[ms]').tolist()),
-            'tile_count': tile_count,
-            'pixel_count': len(ds.x) * len(ds.y)}
+    footprint = get_product_footprint(dc, product)
+
+    return {'lat_extents': footprint['lat_extents'],
+            'lon_extents': footprint['lon_extents'],
+            'time_extents': footprint['time_extents'],
+            'tile_count': footprint['tile_count'],
+            'pixel_count': footprint['pixel_count'],
+            'crs': footprint['crs'],
+            'resolution': footprint['resolution']}
     
 def summarize_products_extents(dc, products):
     """
@@ -622,6 +697,7 @@ def summarize_products_extents(dc, products):
     start_date, end_date = datetime.strptime('2050-12-31', '%Y-%m-%d'), datetime.strptime('1970-01-01', '%Y-%m-%d')
     for product in products:
         mt = new_get_query_metadata(dc, product)
+        if mt['time_extents'][0] is None: continue # skip products without any dataset
         miny = mt['lat_extents'][0] if mt['lat_extents'][0] < miny else miny
         maxy = mt['lat_extents'][1] if mt['lat_extents'][1] > maxy else maxy
         minx = mt['lon_extents'][0] if mt['lon_extents'][0] < minx else minx
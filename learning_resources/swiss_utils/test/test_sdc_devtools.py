@@ -0,0 +1,88 @@
+import unittest
+from unittest import mock
+
+import os
+import sys
+import warnings
+import numpy as np
+import pandas as pd
+import xarray as xr
+import dask.array as da
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from data_cube_utilities import sdc_devtools
+
+
+def brute_force_focal_stats(array, window, stat):
+    """Computes a focal statistic pixel by pixel, with windows clipped at the array edges."""
+    reductions = {'sum': np.nansum, 'count': lambda values: np.isfinite(values).sum(),
+                  'mean': np.nanmean, 'var': np.nanvar}
+    rows, cols = array.shape[-2:]
+    result = np.empty(array.shape)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for index in np.ndindex(array.shape[:-2]):
+            for row in range(rows):
+                for col in range(cols):
+                    values = array[index][max(row - window[0] // 2, 0):row + window[0] // 2 + 1,
+                                          max(col - window[1] // 2, 0):col + window[1] // 2 + 1]
+                    result[index + (row, col)] = reductions[stat](values)
+    return result
+
+
+class TestFocalStats(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.array = rng.normal(1000, 50, (2, 9, 11))
+        self.array[rng.random(self.array.shape) < 0.3] = np.nan
+        self.array[0, :3, :3] = np.nan # windows without values
+
+    def test_focal_stats(self):
+        for window in [1, 3, 5, (3, 7), (9, 11)]:
+            window_size = (window, window) if np.isscalar(window) else window
+            for stat in ['sum', 'count', 'mean', 'var']:
+                with self.subTest(window=window, stat=stat):
+                    expected = brute_force_focal_stats(self.array, window_size, stat)
+                    result = sdc_devtools.focal_stats(self.array, window, stat)
+                    self.assertTrue(np.allclose(result, expected, equal_nan=True))
+
+                    # Dask arrays give the same result, across blocks.
+                    lazy = sdc_devtools.focal_stats(da.from_array(self.array, chunks=(1, 4, 5)), window, stat)
+                    self.assertTrue(isinstance(lazy, da.Array))
+                    self.assertTrue(np.allclose(lazy.compute(), expected, equal_nan=True))
+
+        self.assertTrue(np.allclose(sdc_devtools.focal_mean(self.array, 3),
+                                    brute_force_focal_stats(self.array, (3, 3), 'mean'), equal_nan=True))
+        self.assertTrue(np.allclose(sdc_devtools.focal_var(self.array, 3),
+                                    brute_force_focal_stats(self.array, (3, 3), 'var'), equal_nan=True))
+
+    def test_focal_stats_valid(self):
+        expected = brute_force_focal_stats(self.array, (3, 5), 'sum')[..., 1:-1, 2:-2]
+        result = sdc_devtools.focal_stats(xr.DataArray(self.array, dims=('time', 'latitude', 'longitude')),
+                                          (3, 5), 'sum', mode='valid')
+        self.assertTrue(isinstance(result, xr.DataArray) and result.shape == (2, 7, 7))
+        self.assertTrue(np.allclose(result.values, expected))
+
+        with self.assertRaises(AssertionError):
+            sdc_devtools.focal_stats(self.array, 4, 'mean')
+        with self.assertRaises(ValueError):
+            sdc_devtools.focal_stats(self.array, (3, 0), 'mean', mode='valid')
+
+    def test_ds_focus(self):
+        rng = np.random.default_rng(1)
+        red = rng.random((6, 12, 10))
+        red[rng.random(red.shape) < 0.4] = np.nan
+        ds = xr.Dataset({'red': (('time', 'latitude', 'longitude'), red)},
+                        coords={'time': pd.date_range('2020-01-01', periods=6),
+                                'latitude': np.linspace(46.5, 46.39, 12), 'longitude': np.linspace(6.0, 6.09, 10)})
+
+        def rolling_window_sum(arr, window, mode='valid'):
+            return sdc_devtools.rolling_window(arr, (window, window)).sum((2, 3))
+
+        for dough_width in [1, 2]:
+            for stat in ['min', 'max']:
+                focus = sdc_devtools.ds_focus(ds, dough_width, stat)
+                with mock.patch.object(sdc_devtools, 'focal_sum', rolling_window_sum):
+                    expected = sdc_devtools.ds_focus(ds, dough_width, stat)
+                self.assertTrue(focus.identical(expected))
@@ -0,0 +1,88 @@
+import unittest
+
+import threading
+from unittest import mock
+
+from data_cube_utilities import sdc_monit
+
+
+class TestStageProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = sdc_monit.StageProfiler(interval_s=0.05, include_children=False)
+
+    def tearDown(self):
+        self.profiler.stop()
+
+    def test_stage_recursive(self):
+        @self.profiler.stage('factorial')
+        def factorial(n):
+            return 1 if n <= 1 else n * factorial(n - 1)
+
+        self.assertTrue(factorial(5) == 120)
+        summary = {stage['stage']: stage for stage in self.profiler.summary()}
+        self.assertTrue(summary['factorial']['calls'] == 5)
+        self.assertTrue(len(self.profiler._stacks) == 0 and len(self.profiler._open) == 0)
+
+    def test_stage_recursive_wall_time(self):
+        clock = mock.Mock()
+        clock.time.return_value = 0.0
+
+        @self.profiler.stage('countdown')
+        def countdown(n):
+            clock.time.return_value += 1
+            return n if n <= 1 else countdown(n - 1)
+
+        with mock.patch.object(sdc_monit, 'time', clock):
+            countdown(5)
+            countdown(2)
+        # The time of the nested calls is counted once.
+        summary = {stage['stage']: stage for stage in self.profiler.summary()}
+        self.assertTrue(summary['countdown']['calls'] == 7)
+        self.assertTrue(summary['countdown']['wall_s'] == 7.0)
+
+    def test_stage_nested(self):
+        with self.profiler.stage('outer'):
+            with self.profiler.stage('inner'):
+                pass
+            with self.profiler.stage('inner'):
+                pass
+        summary = {stage['stage']: stage for stage in self.profiler.summary()}
+        self.assertTrue(summary['outer']['calls'] == 1)
+        self.assertTrue(summary['inner']['calls'] == 2)
+        self.assertTrue(summary['outer']['wall_s'] >= summary['inner']['wall_s'])
+
+    def test_stage_threads(self):
+        @self.profiler.stage('work')
+        def work(barrier):
+            barrier.wait()
+
+        barrier = threading.Barrier(4)
+        threads = [threading.Thread(target=work, args=(barrier,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        summary = {stage['stage']: stage for stage in self.profiler.summary()}
+        self.assertTrue(summary['work']['calls'] == 4)
+        self.assertTrue(len(self.profiler._stacks) == 0 and len(self.profiler._open) == 0)
+
+    def test_stage_threads_timeline(self):
+        entered, done = threading.Event(), threading.Event()
+
+        def clean():
+            with self.profiler.stage('clean'):
+                entered.set()
+                done.wait()
+
+        with self.profiler.stage('load'):
+            thread = threading.Thread(target=clean)
+            thread.start()
+            entered.wait()
+            self.profiler._sample()
+            # Samples are tagged with the innermost stage of each thread.
+            self.assertTrue(set(self.profiler.timeline[-1]['stage'].split('+')) == {'load', 'clean'})
+            done.set()
+            thread.join()
+            self.profiler._sample()
+            self.assertTrue(self.profiler.timeline[-1]['stage'] == 'load')
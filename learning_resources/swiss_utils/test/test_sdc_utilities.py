@@ -0,0 +1,132 @@
+import unittest
+from unittest import mock
+
+import os
+import sys
+from types import SimpleNamespace
+from datetime import datetime
+import dask
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from data_cube_utilities import sdc_utilities
+
+
+def search_result(lat, lon, time):
+    """Returns a result of `dc.index.datasets.search_returning(['lat', 'lon', 'time'])`."""
+    return SimpleNamespace(lat=SimpleNamespace(begin=lat[0], end=lat[1]),
+                           lon=SimpleNamespace(begin=lon[0], end=lon[1]),
+                           time=SimpleNamespace(begin=time, end=time))
+
+
+def mock_datacube(products):
+    """
+    Returns a mocked `datacube.Datacube` whose index holds products, given as a dictionary
+    mapping product names to the results of `search_returning()`.
+    """
+    dc = mock.MagicMock()
+    dc.index.products.get_by_name.side_effect = \
+        lambda name: SimpleNamespace(definition={}) if name in products else None
+    dc.index.datasets.search_returning.side_effect = lambda fields, product, **query: iter(products[product])
+    return dc
+
+
+class TestProductsExtents(unittest.TestCase):
+
+    def setUp(self):
+        self.dc = mock_datacube({
+            'ls7_swiss': [search_result((46.0, 46.5), (6.0, 6.5), datetime(2000, 3, 1)),
+                          search_result((46.2, 47.5), (6.2, 7.0), datetime(2003, 5, 1))],
+            'ls8_swiss': [search_result((45.8, 46.4), (6.5, 10.5), datetime(2013, 4, 11)),
+                          search_result((46.1, 46.9), (7.0, 9.5), datetime(2020, 12, 30))],
+            'empty': [],
+        })
+
+    def test_new_get_query_metadata(self):
+        metadata = sdc_utilities.new_get_query_metadata(self.dc, 'ls7_swiss')
+        self.assertTrue(metadata['lat_extents'] == (46.0, 47.5))
+        self.assertTrue(metadata['lon_extents'] == (6.0, 7.0))
+        self.assertTrue(metadata['time_extents'] == (datetime(2000, 3, 1), datetime(2003, 5, 1)))
+        self.assertTrue(metadata['tile_count'] == 2)
+
+    def test_summarize_products_extents(self):
+        extents = sdc_utilities.summarize_products_extents(self.dc, ['ls7_swiss', 'empty', 'ls8_swiss', 'unknown'])
+        self.assertTrue(extents['lat_extents'] == (45.8, 47.5))
+        self.assertTrue(extents['lon_extents'] == (6.0, 10.5))
+        self.assertTrue(extents['time_extents'] == (datetime(2000, 3, 1), datetime(2020, 12, 30)))
+
+
+def load_products(products):
+    """
+    Returns a stub of `dc.load()` for products, given as a dictionary mapping product names to
+    datasets (empty datasets for products without data).
+    """
+    def load(product, measurements, dask_chunks=None, **query):
+        if len(products[product].variables) == 0:
+            return xr.Dataset()
+        dataset = products[product][measurements]
+        return dataset.chunk(dask_chunks) if dask_chunks is not None else dataset
+    return load
+
+
+def never_compute(*args, **kwargs):
+    raise AssertionError("The data was computed.")
+
+
+class TestLoadMultiClean(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        coords = {'latitude': [46.3, 46.2, 46.1, 46.0], 'longitude': [6.0, 6.1, 6.2, 6.3, 6.4]}
+
+        def dataset(times, qa_values, qa_name='pixel_qa'):
+            times = pd.to_datetime(times)
+            shape = (len(times), 4, 5)
+            return xr.Dataset({'red': (('time', 'latitude', 'longitude'), rng.integers(-100, 3000, shape)),
+                               'nir': (('time', 'latitude', 'longitude'), rng.integers(-100, 3000, shape)),
+                               qa_name: (('time', 'latitude', 'longitude'), rng.choice(qa_values, shape))},
+                              coords=dict(coords, time=times))
+
+        # Clear, water and snow pixels with low, medium and high cloud (and cirrus) confidence.
+        self.landsat = {'ls7_ledaps_swiss': dataset(['2019-01-05', '2019-02-06', '2019-03-10'],
+                                                    [66, 68, 80, 130, 96, 1]),
+                        'ls8_lasrc_swiss': dataset(['2019-01-13', '2019-02-14'], [322, 324, 386, 834, 336, 1]),
+                        'ls5_ledaps_swiss': xr.Dataset()}
+        self.sentinel_2 = {'s2_l2a_swiss': dataset(['2019-01-02', '2019-01-07'], list(range(12)), 'slc'),
+                           's2b_l2a_swiss': dataset(['2019-01-04'], list(range(12)), 'slc')}
+        self.query = dict(time=('2019-01-01', '2019-12-31'), lon=(6.0, 6.4), lat=(46.0, 46.3))
+
+    def test_load_multi_clean_concurrent(self):
+        for products, platforms, measurements in [
+                (self.landsat, ['LANDSAT_7', 'LANDSAT_8', 'LANDSAT_5'], ['red', 'nir', 'pixel_qa']),
+                (self.sentinel_2, ['SENTINEL_2', 'SENTINEL_2'], ['red', 'nir', 'slc'])]:
+            dc = mock.MagicMock()
+            dc.load.side_effect = load_products(products)
+            for dropna in [False, True]:
+                expected, expected_mask = sdc_utilities.load_multi_clean(
+                    dc, list(products), measurements=measurements, dropna=dropna, platforms=platforms, **self.query)
+                dataset, clean_mask = sdc_utilities.load_multi_clean_concurrent(
+                    dc, list(products), measurements=measurements, dropna=dropna, platforms=platforms,
+                    max_workers=2, **self.query)
+                self.assertTrue(dataset.identical(expected))
+                self.assertTrue(isinstance(clean_mask, np.ndarray) and (clean_mask == expected_mask).all())
+
+    def test_load_multi_clean_concurrent_lazy(self):
+        dc = mock.MagicMock()
+        dc.load.side_effect = load_products(self.landsat)
+        platforms = ['LANDSAT_7', 'LANDSAT_8', 'LANDSAT_5']
+        measurements = ['red', 'nir', 'pixel_qa']
+        expected, expected_mask = sdc_utilities.load_multi_clean_concurrent(
+            dc, list(self.landsat), measurements=measurements, platforms=platforms, **self.query)
+
+        # Products are loaded and cleaned without computing the data.
+        with dask.config.set(scheduler=never_compute):
+            dataset, clean_mask = sdc_utilities.load_multi_clean_concurrent(
+                dc, list(self.landsat), measurements=measurements, platforms=platforms,
+                dask_chunks={'time': 1}, **self.query)
+        self.assertTrue(all(data_arr.chunks is not None for data_arr in dataset.data_vars.values()))
+        self.assertTrue(clean_mask.chunks is not None)
+        self.assertTrue(dataset.compute().identical(expected))
+        self.assertTrue((clean_mask.values == expected_mask).all())
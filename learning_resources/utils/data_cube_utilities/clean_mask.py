@@ -6,10 +6,53 @@ from xarray.ufuncs import logical_or  as xr_or
 
 ## Utils ##
 
+# Below this many values, in-place comparisons are faster than a lookup table.
+_VALUES_IN_LUT_MIN_VALUES = 8
+
+
+def _values_in(arr, values):
+    """
+    Returns a boolean mask of where a NumPy or dask array has any of `values`, in one pass.
+
+    8 and 16 bit integer arrays are mapped through a lookup table over all values of their dtype
+    (or compared in place for a few values). Other arrays use `np.isin()`.
+    Dask arrays are mapped lazily, block by block.
+    """
+    values = np.asarray(values).ravel()
+    if np.issubdtype(arr.dtype, np.integer) and arr.dtype.itemsize <= 2:
+        info = np.iinfo(arr.dtype)
+        if np.issubdtype(values.dtype, np.number):
+            values = values[(values >= info.min) & (values <= info.max) & (values == np.round(values))]
+        else:
+            values = values[:0]
+        values = np.unique(values.astype(arr.dtype))
+        if len(values) >= _VALUES_IN_LUT_MIN_VALUES:
+            index_dtype = np.dtype('uint{}'.format(8 * arr.dtype.itemsize))
+            lut = np.zeros(2**(8 * arr.dtype.itemsize), dtype=bool)
+            # Index by the unsigned view of the data so that negative values have positions in the table.
+            lut[values.view(index_dtype)] = True
+            values_in = lambda block: lut[block.view(index_dtype)]
+        else:
+            def values_in(block):
+                mask = np.zeros(block.shape, dtype=bool)
+                for value in values:
+                    mask |= block == value
+                return mask
+    else:
+        values_in = lambda block: np.isin(block, values)
+    if not isinstance(arr, np.ndarray) and hasattr(arr, 'map_blocks'):
+        return arr.map_blocks(values_in, dtype=bool)
+    return values_in(arr)
+
+
 def xarray_values_in(data, values, data_vars=None):
     """
     Returns a mask for an xarray Dataset or DataArray, with `True` wherever the value is in values.
 
+    The mask is computed in one pass per data variable - with a lookup table for many values in 8 and 16 bit
+    integer data (e.g. Sentinel-2 SCL or Fmask bands) and `np.isin()` for other data.
+    Data backed by dask arrays is masked lazily.
+
     Parameters
     ----------
     data: xarray.Dataset or xarray.DataArray
@@ -21,20 +64,18 @@ def xarray_values_in(data, values, data_vars=None):
 
     Returns
     -------
-    mask: np.ndarray
-        A NumPy array shaped like ``data``. The mask can be used to mask ``data``.
+    mask: np.ndarray or dask.array.Array
+        An array shaped like ``data``. The mask can be used to mask ``data``.
         That is, ``data.where(mask)`` is an intended use.
     """
-    data_vars_to_check = data_vars if data_vars is not None else list(data.data_vars.keys())
     if isinstance(data, xr.Dataset):
-        mask = np.full_like(data[data_vars_to_check[0]].values, False, dtype=np.bool)
+        data_vars_to_check = data_vars if data_vars is not None else list(data.data_vars.keys())
+        mask = None
         for data_arr in data[data_vars_to_check].values():
-            for value in values:
-                mask = mask | (data_arr.values == value)
+            data_arr_mask = _values_in(data_arr.data, values)
+            mask = data_arr_mask if mask is None else mask | data_arr_mask
     elif isinstance(data, xr.DataArray):
-        mask = np.full_like(data, False, dtype=np.bool)
-        for value in values:
-            mask = mask | (data.values == value)
+        mask = _values_in(data.data, values)
     return mask
 
 ## End Utils ##
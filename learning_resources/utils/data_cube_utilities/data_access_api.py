@@ -25,6 +25,7 @@ from datacube.api import GridWorkflow
 import xarray as xr
 import numpy as np
 from datetime import date
+from concurrent.futures import ThreadPoolExecutor
 
 
 class DataAccessApi:
@@ -160,6 +161,70 @@ class DataAccessApi:
 
         return data
 
+    def get_stacked_datasets_by_extent_concurrent(self,
+                                                  products,
+                                                  product_type=None,
+                                                  platforms=None,
+                                                  time=None,
+                                                  longitude=None,
+                                                  latitude=None,
+                                                  measurements=None,
+                                                  output_crs=None,
+                                                  resolution=None,
+                                                  dask_chunks=None,
+                                                  max_workers=4,
+                                                  **kwargs):
+        """
+        Concurrent version of `get_stacked_datasets_by_extent()`.
+        Products are loaded on a bounded thread pool and merged with a single concatenation
+        and sort along time. The platform of each acquisition is recorded as a 1D 'satellite'
+        coordinate along time rather than as a (time, latitude, longitude) data variable.
+
+        Args:
+          products (array of strings): The names of the product associated with the desired dataset.
+          product_type (string): The type of product associated with the desired dataset.
+          platforms (array of strings): The platforms associated with the desired dataset.
+          time (tuple): A tuple consisting of the start time and end time for the dataset.
+          longitude (tuple): A tuple of floats specifying the min,max longitude bounds.
+          latitude (tuple): A tuple of floats specifying the min,max latitutde bounds.
+          measurements (list): A list of strings that represents all measurements.
+          output_crs (string): Determines reprojection of the data before its returned
+          resolution (tuple): A tuple of min,max ints to determine the resolution of the data.
+          dask_chunks (dict): Lazy loaded array block sizes, not lazy loaded by default.
+          max_workers (int): The maximum number of products loaded at the same time.
+
+        Returns:
+          data (xarray): dataset with the desired data, with a 'satellite' coordinate along
+                         time holding the index of the product each acquisition came from.
+        """
+
+        def load_product(index):
+            return self.get_dataset_by_extent(
+                products[index],
+                product_type=product_type,
+                platform=platforms[index] if platforms is not None else None,
+                time=time,
+                longitude=longitude,
+                latitude=latitude,
+                measurements=measurements,
+                output_crs=output_crs,
+                resolution=resolution,
+                dask_chunks=dask_chunks)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(products)))) as executor:
+            # `map()` keeps the results in product order.
+            products_data = list(executor.map(load_product, range(len(products))))
+
+        data_array = []
+        for index, product_data in enumerate(products_data):
+            if 'time' in product_data:
+                data_array.append(product_data.assign_coords(
+                    satellite=('time', np.full(product_data.time.size, index, dtype="int16"))))
+
+        if len(data_array) == 0:
+            return None
+        return xr.concat(data_array, 'time').sortby('time')
+
     def get_query_metadata(self, product, platform=None, longitude=None, latitude=None, time=None, **kwargs):
         """
         Gets a descriptor based on a request.
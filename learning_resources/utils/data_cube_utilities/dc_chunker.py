@@ -1,6 +1,6 @@
 import math
 from datetime import datetime
-from itertools import groupby
+from itertools import groupby, product
 import xarray as xr
 import numpy as np
 import os
@@ -82,6 +82,310 @@ def combine_geographic_chunks(chunks):
     return combined_data.reindex(indices, copy=False)
 
 
+def plan_chunks(measurements, resolution, time_steps, memory_budget, temp_copy_multiplier=2.0,
+                tile_size=None, longitude=None, latitude=None, min_xy_size=64):
+    """Plan x/y/time chunk shapes that fit a memory budget.
+
+    The planned chunks keep all time steps together when possible (so that per-pixel time series
+    are not split), and are otherwise split in time. Spatial chunks are square, aligned to the pixel
+    grid and, if `tile_size` is given, to storage tile boundaries.
+
+    Args:
+        measurements: Either a dict mapping measurement names to dtypes or a list of dicts with a 'dtype'
+            key, such as the output of `dc.list_measurements(with_pandas=False)` filtered to a product.
+        resolution: The (y, x) resolution of the loaded data, in units of the CRS.
+        time_steps: The number of acquisitions that will be loaded.
+        memory_budget: The maximum number of bytes each worker may use.
+        temp_copy_multiplier: The peak memory of the analysis relative to the loaded data,
+            e.g. 3 if the analysis holds two temporary copies of the data at once.
+        tile_size (optional): The (y, x) size of storage tiles in pixels. Chunk sizes will be
+            multiples of (or, if smaller, divisors of) the tile size.
+        longitude, latitude (optional): The extents that will be chunked. Chunks will not be planned larger than them.
+        min_xy_size: The smallest x and y size in pixels before splitting time instead.
+
+    Returns:
+        A dict with the chunk shape in pixels ('x', 'y', 'time'), the chunk size in units of the CRS
+        ('x_size', 'y_size'), the `geographic_chunk_size` and `time_chunk_size` arguments for
+        `create_geographic_chunks()` and `create_time_chunks()`, and the estimated peak 'bytes' for a chunk.
+
+    """
+    if isinstance(measurements, dict):
+        dtypes = list(measurements.values())
+    else:
+        dtypes = [measurement['dtype'] for measurement in measurements]
+    bytes_per_pixel = sum(np.dtype(dtype).itemsize for dtype in dtypes) * temp_copy_multiplier
+    assert bytes_per_pixel > 0, "At least one measurement is required."
+    res_y, res_x = abs(resolution[0]), abs(resolution[1])
+
+    max_x = max_y = None
+    if longitude is not None and latitude is not None:
+        max_x = max(1, int(math.ceil(round((longitude[1] - longitude[0]) / res_x, 6))))
+        max_y = max(1, int(math.ceil(round((latitude[1] - latitude[0]) / res_y, 6))))
+
+    # Keep all time steps together unless that would make chunks smaller than `min_xy_size`.
+    min_pixels = min_xy_size * min_xy_size
+    if max_x is not None:
+        min_pixels = min(min_pixels, max_x * max_y)
+    time_chunk_size = int(min(time_steps, max(1, memory_budget // (bytes_per_pixel * min_pixels))))
+    pixels = int(memory_budget // (bytes_per_pixel * time_chunk_size))
+    if pixels < 1:
+        raise ValueError("A memory budget of {} bytes cannot hold a single pixel of a single time step "
+                         "({} bytes).".format(memory_budget, bytes_per_pixel))
+
+    x = y = max(1, int(math.sqrt(pixels)))
+    if max_x is not None:
+        # Chunks narrower than the extent in one dimension can be larger in the other.
+        x, y = min(x, max_x), min(y, max_y)
+        if x == max_x:
+            y = min(max_y, max(1, pixels // x))
+        elif y == max_y:
+            x = min(max_x, max(1, pixels // y))
+    if tile_size is not None:
+        y, x = _align_to_tiles(y, tile_size[0]), _align_to_tiles(x, tile_size[1])
+
+    return {
+        'x': x,
+        'y': y,
+        'time': time_chunk_size,
+        'x_size': x * res_x,
+        'y_size': y * res_y,
+        'geographic_chunk_size': x * res_x * y * res_y,
+        'time_chunk_size': time_chunk_size,
+        'bytes': int(x * y * time_chunk_size * bytes_per_pixel)
+    }
+
+
+def _align_to_tiles(size, tile_size):
+    """Round a chunk size in pixels down to a multiple of a tile size, or to a divisor of it if smaller"""
+    if size >= tile_size:
+        return size - size % tile_size
+    return max(divisor for divisor in range(1, size + 1) if tile_size % divisor == 0)
+
+
+def create_grid_chunks(longitude, latitude, x_size, y_size):
+    """Chunk a parameter set defined by latitude and longitude along both axes.
+
+    Chunk boundaries are offset from the start of the extents by whole multiples of the chunk sizes,
+    so chunks with sizes from `plan_chunks()` stay aligned to the pixel grid.
+
+    Args:
+        longitude: Longitude range to split
+        latitude: Latitude range to split
+        x_size: Chunk width, in units of longitude
+        y_size: Chunk height, in units of latitude
+
+    Returns:
+        A list of dicts containing longitude, latitude that can be used to update params
+
+    """
+    assert len(latitude) == 2 and latitude[1] >= latitude[0], \
+        "Latitude must be a tuple of length 2 with the second element greater than or equal to the first."
+    assert len(longitude) == 2 and longitude[1] >= longitude[0], \
+        "Longitude must be a tuple of length 2 with the second element greater than or equal to the first."
+
+    def ranges(extent, size):
+        num_chunks = max(1, int(math.ceil(round((extent[1] - extent[0]) / size, 6))))
+        return [(extent[0] + size * index, min(extent[1], extent[0] + size * (index + 1)))
+                for index in range(num_chunks)]
+
+    return [{'longitude': longitude_range, 'latitude': latitude_range}
+            for latitude_range in ranges(latitude, y_size) for longitude_range in ranges(longitude, x_size)]
+
+
+def assemble_geographic_chunks(chunks, overlap='first', fill_value=None, dims=('latitude', 'longitude')):
+    """
+    Combine a group of chunks (e.g. loaded from create_geographic_chunks() or create_grid_chunks() extents)
+    into one dataset on the union of their grids, copying each chunk into its place in a preallocated output.
+    This is an alternative to combine_geographic_chunks() that does not concatenate or reindex the chunks,
+    so peak memory is about one output plus one chunk.
+
+    Parameters
+    ----------
+    chunks: list of xarray.Dataset
+        The chunks to combine. They must have the same data variables and the same
+        coordinates along dimensions other than `dims`.
+    overlap: str
+        How to combine values of chunks that overlap (e.g. chunks with halos).
+        One of ['first', 'last', 'mean']. 'first' keeps the values of the earliest chunk in `chunks`,
+        'last' keeps those of the latest, and 'mean' averages them, ignoring NaNs.
+        'mean' needs a float64 sum and an int count per output element until the output is complete.
+    fill_value: scalar or dict
+        The value for output elements not covered by any chunk, or a dict mapping data variable
+        names to such values. Defaults to NaN for floating point data and 0 otherwise.
+    dims: list-like of str
+        The names of the dimensions the chunks are spread along.
+
+    Returns
+    -------
+    combined_data: xarray.Dataset on the union of the chunk grids. The coordinates along each of `dims`
+        are in the same order (ascending or descending) as in the chunks.
+    """
+    assert overlap in ['first', 'last', 'mean'], \
+        "The overlap policy must be one of ['first', 'last', 'mean']."
+    first_chunk = chunks[0]
+
+    # Compute the union grid up front.
+    coords = {}
+    for dim in dims:
+        values = np.unique(np.concatenate([chunk[dim].values for chunk in chunks]))
+        chunk_values = next((chunk[dim].values for chunk in chunks if chunk[dim].size > 1), values)
+        coords[dim] = values[::-1] if chunk_values[0] > chunk_values[-1] else values
+
+    def dim_positions(chunk, dim):
+        # Positions of the chunk coordinates in the output, as a slice if they are contiguous.
+        ascending = coords[dim][0] <= coords[dim][-1]
+        sorted_coords = coords[dim] if ascending else coords[dim][::-1]
+        positions = np.searchsorted(sorted_coords, chunk[dim].values)
+        if not ascending:
+            positions = len(sorted_coords) - 1 - positions
+        if len(positions) > 0 and np.all(np.diff(positions) == 1):
+            return slice(positions[0], positions[-1] + 1)
+        if len(positions) > 0 and np.all(np.diff(positions) == -1):
+            return slice(positions[0], None if positions[-1] == 0 else positions[-1] - 1, -1)
+        return positions
+
+    def output_index(positions, var_dims, shape):
+        # Index of the chunk in an output array, using `np.ix_()` if it is not contiguous along several dimensions.
+        index = [positions[dim] if dim in dims else slice(None) for dim in var_dims]
+        if sum(not isinstance(dim_index, slice) for dim_index in index) > 1:
+            index = np.ix_(*[np.arange(size)[dim_index] for dim_index, size in zip(index, shape)])
+        return tuple(index)
+
+    outputs, written, sums, counts = {}, {}, {}, {}
+    for name, data_arr in first_chunk.data_vars.items():
+        shape = tuple(len(coords[dim]) if dim in dims else size for dim, size in zip(data_arr.dims, data_arr.shape))
+        var_fill_value = fill_value.get(name) if isinstance(fill_value, dict) else fill_value
+        if var_fill_value is None:
+            var_fill_value = np.nan if np.issubdtype(data_arr.dtype, np.floating) else 0
+        outputs[name] = np.full(shape, var_fill_value, dtype=data_arr.dtype)
+        # Track which elements have been written, along only the chunked dimensions.
+        spatial_shape = tuple(size if dim in dims else 1 for dim, size in zip(data_arr.dims, shape))
+        if overlap == 'first':
+            written[name] = np.zeros(spatial_shape, dtype=bool)
+        elif overlap == 'mean':
+            sums[name] = np.zeros(shape, dtype=np.float64)
+            counts[name] = np.zeros(shape, dtype=np.int32)
+
+    for chunk in chunks:
+        positions = {dim: dim_positions(chunk, dim) for dim in dims}
+        for name in outputs:
+            data_arr = chunk[name].transpose(*first_chunk[name].dims)
+            index = output_index(positions, data_arr.dims, outputs[name].shape)
+            values = data_arr.values
+            if overlap == 'last':
+                outputs[name][index] = values
+            elif overlap == 'first':
+                spatial_index = output_index(positions, data_arr.dims, written[name].shape)
+                new = ~written[name][spatial_index]
+                outputs[name][index] = np.where(new, values, outputs[name][index])
+                written[name][spatial_index] = True
+            else:
+                valid = ~np.isnan(values) if np.issubdtype(values.dtype, np.floating) else np.ones(values.shape, bool)
+                sums[name][index] += np.where(valid, values, 0)
+                counts[name][index] += valid
+
+    if overlap == 'mean':
+        for name, output in outputs.items():
+            covered = counts[name] > 0
+            mean = sums[name][covered] / counts[name][covered]
+            if np.issubdtype(output.dtype, np.integer):
+                mean = np.round(mean)
+            output[covered] = mean
+            del sums[name], counts[name]
+
+    other_coords = {name: coord for name, coord in first_chunk.coords.items()
+                    if not set(coord.dims).intersection(dims)}
+    combined_data = xr.Dataset(
+        {name: (first_chunk[name].dims, output, first_chunk[name].attrs) for name, output in outputs.items()},
+        coords=dict(other_coords, **coords), attrs=first_chunk.attrs)
+    return combined_data
+
+
+def create_halo_chunks(shape, chunk_shape, halo):
+    """Split an array shape into pixel chunks, each read with a surrounding halo of pixels.
+
+    Args:
+        shape: The shape of the dimensions to split, e.g. (number of latitudes, number of longitudes).
+        chunk_shape: The shape of the chunks written to the output, without their halos.
+        halo: The width of the halo in pixels - an int for all dimensions or a tuple with one per dimension.
+            Halos are clipped at the edges of the array.
+
+    Returns:
+        A list of dicts of tuples of slices, one per dimension:
+            'read': the chunk with its halo, in the input
+            'write': the chunk without its halo, in the output
+            'crop': the chunk without its halo, in the array read with 'read'
+
+    """
+    halo = (halo,) * len(shape) if isinstance(halo, int) else tuple(halo)
+    assert len(shape) == len(chunk_shape) == len(halo), \
+        "The shape, chunk shape, and halo must have the same number of dimensions."
+
+    dim_chunks = []
+    for size, chunk_size, dim_halo in zip(shape, chunk_shape, halo):
+        chunks = []
+        for start in range(0, size, chunk_size):
+            stop = min(start + chunk_size, size)
+            read_start, read_stop = max(0, start - dim_halo), min(size, stop + dim_halo)
+            chunks.append((slice(read_start, read_stop), slice(start, stop),
+                           slice(start - read_start, stop - read_start)))
+        dim_chunks.append(chunks)
+
+    return [{'read': tuple(chunk[0] for chunk in chunks),
+             'write': tuple(chunk[1] for chunk in chunks),
+             'crop': tuple(chunk[2] for chunk in chunks)} for chunks in product(*dim_chunks)]
+
+
+def apply_with_halo(func, data, chunk_shape, halo, dims=None, out=None, **kwargs):
+    """Apply a neighbourhood function chunk by chunk, reading each chunk with a halo and cropping it before assembly.
+
+    For a function whose output at a pixel depends only on input pixels within `halo` pixels of it, the result is
+    identical to applying the function to the whole array, since halos are clipped (not padded) at the array edges.
+    For example, use a halo of 1 for 3x3 convolutions and gradients (e.g. `dc_coastal_change._coastline_classification()`,
+    `dc_slip.create_slope_mask()`), 2 for a 3x3 `binary_opening()` (e.g. `forest.clearfells_monitoring()`),
+    `min_size + kernel_size // 2` for `raster_filter.lone_object_filter()`, and the window radius for focal statistics.
+
+    Only one chunk of the input is in memory at a time if `data` is lazily loaded (e.g. from `dc.load()` with
+    `dask_chunks`) and `out` is an on-disk array (e.g. a `numpy.memmap` or Zarr array).
+
+    Args:
+        func: The function to apply. It is called with a NumPy array of a chunk with its halo (and any `kwargs`)
+            and must return an array of the same shape.
+        data: A NumPy array or `xarray.DataArray` to apply `func` to.
+        chunk_shape: The shape of the chunks along `dims`, without their halos.
+        halo: The width of the halo in pixels - an int for all of `dims` or a tuple with one per dimension.
+        dims (optional): The names (for an `xarray.DataArray`) or axes (for a NumPy array) to split into chunks.
+            Defaults to the last `len(chunk_shape)` dimensions.
+        out (optional): An array with the shape of `data` to write the result to.
+            Defaults to a new NumPy array with the dtype of the result of the first chunk.
+        kwargs: Keyword arguments for `func`.
+
+    Returns:
+        The result, as an `xarray.DataArray` with the coordinates of `data` if `data` is an `xarray.DataArray`,
+        and as `out` otherwise.
+
+    """
+    is_data_array = isinstance(data, xr.DataArray)
+    if dims is None:
+        axes = list(range(data.ndim - len(chunk_shape), data.ndim))
+    else:
+        axes = [data.dims.index(dim) if is_data_array else dim for dim in dims]
+
+    for chunk in create_halo_chunks([data.shape[axis] for axis in axes], chunk_shape, halo):
+        read, write, crop = ([slice(None)] * data.ndim for _ in range(3))
+        for axis, read_slice, write_slice, crop_slice in zip(axes, chunk['read'], chunk['write'], chunk['crop']):
+            read[axis], write[axis], crop[axis] = read_slice, write_slice, crop_slice
+        chunk_data = data[tuple(read)]
+        result = np.asarray(func(chunk_data.values if is_data_array else np.asarray(chunk_data), **kwargs))
+        if out is None:
+            out = np.empty(data.shape, dtype=result.dtype)
+        out[tuple(write)] = result[tuple(crop)]
+
+    if is_data_array:
+        return xr.DataArray(out, dims=data.dims, coords=data.coords, attrs=data.attrs, name=data.name)
+    return out
+
+
 def create_time_chunks(datetime_list, _reversed=False, time_chunk_size=10):
     """Create an iterable containing groups of acquisition dates using class attributes
 
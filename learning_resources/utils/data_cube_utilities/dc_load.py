@@ -1,6 +1,11 @@
+import weakref
 import itertools
+from functools import lru_cache
+from collections import OrderedDict
+from datetime import timezone
 import numpy as np
 import xarray as xr
+import pandas as pd
 from .clean_mask import landsat_qa_clean_mask, landsat_clean_mask_invalid
 from xarray.ufuncs import logical_and as xr_and
 from .sort import xarray_sortby_coord
@@ -71,7 +76,8 @@ def match_prods_res(dc, products, method='min'):
     return matching_res
 
 
-def match_dim_sizes(dc, products, x, y, x_y_coords=['longitude', 'latitude'], method='min'):
+def match_dim_sizes(dc, products, x, y, x_y_coords=['longitude', 'latitude'], method='min',
+                    output_crs=None, resolution=None):
     """
     Returns the x and y dimension sizes that match some x and y extents.
     This is useful when determining an absolute resolution to scale products to with
@@ -96,6 +102,13 @@ def match_dim_sizes(dc, products, x, y, x_y_coords=['longitude', 'latitude'], me
         ['min', 'max'], which separately determine the y and x resolutions
         as the minimum or maximum among all selected products.
 
+    output_crs: str
+        The CRS the products will be loaded in (e.g. 'EPSG:32633'), with `resolution`.
+        Required for products that are not ingested and have no load hints in the index,
+        as their datasets can have several native grids (e.g. UTM zones).
+    resolution: list-like
+        The (y, x) resolution the products will be loaded at, in units of `output_crs`.
+
     Returns
     -------
     abs_res: list
@@ -110,26 +123,36 @@ def match_dim_sizes(dc, products, x, y, x_y_coords=['longitude', 'latitude'], me
     else:
         coords = [x_y_coords] * len(products)
 
-    datasets_empty = [dc.load(product=product, lon=x, lat=y, measurements=[]) for product in products]
+    # Determine the x and y dimension sizes from the native grids in the index (or the output grid),
+    # only loading (without measurements) products whose grid is unknown.
+    dim_sizes = []
+    for i, product in enumerate(products):
+        crs, product_resolution = _product_native_grid(dc, product)
+        if output_crs is not None and resolution is not None:
+            crs, product_resolution = output_crs, resolution
+        if crs is not None and product_resolution is not None:
+            y_size, x_size = _extent_dim_sizes(x, y, crs, product_resolution)
+            dim_sizes.append([x_size, y_size])
+        else:
+            dataset_empty = dc.load(product=product, lon=x, lat=y, measurements=[])
+            dim_sizes.append([dataset_empty[coords[i][0]].size, dataset_empty[coords[i][1]].size])
 
     # First check if all datasets will load with the same x and y dimension sizes.
     same_dim_sizes = True
-    first_dataset_dim_size = [datasets_empty[0][coords[0][0]].size, datasets_empty[0][coords[0][1]].size]
-    for i in range(1, len(datasets_empty)):
-        if first_dataset_dim_size != [datasets_empty[i][coords[i][0]].size, datasets_empty[i][coords[i][1]].size]:
+    first_dataset_dim_size = dim_sizes[0]
+    for i in range(1, len(dim_sizes)):
+        if first_dataset_dim_size != dim_sizes[i]:
             same_dim_sizes = False
             break
 
     if method == 'min':
         abs_res = [np.inf, np.inf]
-        for i in range(len(datasets_empty)):
-            res = [datasets_empty[i][coords[i][0]].size, datasets_empty[i][coords[i][1]].size]
+        for res in dim_sizes:
             abs_res[0] = res[0] if res[0] < abs_res[0] else abs_res[0]
             abs_res[1] = res[1] if res[1] < abs_res[1] else abs_res[1]
     else:
         abs_res = [0] * 2
-        for i in range(len(datasets_empty)):
-            res = [datasets_empty[i][coords[i][0]].size, datasets_empty[i][coords[i][1]].size]
+        for res in dim_sizes:
             abs_res[0] = res[0] if abs_res[0] < res[0] else abs_res[0]
             abs_res[1] = res[1] if abs_res[1] < res[1] else abs_res[1]
 
@@ -158,6 +181,99 @@ def xarray_concat_and_merge(*args, concat_dim='time', sort_dim='time'):
         merged.append(xarray_sortby_coord(dataset_temp, coord=sort_dim))
     return merged
 
+# The maximum number of index maps cached by `get_scale_index_map()`.
+SCALE_INDEX_MAP_CACHE_SIZE = 256
+
+@lru_cache(maxsize=SCALE_INDEX_MAP_CACHE_SIZE)
+def _scale_indices(size, num_pts):
+    """
+    Returns the (read-only) indices of the pixels selected to scale a dimension of `size` pixels to `num_pts` pixels.
+    These are the same indices as those selected by `aggregate.xr_interp()`.
+    """
+    indices = np.linspace(0, size - 1, num_pts, dtype=np.int32)
+    indices.setflags(write=False)
+    return indices
+
+def get_scale_index_map(dataset, abs_res, x_coord='longitude', y_coord='latitude', method='nearest'):
+    """
+    Returns the integer indices that `xr_scale_res()` selects along the y and x dimensions of `dataset`
+    to scale it to an absolute resolution. The indices only depend on the source and target dimension sizes,
+    so they are cached by those sizes (in a bounded cache) and repeatedly scaling data on the same grid
+    does not recompute them.
+
+    Parameters
+    ----------
+    dataset: xarray.Dataset or xarray.DataArray
+        The data to scale.
+    abs_res: list-like
+        A list-like of the number of pixels for the x and y axes, respectively.
+    x_coord, y_coord: str
+        Names of the x and y coordinates in `dataset`.
+    method: str
+        The resampling method. Only 'nearest' is supported.
+
+    Returns
+    -------
+    index_map: dict
+        A dictionary mapping `y_coord` and `x_coord` to 1D NumPy arrays of indices,
+        to be applied with `dataset.isel(index_map)`.
+    """
+    if method != 'nearest':
+        raise ValueError("The method \"{}\" is not supported. "
+                         "Please choose one of ['nearest'].".format(method))
+    return {coord: _scale_indices(len(dataset[coord]), int(num_pts))
+            for coord, num_pts in [(y_coord, abs_res[1]), (x_coord, abs_res[0])]}
+
+def _concat_on_time_preallocated(datasets):
+    """
+    Concatenates `xarray.Dataset` or `xarray.DataArray` objects with the same non-time
+    coordinates along 'time', ordered by time, writing each input directly into its
+    sorted positions in preallocated output arrays instead of concatenating and then sorting.
+    Dask-backed inputs, variables without a 'time' dimension and inputs that do not share
+    the same coordinates along 'time' are concatenated with `xr.concat()`, which keeps
+    dask-backed inputs lazy.
+    """
+    first = datasets[0]
+    # Non-index coordinates along 'time' (e.g. per-scene metadata) are merged like the variables.
+    time_coords = [name for name, coord in first.coords.items() if 'time' in coord.dims and name != 'time']
+    variables = datasets if isinstance(first, xr.DataArray) else \
+        [dataset[name] for dataset in datasets for name in dataset.data_vars]
+    variables = variables + [dataset.coords[name] for dataset in datasets
+                             for name in time_coords if name in dataset.coords]
+    if any('time' not in variable.dims or not isinstance(variable.data, np.ndarray) for variable in variables) or \
+       any(set(time_coords) != {name for name, coord in dataset.coords.items()
+                                if 'time' in coord.dims and name != 'time'} for dataset in datasets):
+        return xarray_sortby_coord(xr.concat(datasets, dim='time'), 'time')
+
+    times = np.concatenate([dataset.time.values for dataset in datasets])
+    order = np.argsort(times, kind='stable')
+    # The position in the output of each element of `times`.
+    positions = np.empty_like(order)
+    positions[order] = np.arange(len(order))
+    offsets = np.cumsum([0] + [dataset.time.size for dataset in datasets])
+
+    def merge_data_arrays(data_arrs):
+        first = data_arrs[0]
+        time_axis = first.dims.index('time')
+        shape = list(first.shape)
+        shape[time_axis] = len(times)
+        out = np.empty(shape, dtype=np.result_type(*[data_arr.dtype for data_arr in data_arrs]))
+        for i, data_arr in enumerate(data_arrs):
+            index = [slice(None)] * out.ndim
+            index[time_axis] = positions[offsets[i]:offsets[i + 1]]
+            out[tuple(index)] = data_arr.transpose(*first.dims).values
+        return xr.DataArray(out, dims=first.dims, attrs=first.attrs)
+
+    coords = {name: coord for name, coord in first.coords.items() if 'time' not in coord.dims}
+    coords['time'] = times[order]
+    for name in time_coords:
+        coords[name] = merge_data_arrays([dataset.coords[name] for dataset in datasets])
+    if isinstance(first, xr.DataArray):
+        return merge_data_arrays(datasets).assign_coords(coords).rename(first.name)
+    merged = xr.Dataset({name: merge_data_arrays([dataset[name] for dataset in datasets])
+                         for name in first.data_vars}, attrs=first.attrs)
+    return merged.assign_coords(coords)
+
 def merge_datasets(datasets_temp, clean_masks_temp, masks_per_platform=None,
                    x_coord='longitude', y_coord='latitude'):
     """
@@ -215,24 +331,23 @@ def merge_datasets(datasets_temp, clean_masks_temp, masks_per_platform=None,
         datasets_temp_list = list(datasets_temp.values())
         max_num_x = max([len(dataset[x_coord]) for dataset in datasets_temp_list])
         max_num_y = max([len(dataset[y_coord]) for dataset in datasets_temp_list])
-        datasets_temp_list = [xr_scale_res(dataset, x_coord=x_coord, y_coord=y_coord,
-                                           abs_res=(max_num_x, max_num_y))
-                              for dataset in datasets_temp_list]
-        # Set same x and y coords so `xr.concat()` concatenates as intended.
+        # Scaling is a nearest neighbor selection, so apply cached index maps with `isel()`.
+        index_maps = [get_scale_index_map(dataset, (max_num_x, max_num_y), x_coord=x_coord, y_coord=y_coord)
+                      for dataset in datasets_temp_list]
+        datasets_temp_list = [dataset.isel(index_map)
+                              for dataset, index_map in zip(datasets_temp_list, index_maps)]
+        # Set same x and y coords so the datasets are merged as intended.
         xr_set_same_coords(datasets_temp_list)
-        dataset = xr.concat(datasets_temp_list, dim='time')
-        dataset = xarray_sortby_coord(dataset, 'time')
+        dataset = _concat_on_time_preallocated(datasets_temp_list)
 
         # Merge clean masks.
         # Make sure all clean masks have the same sizes in the x and y dimensions.
-        clean_masks_temp_list = list(clean_masks_temp.values())
-        clean_masks_temp_list = [xr_scale_res(clean_mask.astype(np.int8), x_coord=x_coord, y_coord=y_coord,
-                                              abs_res=(max_num_x, max_num_y))
-                                 for clean_mask in clean_masks_temp_list]
-        # Set same x and y coords so `xr.concat()` concatenates as intended.
+        clean_masks_temp_list = [clean_mask.isel(get_scale_index_map(clean_mask, (max_num_x, max_num_y),
+                                                                     x_coord=x_coord, y_coord=y_coord))
+                                 for clean_mask in clean_masks_temp.values()]
+        # Set same x and y coords so the clean masks are merged as intended.
         xr_set_same_coords(clean_masks_temp_list)
-        clean_mask = xr.concat(clean_masks_temp_list, dim='time')
-        clean_mask = xarray_sortby_coord(clean_mask, 'time').astype(np.bool)
+        clean_mask = _concat_on_time_preallocated(clean_masks_temp_list).astype(bool)
         # Merge masks.
         if masks_per_platform is not None:
             num_platforms = len(masks_per_platform.keys())
@@ -465,6 +580,112 @@ def load_multiplatform(dc, platforms, products, frac_res=None, abs_res=None,
 
 ## Extents ##
 
+# The maximum number of footprints cached by `get_product_footprint()` per Datacube connection.
+PRODUCT_FOOTPRINT_CACHE_SIZE = 256
+# Maps Datacube connections (without keeping them alive) to LRU caches
+# of (product, query) keys to footprints from `get_product_footprint()`.
+_product_footprints = weakref.WeakKeyDictionary()
+
+def _naive_utc(time):
+    """Converts a timezone-aware `datetime.datetime` to a naive one in UTC."""
+    if time.tzinfo is not None:
+        time = time.astimezone(timezone.utc).replace(tzinfo=None)
+    return time
+
+def _product_native_grid(dc, product):
+    """
+    Returns the CRS and (y, x) native resolution of a product from the index - its storage
+    (ingested products) or load hints - without loading any data. Both are `None` if the product
+    does not record a single grid, since its datasets can then have several (e.g. UTM zones).
+    """
+    product_type = dc.index.products.get_by_name(product)
+    if product_type is None:
+        return None, None
+    definition = product_type.definition
+    for section in ['storage', 'load']:
+        grid = definition.get(section, {})
+        if 'crs' in grid and 'resolution' in grid:
+            res = grid['resolution']
+            y_name = 'latitude' if 'latitude' in res else 'y'
+            x_name = 'longitude' if 'longitude' in res else 'x'
+            return grid['crs'], (res[y_name], res[x_name])
+    return None, None
+
+def get_product_footprint(dc, product, refresh=False, **query):
+    """
+    Returns the extents, native grid, and time range of a product using only
+    the dataset index - no data (or empty-measurement) loads are issued.
+    Results are memoized per product and query, in a bounded cache per Datacube connection.
+
+    Parameters
+    ----------
+    dc: datacube.Datacube
+        A connection to the Data Cube to query the index of.
+    product: str
+        The name of the product to get the footprint of.
+    refresh: bool
+        Whether to query the index again instead of returning a memoized result.
+    **query: dict
+        Search terms for the index (e.g. `platform`, `time`, `lat`, `lon`).
+
+    Returns
+    -------
+    footprint: dict
+        A dictionary with these keys:
+        'lat_extents', 'lon_extents': 2-tuples of the minimum and maximum latitude and longitude.
+        'time_extents': A 2-tuple of `datetime.datetime` of the first and last acquisition.
+        'crs': The CRS of the product, or `None` if the index does not record a single grid for it.
+        'resolution': A 2-tuple of the y and x native resolution in units of 'crs',
+                      or `None` if the index does not record a single grid for it.
+        'scene_count': The number of datasets.
+        'tile_count': The number of distinct acquisition times.
+        'pixel_count': The approximate number of pixels covering the extents at the
+                       native resolution (`None` if the resolution is unknown).
+        Extents are `None` if no datasets match.
+    """
+    footprints = _product_footprints.setdefault(dc, OrderedDict())
+    key = (product, tuple(sorted((name, str(value)) for name, value in query.items())))
+    if not refresh and key in footprints:
+        footprints.move_to_end(key)
+        return footprints[key]
+
+    fields = []
+    if dc.index.products.get_by_name(product) is not None:
+        fields = list(dc.index.datasets.search_returning(['lat', 'lon', 'time'], product=product, **query))
+    crs, resolution = _product_native_grid(dc, product)
+    if len(fields) == 0:
+        footprint = {'lat_extents': (None, None), 'lon_extents': (None, None),
+                     'time_extents': (None, None), 'crs': crs, 'resolution': resolution,
+                     'scene_count': 0, 'tile_count': 0, 'pixel_count': 0}
+    else:
+        lat_extents = (min(field.lat.begin for field in fields), max(field.lat.end for field in fields))
+        lon_extents = (min(field.lon.begin for field in fields), max(field.lon.end for field in fields))
+        times = [_naive_utc(field.time.begin + (field.time.end - field.time.begin) / 2) for field in fields]
+        pixel_count = None
+        if resolution is not None:
+            y_size, x_size = _extent_dim_sizes(lon_extents, lat_extents, crs, resolution)
+            pixel_count = y_size * x_size
+        footprint = {'lat_extents': lat_extents, 'lon_extents': lon_extents,
+                     'time_extents': (min(times), max(times)), 'crs': crs, 'resolution': resolution,
+                     'scene_count': len(fields), 'tile_count': len(set(times)),
+                     'pixel_count': pixel_count}
+    footprints[key] = footprint
+    while len(footprints) > PRODUCT_FOOTPRINT_CACHE_SIZE:
+        footprints.popitem(last=False)
+    return footprint
+
+def _extent_dim_sizes(x, y, crs, resolution):
+    """
+    Returns the number of pixels along y and x that cover longitude and latitude
+    extents `x` and `y` on a grid with a CRS and (y, x) resolution, from the shape of
+    the geobox built the same way `dc.load()` builds it, so pixels snapped to the grid are counted.
+    """
+    from datacube.utils import geometry
+    geopolygon = geometry.box(x[0], y[0], x[1], y[1], crs=geometry.CRS('EPSG:4326'))
+    crs = geometry.CRS(crs) if crs is not None else geopolygon.crs
+    geobox = geometry.GeoBox.from_geopolygon(geopolygon, resolution, crs=crs)
+    return tuple(int(size) for size in geobox.shape)
+
 def get_product_extents(api, platform, product):
     """
     Returns the minimum and maximum latitude, longitude, and date range of a product.
@@ -483,8 +704,9 @@ def get_product_extents(api, platform, product):
     min_max_dates: tuple of datetime.datetime
         A 2-tuple of the minimum and maximum time available.
     """
-    # Get the extents of the cube
-    descriptor = api.get_query_metadata(platform=platform, product=product)
+    # Get the extents of the cube from the index.
+    query = {} if platform is None else {'platform': platform}
+    descriptor = get_product_footprint(api.dc, product, **query)
     min_max_lat = descriptor['lat_extents']
     min_max_lon = descriptor['lon_extents']
     min_max_dates = descriptor['time_extents']
@@ -572,6 +794,93 @@ def find_desired_acq_inds(dataset=None, clean_mask=None, time_dim='time', pct_cl
     return acq_inds_to_keep
 
 
+def find_desired_acq_inds_vectorized(dataset=None, clean_mask=None, time_dim='time', pct_clean=None,
+                                     not_empty=False, min_spacing=None, max_acqs=None):
+    """
+    Vectorized version of `find_desired_acq_inds()` with optional constraints on the
+    spacing and number of acquisitions. The clean fraction of every acquisition is
+    computed in a single reduction, and the spacing and count constraints are applied
+    to the sorted `int64` time vector, so the cost of the Python code does not depend
+    on the number of pixels.
+
+    Only `clean_mask` is needed (unless `not_empty==True`), so the indices can be determined
+    from a load of only a QA or SCL band, and the other bands then loaded or selected
+    for just those acquisitions (e.g. `dc.load(..., time=...)` per selected time or
+    `dataset.isel(time=acq_inds_to_keep)` on a lazily loaded dataset).
+
+    Parameters
+    ----------
+    dataset: xarray.Dataset or xarray.DataArray
+        The `xarray` object to remove undesired acquisitions from.
+    clean_mask: xarray.DataArray
+        A boolean `xarray.DataArray` denoting the "clean" values in `dataset`.
+        More generally, in this mask, `True` values are considered desirable.
+    time_dim: str
+        The string name of the time dimension.
+    pct_clean: float
+        The minimum fraction of "clean" (or "desired") pixels required to keep an acquisition.
+        Requires `clean_mask` to be supplied.
+    not_empty: bool
+        Whether to remove empty acquisitions or not. An empty acquisition is one that contains no data.
+        Requires `dataset` to be supplied.
+    min_spacing: numpy.timedelta64 or str
+        The minimum time between kept acquisitions (e.g. `np.timedelta64(5, 'D')` or '5D').
+        Acquisitions are kept from the earliest onwards. A spacing of zero keeps all acquisitions,
+        and a negative spacing raises a `ValueError`.
+    max_acqs: int
+        The maximum number of acquisitions to keep. If more acquisitions meet the other criteria,
+        the cleanest ones are kept (or the earliest ones if `clean_mask` is not supplied).
+
+    Returns
+    -------
+    acq_inds_to_keep: list of int
+        A sorted list of indices of acquisitions that meet the specified criteria.
+    """
+    if pct_clean is not None:
+        assert clean_mask is not None, "If `pct_clean` is supplied, then `clean_mask` must also be supplied."
+    if not_empty:
+        assert dataset is not None, "If `not_empty==True`, then `dataset` must be supplied."
+    assert dataset is not None or clean_mask is not None, \
+        "At least one of `dataset` or `clean_mask` must be supplied."
+
+    times = (clean_mask if clean_mask is not None else dataset)[time_dim].values
+    keep = np.ones(len(times), dtype=bool)
+    clean_frac = None
+    if clean_mask is not None:
+        clean_frac = clean_mask.mean(dim=[dim for dim in clean_mask.dims if dim != time_dim]).values
+    if pct_clean is not None:
+        keep &= clean_frac >= pct_clean
+    if not_empty:
+        data_arr = list(dataset.data_vars.values())[0] if isinstance(dataset, xr.Dataset) else dataset
+        keep &= data_arr.count(dim=[dim for dim in data_arr.dims if dim != time_dim]).values > 0
+
+    # Candidate indices in chronological order.
+    candidate_inds = np.flatnonzero(keep)
+    candidate_inds = candidate_inds[np.argsort(times[candidate_inds], kind='stable')]
+    spacing = None
+    if min_spacing is not None:
+        spacing = pd.to_timedelta(min_spacing).to_timedelta64().astype('timedelta64[ns]').astype(np.int64)
+        if spacing < 0:
+            raise ValueError("`min_spacing` must not be negative, but it is {}.".format(min_spacing))
+    # A spacing of zero does not constrain the acquisitions.
+    if spacing is not None and spacing > 0 and len(candidate_inds) > 0:
+        candidate_times = times[candidate_inds].astype('datetime64[ns]').astype(np.int64)
+        # The first acquisition at least `min_spacing` after each one, for all of them at once.
+        # Which acquisitions are kept depends on the previously kept one, so the jumps are then
+        # followed in a loop, with one step per kept acquisition.
+        next_positions = np.searchsorted(candidate_times, candidate_times + spacing)
+        spaced_pos = [0]
+        while next_positions[spaced_pos[-1]] < len(candidate_times):
+            spaced_pos.append(next_positions[spaced_pos[-1]])
+        candidate_inds = candidate_inds[spaced_pos]
+    if max_acqs is not None and len(candidate_inds) > max_acqs:
+        if clean_frac is not None:
+            # Keep the cleanest acquisitions, preferring earlier ones among equally clean ones.
+            candidate_inds = candidate_inds[np.argsort(-clean_frac[candidate_inds], kind='stable')]
+        candidate_inds = candidate_inds[:max_acqs]
+    return sorted(candidate_inds.tolist())
+
+
 def group_dates_by_day(dates):
     """
     Given a list of dates, return the list of lists of dates grouped by day.
@@ -626,4 +935,109 @@ def reduce_on_day(ds, reduction_func=np.nanmean):
 
     return new_dataset
 
+
+def _reduce_segments(arr, starts, reduction):
+    """
+    Reduces contiguous segments along the first axis of a NumPy array,
+    ignoring NaN values for floating point data.
+
+    Parameters
+    ----------
+    arr: np.ndarray
+        The data to reduce, with the segmented dimension first.
+    starts: np.ndarray of int
+        The sorted start indices of the segments. The first must be 0.
+    reduction: str
+        One of ['mean', 'max', 'min', 'first', 'last'].
+
+    Returns
+    -------
+    reduced: np.ndarray
+        An array with `len(starts)` elements along the first axis.
+    """
+    valid = np.isnan(arr) if np.issubdtype(arr.dtype, np.floating) else None
+    if valid is not None:
+        np.logical_not(valid, out=valid)
+    if reduction == 'mean':
+        if valid is None:
+            sums = np.add.reduceat(arr, starts, axis=0, dtype=np.float64)
+            counts = np.diff(np.append(starts, len(arr))).reshape((-1,) + (1,) * (arr.ndim - 1))
+        else:
+            sums = np.add.reduceat(np.where(valid, arr, 0), starts, axis=0, dtype=np.float64)
+            counts = np.add.reduceat(valid, starts, axis=0, dtype=np.int64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums / counts, np.nan)
+    if reduction in ['max', 'min']:
+        # `fmax` and `fmin` ignore NaNs and reduce to NaN only for all-NaN segments.
+        if reduction == 'max':
+            ufunc = np.maximum if valid is None else np.fmax
+        else:
+            ufunc = np.minimum if valid is None else np.fmin
+        return ufunc.reduceat(arr, starts, axis=0)
+    if reduction in ['first', 'last']:
+        if valid is None:
+            ends = np.append(starts[1:], len(arr)) - 1
+            return arr[starts] if reduction == 'first' else arr[ends]
+        # Find the index of the first or last valid value of each segment for each element.
+        time_inds = np.arange(len(arr)).reshape((-1,) + (1,) * (arr.ndim - 1))
+        if reduction == 'first':
+            inds = np.minimum.reduceat(np.where(valid, time_inds, len(arr)), starts, axis=0)
+        else:
+            inds = np.maximum.reduceat(np.where(valid, time_inds, -1), starts, axis=0)
+        found = (inds >= 0) & (inds < len(arr))
+        reduced = np.take_along_axis(arr, np.clip(inds, 0, len(arr) - 1), axis=0)
+        reduced[~found] = np.nan
+        return reduced
+    raise ValueError("The reduction \"{}\" is not supported. "
+                     "Please choose one of ['mean', 'max', 'min', 'first', 'last'].".format(reduction))
+
+
+def reduce_on_day_segments(ds, reduction='mean'):
+    """
+    Combine data in an `xarray.Dataset` for dates with the same day.
+    This is a faster alternative to `reduce_on_day()` for stacks with many acquisitions.
+    Integer day keys are computed from the time coordinate, and each day's acquisitions -
+    which are contiguous once sorted by time - are reduced together with
+    `numpy.ufunc.reduceat()` instead of one xarray reduction per day.
+
+    Parameters
+    ----------
+    ds: xr.Dataset
+    reduction: str
+        One of ['mean', 'max', 'min', 'first', 'last'].
+        NaN values are ignored for floating point data.
+
+    Returns
+    -------
+    reduced_ds: xr.Dataset
+        The reduced data, with the time of the first acquisition of each day.
+    """
+    # Save dtypes to convert back to them.
+    dataset_in_dtypes = {}
+    for band in ds.data_vars:
+        dataset_in_dtypes[band] = ds[band].dtype
+
+    times = ds.time.values
+    if np.any(times[1:] < times[:-1]):
+        ds = ds.isel(time=np.argsort(times, kind='stable'))
+        times = ds.time.values
+    day_keys = times.astype('datetime64[D]').astype(np.int64)
+    _, starts = np.unique(day_keys, return_index=True)
+
+    new_dataset = xr.Dataset(coords={'time': times[starts]}, attrs=ds.attrs)
+    for name, data_arr in ds.data_vars.items():
+        if 'time' not in data_arr.dims:
+            new_dataset[name] = data_arr
+            continue
+        time_axis = data_arr.dims.index('time')
+        reduced = _reduce_segments(np.moveaxis(data_arr.values, time_axis, 0), starts, reduction)
+        new_dataset[name] = xr.DataArray(np.moveaxis(reduced, 0, time_axis), dims=data_arr.dims,
+                                         attrs=data_arr.attrs)
+    new_dataset = new_dataset.assign_coords(
+        {name: coord for name, coord in ds.coords.items() if 'time' not in coord.dims})
+
+    restore_or_convert_dtypes(None, None, dataset_in_dtypes, new_dataset)
+
+    return new_dataset
+
 ## End Undesired Acquisition Removal ##
\ No newline at end of file
@@ -19,7 +19,6 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-import gdal, osr
 import collections
 import gc
 import numpy as np
@@ -27,12 +26,14 @@ import xarray as xr
 from datetime import datetime
 import collections
 from collections import OrderedDict
-import hdmedians as hd
 
-import datacube
+from .lazy_import import lazy_import
+gdal = lazy_import('gdal')
+osr = lazy_import('osr')
+hd = lazy_import('hdmedians')
+datacube = lazy_import('datacube')
 from . import dc_utilities as utilities
 from .dc_utilities import create_default_clean_mask
-import hdmedians as hd
 
 """
 Utility Functions
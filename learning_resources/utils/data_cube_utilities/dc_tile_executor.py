@@ -0,0 +1,280 @@
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+
+## Output Stores ##
+
+def create_output_store(output_path, schema, engine='zarr'):
+    """
+    Creates an empty Zarr store or NetCDF file on disk for the output of `run_tiled()`,
+    without allocating the output in memory.
+
+    Parameters
+    ----------
+    output_path: str
+        The path of the Zarr store or NetCDF file to create.
+    schema: dict
+        The output schema, with these keys:
+        'coords': A dictionary mapping dimension names to the full output coordinates
+                  (e.g. the latitudes and longitudes of the whole area).
+        'data_vars': A dictionary mapping data variable names to 3-tuples of
+                     their dimensions, dtype, and fill value.
+                     For example: `{'ndvi': (('latitude', 'longitude'), 'float32', np.nan)}`.
+        'chunks' (optional): A dictionary mapping dimension names to chunk sizes on disk.
+                             Tiles of Zarr stores aligned with these chunks are written by the workers in parallel.
+        'attrs' (optional): A dictionary of global attributes.
+    engine: str
+        One of ['zarr', 'netcdf'].
+    """
+    import dask.array as da
+
+    coords = {dim: np.asarray(values) for dim, values in schema['coords'].items()}
+    chunks = schema.get('chunks', {})
+    data_vars = {}
+    for name, (dims, dtype, fill_value) in schema['data_vars'].items():
+        shape = tuple(len(coords[dim]) for dim in dims)
+        var_chunks = tuple(chunks.get(dim, len(coords[dim])) for dim in dims)
+        data_vars[name] = (dims, da.full(shape, fill_value, dtype=dtype, chunks=var_chunks))
+    template = xr.Dataset(data_vars, coords=coords, attrs=schema.get('attrs', {}))
+    for name, (dims, dtype, fill_value) in schema['data_vars'].items():
+        template[name].encoding['_FillValue'] = fill_value
+    if engine == 'zarr':
+        # Only the metadata and coordinates are written - data chunks are written by the tiles.
+        template.to_zarr(output_path, mode='w', compute=False)
+    elif engine == 'netcdf':
+        template.to_netcdf(output_path, mode='w')
+    else:
+        raise ValueError("The engine \"{}\" is not supported. "
+                         "Please choose one of ['zarr', 'netcdf'].".format(engine))
+
+
+def _tile_blocks(result, schema):
+    """
+    Returns a dictionary mapping the names of the data variables of `result` in `schema`
+    to 2-tuples of the region of the output they cover (a tuple of slices) and their values
+    within that region, with the dtypes and fill values of `schema`.
+    """
+    regions, positions = {}, {}
+    for dim in result.dims:
+        output_coords = pd.Index(np.asarray(schema['coords'][dim]))
+        values = result[dim].values
+        if len(output_coords) > 1 and np.issubdtype(output_coords.dtype, np.floating):
+            # Tolerate floating point differences between separately loaded coordinates.
+            tolerance = np.abs(np.diff(output_coords.values)).min() / 2
+            indexer = output_coords.get_indexer(values, method='nearest', tolerance=tolerance)
+        else:
+            indexer = output_coords.get_indexer(values)
+        if np.any(indexer < 0):
+            raise ValueError("The result of a tile has {} coordinates outside of the output schema.".format(dim))
+        regions[dim] = slice(int(indexer.min()), int(indexer.max()) + 1)
+        positions[dim] = indexer - indexer.min()
+
+    blocks = {}
+    for name, (dims, dtype, fill_value) in schema['data_vars'].items():
+        if name not in result:
+            continue
+        region = tuple(regions[dim] for dim in dims)
+        block = np.full(tuple(dim_region.stop - dim_region.start for dim_region in region), fill_value, dtype=dtype)
+        # Copy the tile into its positions in the region, leaving any gaps filled.
+        block[np.ix_(*[positions[dim] for dim in dims])] = result[name].transpose(*dims).values
+        blocks[name] = (region, block)
+    return blocks
+
+## End Output Stores ##
+
+## Execution ##
+
+def _run_tile(tile, load_func, compute_func):
+    """Loads and computes the result for one tile."""
+    data = load_func(**tile) if isinstance(tile, dict) else load_func(tile)
+    result = compute_func(data)
+    if isinstance(result, xr.DataArray):
+        result = result.to_dataset()
+    return result
+
+
+def _is_chunk_aligned(region, dims, schema):
+    """
+    Returns whether a region of the output covers whole Zarr chunks of `schema`,
+    so that no other tile writes to the chunks it covers.
+    """
+    chunks = schema.get('chunks', {})
+    for dim, dim_region in zip(dims, region):
+        size = len(schema['coords'][dim])
+        chunk_size = chunks.get(dim, size)
+        if dim_region.start % chunk_size != 0 or (dim_region.stop % chunk_size != 0 and dim_region.stop != size):
+            return False
+    return True
+
+
+def _write_zarr_blocks(blocks, output_path, schema):
+    """Writes the blocks of a tile into their regions of a Zarr store."""
+    for name, (region, block) in blocks.items():
+        dims = schema['data_vars'][name][0]
+        xr.Dataset({name: (dims, block)}).to_zarr(output_path, region=dict(zip(dims, region)))
+
+
+def _write_zarr_tile(tile, load_func, compute_func, output_path, schema):
+    """
+    Computes the result for one tile and writes it directly into its region of a Zarr store.
+    Tiles that are not aligned with the Zarr chunks share chunks with other tiles, so writing
+    them in parallel would corrupt the store - their blocks are returned for the calling process
+    to write one at a time instead.
+    """
+    result = _run_tile(tile, load_func, compute_func)
+    if result is None or len(result.dims) == 0:
+        return None
+    blocks = _tile_blocks(result, schema)
+    if all(_is_chunk_aligned(region, schema['data_vars'][name][0], schema) for name, (region, _) in blocks.items()):
+        _write_zarr_blocks(blocks, output_path, schema)
+        return None
+    return blocks
+
+
+def _compute_netcdf_tile(tile, load_func, compute_func, schema):
+    """Computes the result for one tile and returns its blocks for the writing process."""
+    result = _run_tile(tile, load_func, compute_func)
+    if result is None or len(result.dims) == 0:
+        return None
+    return _tile_blocks(result, schema)
+
+
+def _read_manifest(manifest_path, tiles):
+    """
+    Returns the indices of the completed tiles recorded in a manifest for the same tiles.
+
+    The manifest is a JSON lines file: a header line with the tiles, then one line
+    per completed tile. Lines cut short by an interrupted run are ignored.
+    """
+    if not os.path.exists(manifest_path):
+        return set()
+    with open(manifest_path) as manifest_file:
+        lines = manifest_file.read().splitlines()
+    header = json.loads(lines[0]) if len(lines) > 0 else {}
+    if header.get('tiles') != json.loads(json.dumps(tiles, default=str)):
+        raise ValueError("The manifest {} was written for different tiles. "
+                         "Remove it or choose another output path.".format(manifest_path))
+    completed = set()
+    for line in lines[1:]:
+        try:
+            completed.add(json.loads(line)['completed'])
+        except ValueError:
+            continue
+    return completed
+
+
+def _write_manifest(manifest_path, tiles):
+    """Writes the header of a manifest with no completed tiles, replacing any previous one atomically."""
+    temp_path = manifest_path + '.tmp'
+    with open(temp_path, 'w') as manifest_file:
+        manifest_file.write(json.dumps({'tiles': tiles}, default=str) + '\n')
+    os.replace(temp_path, manifest_path)
+
+
+def _record_completed(manifest_file, tile_index):
+    """Appends a completed tile to an open manifest, so a tile costs one line and not a rewrite."""
+    manifest_file.write(json.dumps({'completed': tile_index}) + '\n')
+    manifest_file.flush()
+
+
+def run_tiled(tiles, load_func, compute_func, output_path, schema, engine='zarr',
+              num_workers=None, manifest_path=None):
+    """
+    Runs an analysis tile by tile, streaming each tile's result into its region of
+    a Zarr store or NetCDF file on disk, so that the whole result never has to fit in memory.
+
+    Progress is recorded in a manifest of completed tiles, appending one JSON line per tile.
+    Rerunning with the same tiles and output path resumes from the tiles that have not completed.
+
+    Parameters
+    ----------
+    tiles: list
+        The tiles to process, such as the dictionaries of extents from
+        `dc_chunker.create_geographic_chunks()` or `dc_chunker.create_grid_chunks()`.
+        Must be JSON serializable so they can be recorded in the manifest.
+    load_func: callable
+        Loads the data for a tile. Called as `load_func(**tile)` for dictionary tiles
+        and `load_func(tile)` otherwise. For example, a function calling `dc.load()`.
+    compute_func: callable
+        Computes the result for a tile from its data - such as a mosaic, `wofs_classify()`
+        or `calculate_indices()` - returning an `xarray.Dataset` or named `xarray.DataArray`
+        with coordinates from the output schema.
+    output_path: str
+        The path of the Zarr store or NetCDF file to write to.
+    schema: dict
+        The output schema. See `create_output_store()` for the format.
+    engine: str
+        One of ['zarr', 'netcdf']. Zarr tiles aligned with the Zarr chunks in `schema` are written
+        by the workers in parallel. Other Zarr tiles, which share chunks with their neighbours, and
+        NetCDF tiles are written one at a time by the calling process.
+    num_workers: int
+        The number of worker processes. If 1, tiles are processed in the calling process,
+        which allows `load_func` and `compute_func` that cannot be pickled (e.g. lambdas).
+        Defaults to the number of CPUs.
+    manifest_path: str
+        The path of the manifest of completed tiles. Defaults to `output_path + '.manifest.jsonl'`.
+
+    Returns
+    -------
+    completed: list of int
+        The sorted indices of all completed tiles in `tiles`.
+    """
+    if engine not in ['zarr', 'netcdf']:
+        raise ValueError("The engine \"{}\" is not supported. "
+                         "Please choose one of ['zarr', 'netcdf'].".format(engine))
+    manifest_path = manifest_path if manifest_path is not None else output_path + '.manifest.jsonl'
+    tiles = json.loads(json.dumps(tiles, default=str))
+    completed = _read_manifest(manifest_path, tiles)
+    if len(completed) == 0 or not os.path.exists(output_path):
+        create_output_store(output_path, schema, engine=engine)
+        completed = set()
+        _write_manifest(manifest_path, tiles)
+    remaining = [tile_index for tile_index in range(len(tiles)) if tile_index not in completed]
+
+    netcdf_file = None
+    if engine == 'netcdf':
+        import netCDF4
+        netcdf_file = netCDF4.Dataset(output_path, 'a')
+    manifest_file = open(manifest_path, 'a+')
+    manifest_file.seek(max(manifest_file.tell() - 1, 0))
+    if manifest_file.read(1) != '\n':
+        # End a line cut short by an interrupted run before appending.
+        manifest_file.write('\n')
+
+    def finish(tile_index, output):
+        if netcdf_file is not None and output is not None:
+            for name, (region, block) in output.items():
+                netcdf_file.variables[name][region] = block
+            netcdf_file.sync()
+        elif output is not None:
+            # Zarr tiles that are not aligned with the chunks are written here, one at a time.
+            _write_zarr_blocks(output, output_path, schema)
+        completed.add(tile_index)
+        _record_completed(manifest_file, tile_index)
+
+    def submit(executor, tile_index):
+        if engine == 'zarr':
+            return executor(_write_zarr_tile, tiles[tile_index], load_func, compute_func, output_path, schema)
+        return executor(_compute_netcdf_tile, tiles[tile_index], load_func, compute_func, schema)
+
+    try:
+        if num_workers == 1:
+            for tile_index in remaining:
+                finish(tile_index, submit(lambda func, *args: func(*args), tile_index))
+        else:
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                futures = {submit(executor.submit, tile_index): tile_index for tile_index in remaining}
+                for future in as_completed(futures):
+                    finish(futures[future], future.result())
+    finally:
+        manifest_file.close()
+        if netcdf_file is not None:
+            netcdf_file.close()
+    return sorted(completed)
+
+## End Execution ##
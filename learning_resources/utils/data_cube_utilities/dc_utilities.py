@@ -19,7 +19,6 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-import gdal, osr
 import numpy as np
 import xarray as xr
 import collections
@@ -28,11 +27,15 @@ import math
 import datetime
 import shutil
 import uuid
-import rasterio
 import functools
 import operator
 import warnings
 
+from .lazy_import import lazy_import
+gdal = lazy_import('gdal')
+osr = lazy_import('osr')
+rasterio = lazy_import('rasterio')
+
 def reverse_array_dict(dictionary):
     """
     Returns a reversed version a dictionary of keys to list-like objects. Each value in each list-like
@@ -215,6 +218,170 @@ def create_bit_mask(data_array, valid_bits, no_data=-9999):
     return clean_mask.values
 
 
+## Bit Field Decoding ##
+
+# Bit fields are specified as dictionaries mapping field names to (offset, width) - the
+# position of the first bit and the number of bits of the field.
+LANDSAT_C1_PIXEL_QA_FIELDS = {
+    'fill': (0, 1), 'clear': (1, 1), 'water': (2, 1), 'cloud_shadow': (3, 1), 'snow': (4, 1), 'cloud': (5, 1),
+    'cloud_confidence': (6, 2), 'cirrus_confidence': (8, 2), 'terrain_occlusion': (10, 1)
+}
+LANDSAT_C2_QA_PIXEL_FIELDS = {
+    'fill': (0, 1), 'dilated_cloud': (1, 1), 'cirrus': (2, 1), 'cloud': (3, 1), 'cloud_shadow': (4, 1),
+    'snow': (5, 1), 'clear': (6, 1), 'water': (7, 1), 'cloud_confidence': (8, 2),
+    'cloud_shadow_confidence': (10, 2), 'snow_confidence': (12, 2), 'cirrus_confidence': (14, 2)
+}
+LANDSAT_C2_QA_RADSAT_FIELDS = dict(
+    **{'band_{}_saturated'.format(band): (band - 1, 1) for band in range(1, 8)},
+    band_9_saturated=(8, 1), dropped_pixel=(9, 1), terrain_occlusion=(11, 1)
+)
+
+_bit_field_luts = {}
+
+
+def _normalize_bit_field_criteria(criteria, fields):
+    """
+    Returns `criteria` - a dictionary mapping field names in `fields` (or (offset, width) tuples)
+    to accepted values - as a hashable tuple of (offset, width, accepted values) tuples.
+    """
+    normalized = []
+    for field, accepted_values in criteria.items():
+        if isinstance(field, str):
+            if fields is None:
+                raise ValueError("The field \"{}\" is given by name, so `fields` is required "
+                                 "to map field names to (offset, width) tuples.".format(field))
+            if field not in fields:
+                raise ValueError("The field \"{}\" is not one of {}.".format(field, list(fields)))
+        offset, width = fields[field] if isinstance(field, str) else field
+        accepted_values = [accepted_values] if np.isscalar(accepted_values) else accepted_values
+        normalized.append((offset, width, tuple(sorted(set(int(value) for value in accepted_values)))))
+    return tuple(normalized)
+
+
+def _bit_fields_accepted(values, criteria, how):
+    """
+    Returns whether the fields of integer `values` (a NumPy array, dask array, or xarray object)
+    have accepted values, for `criteria` from `_normalize_bit_field_criteria()`.
+    """
+    combine = np.logical_and if how == 'all' else np.logical_or
+    mask = None
+    for offset, width, accepted_values in criteria:
+        field = np.bitwise_and(np.right_shift(values, offset), (1 << width) - 1)
+        field_mask = None
+        for value in accepted_values:
+            field_mask = field == value if field_mask is None else np.logical_or(field_mask, field == value)
+        if field_mask is None:
+            field_mask = np.zeros_like(field, dtype=bool)
+        mask = field_mask if mask is None else combine(mask, field_mask)
+    return mask
+
+
+def get_bit_field_lut(criteria, fields=None, how='all'):
+    """
+    Returns a cached lookup table of 65,536 booleans for all 16 bit values, signifying
+    whether each value has accepted values for bit fields.
+
+    Parameters
+    ----------
+    criteria: dict
+        A dictionary mapping field names in `fields` (or (offset, width) tuples)
+        to an accepted value or list of accepted values.
+    fields: dict
+        A dictionary mapping field names to (offset, width) tuples,
+        such as `LANDSAT_C2_QA_PIXEL_FIELDS`.
+    how: str
+        One of ['all', 'any'] - whether all or any of the fields must have accepted values.
+
+    Returns
+    -------
+    lut: np.ndarray
+        A boolean array of 65,536 elements indexed by 16 bit values.
+    """
+    if how not in ['all', 'any']:
+        raise ValueError("The method \"{}\" is not supported. "
+                         "Please choose one of ['all', 'any'].".format(how))
+    key = (_normalize_bit_field_criteria(criteria, fields), how)
+    if key not in _bit_field_luts:
+        lut = _bit_fields_accepted(np.arange(2**16, dtype=np.uint32), key[0], how)
+        lut.setflags(write=False)
+        _bit_field_luts[key] = lut
+    return _bit_field_luts[key]
+
+
+def create_bit_field_mask(data_array, criteria, fields=None, how='all'):
+    """
+    Creates a boolean mask of where bit fields of a quality band (e.g. Landsat `pixel_qa`, `QA_PIXEL`, or
+    `QA_RADSAT`) have accepted values, in one vectorized pass.
+
+    8 and 16 bit data are decoded with a lookup table from `get_bit_field_lut()`.
+    Wider integer data and dask arrays are decoded with bitwise shifts, which keeps dask arrays lazy.
+
+    Parameters
+    ----------
+    data_array: xarray.DataArray or np.ndarray
+        The integer quality band.
+    criteria: dict
+        A dictionary mapping field names in `fields` (or (offset, width) tuples)
+        to an accepted value or list of accepted values.
+        For example, `{'cloud_confidence': 1, 'cirrus_confidence': 1}`.
+    fields: dict
+        A dictionary mapping field names to (offset, width) tuples,
+        such as `LANDSAT_C2_QA_PIXEL_FIELDS`. Required if `criteria` has field names.
+    how: str
+        One of ['all', 'any'] - whether all or any of the fields must have accepted values.
+
+    Returns
+    -------
+    mask: xarray.DataArray or np.ndarray
+        A boolean mask with the type, shape, and coordinates of `data_array`.
+    """
+    lut = get_bit_field_lut(criteria, fields, how)
+    values = data_array.data if isinstance(data_array, xr.DataArray) else np.asarray(data_array)
+    if not np.issubdtype(values.dtype, np.integer):
+        raise ValueError("Bit fields can only be decoded from integer data, not {}.".format(values.dtype))
+    if isinstance(values, np.ndarray) and values.dtype.itemsize <= 2:
+        mask = lut[values.view(np.uint8 if values.dtype.itemsize == 1 else np.uint16)]
+    else:
+        mask = _bit_fields_accepted(values, _normalize_bit_field_criteria(criteria, fields), how)
+    if isinstance(data_array, xr.DataArray):
+        return xr.DataArray(mask, dims=data_array.dims, coords=data_array.coords)
+    return mask
+
+
+def landsat_c2_clean_mask(qa_pixel, qa_radsat=None, cover_types=['clear', 'water'], max_cloud_confidence=1):
+    """
+    Creates a clean mask for Landsat Collection 2 data from its QA_PIXEL band and optionally its QA_RADSAT band.
+
+    Parameters
+    ----------
+    qa_pixel: xarray.DataArray or np.ndarray
+        The QA_PIXEL band.
+    qa_radsat: xarray.DataArray or np.ndarray
+        The QA_RADSAT band. If specified, saturated, dropped, and terrain occluded pixels are masked out.
+    cover_types: list
+        The single bit fields of QA_PIXEL that signify clean pixels, such as 'clear', 'water', and 'snow'.
+    max_cloud_confidence: int
+        The maximum cloud and cirrus confidence (0-3) of clean pixels.
+
+    Returns
+    -------
+    clean_mask: xarray.DataArray or np.ndarray
+        A boolean mask that is True for clean pixels.
+    """
+    accepted_confidences = list(range(max_cloud_confidence + 1))
+    clean_mask = create_bit_field_mask(qa_pixel, {cover_type: 1 for cover_type in cover_types},
+                                       LANDSAT_C2_QA_PIXEL_FIELDS, how='any')
+    clean_mask = clean_mask & create_bit_field_mask(
+        qa_pixel, {'fill': 0, 'cloud_confidence': accepted_confidences, 'cirrus_confidence': accepted_confidences},
+        LANDSAT_C2_QA_PIXEL_FIELDS)
+    if qa_radsat is not None:
+        clean_mask = clean_mask & create_bit_field_mask(
+            qa_radsat, {field: 0 for field in LANDSAT_C2_QA_RADSAT_FIELDS}, LANDSAT_C2_QA_RADSAT_FIELDS)
+    return clean_mask
+
+## End Bit Field Decoding ##
+
+
 def add_timestamp_data_to_xr(dataset):
     """Add timestamp data to an xarray dataset using the time dimension.
 
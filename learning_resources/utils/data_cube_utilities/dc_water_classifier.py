@@ -23,7 +23,9 @@ import gc
 import numpy as np
 import xarray as xr
 
-import datacube
+from .lazy_import import lazy_import
+datacube = lazy_import('datacube')
+gdal = lazy_import('gdal')
 
 from .dc_mosaic import restore_or_convert_dtypes
 from . import dc_utilities as utilities
@@ -32,7 +34,6 @@ from .dc_utilities import create_default_clean_mask
 import argparse
 import os
 import collections
-import gdal
 from datetime import datetime
 
 # Author: KMF
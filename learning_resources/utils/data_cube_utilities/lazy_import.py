@@ -0,0 +1,167 @@
+import os
+import re
+import sys
+import importlib
+import threading
+import subprocess
+
+## Lazy Objects ##
+
+class LazyObject(object):
+    """
+    A proxy for an object - such as a module or a `datacube.Datacube` connection - that is only
+    created when it is first used (an attribute is accessed or it is called).
+
+    Parameters
+    ----------
+    factory: callable
+        Creates the object. Called once, on first use.
+    name: str
+        The name of the object, shown by `repr()` until the object is created.
+    """
+
+    def __init__(self, factory, name=None):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_name', name if name is not None else repr(factory))
+        object.__setattr__(self, '_lock', threading.Lock())
+        object.__setattr__(self, '_loaded', False)
+        object.__setattr__(self, '_object', None)
+
+    def _load(self):
+        """Returns the object, creating it if this is its first use."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    object.__setattr__(self, '_object', self._factory())
+                    object.__setattr__(self, '_loaded', True)
+        return self._object
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        if self._loaded:
+            return repr(self._object)
+        return "<lazy {}>".format(self._name)
+
+
+def lazy_import(module_name, attribute=None, package=None):
+    """
+    Returns a proxy for a module (`import module_name`) or an attribute of a module
+    (`from module_name import attribute`) that imports the module on first use.
+    Heavy dependencies imported this way do not slow down the import of the modules using them.
+
+    Parameters
+    ----------
+    module_name: str
+        The name of the module, such as 'matplotlib.pyplot', or '.curve_fitting' relative to `package`.
+    attribute: str
+        The name of a class or function of the module to return instead of the module.
+        Note that the proxy of a class cannot be used with `isinstance()` or subclassed.
+    package: str
+        The package that relative module names are relative to - usually `__package__`.
+
+    Returns
+    -------
+    proxy: LazyObject
+    """
+    if attribute is None:
+        return LazyObject(lambda: importlib.import_module(module_name, package), module_name)
+    return LazyObject(lambda: getattr(importlib.import_module(module_name, package), attribute),
+                      "{}.{}".format(module_name, attribute))
+
+## End Lazy Objects ##
+
+## Import Time Benchmark ##
+
+# The modules benchmarked by `benchmark_import_times()` by default.
+BENCHMARK_MODULES = [
+    'utils.data_cube_utilities.dc_utilities',
+    'utils.data_cube_utilities.plotter_utils',
+    'utils.data_cube_utilities.wasard',
+    'swiss_utils.data_cube_utilities.sdc_utilities',
+    'display_tools',
+]
+# The directory containing the `utils`, `swiss_utils` and `wales_utils` packages.
+_LEARNING_RESOURCES_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def import_time(module_name, repeat=3, paths=None):
+    """
+    Returns the time to import a module in a new Python interpreter, as measured by `python -X importtime`.
+
+    Parameters
+    ----------
+    module_name: str
+        The absolute name of the module.
+    repeat: int
+        The number of measurements. The fastest is returned, since the first is often slowed by disk caches.
+    paths: list of str
+        The directories to import from. Defaults to the directory containing the `utils`, `swiss_utils`
+        and `wales_utils` packages and the `wales_utils/data_cube_utilities` directory.
+
+    Returns
+    -------
+    seconds: float or None
+        The cumulative import time of the module and its dependencies in seconds,
+        or None if the module could not be imported.
+    """
+    if paths is None:
+        paths = [_LEARNING_RESOURCES_DIR,
+                 os.path.join(_LEARNING_RESOURCES_DIR, 'wales_utils', 'data_cube_utilities')]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(paths + [os.environ.get('PYTHONPATH', '')]))
+    pattern = re.compile(r'^import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*(\S+)\s*$')
+    times = []
+    for _ in range(repeat):
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module_name)],
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env,
+                                 universal_newlines=True)
+        if process.returncode != 0:
+            return None
+        for line in process.stderr.splitlines():
+            match = pattern.match(line)
+            if match is not None and match.group(2) == module_name:
+                times.append(int(match.group(1)) / 1e6)
+    return min(times) if len(times) > 0 else None
+
+
+def benchmark_import_times(module_names=None, repeat=3, paths=None):
+    """
+    Returns the import times of modules, each measured in a new Python interpreter with `import_time()`.
+
+    Parameters
+    ----------
+    module_names: list of str
+        The absolute names of the modules. Defaults to `BENCHMARK_MODULES`.
+    repeat, paths:
+        See `import_time()`.
+
+    Returns
+    -------
+    times: dict
+        A dictionary mapping module names to import times in seconds (None for modules that could not be imported).
+    """
+    module_names = module_names if module_names is not None else BENCHMARK_MODULES
+    return {module_name: import_time(module_name, repeat=repeat, paths=paths) for module_name in module_names}
+
+## End Import Time Benchmark ##
+
+
+if __name__ == '__main__':
+    for module_name, seconds in benchmark_import_times(sys.argv[1:] or None).items():
+        print("{:<50} {}".format(module_name, "failed" if seconds is None else "{:.3f} s".format(seconds)))
@@ -12,23 +12,28 @@ import xarray as xr
 from xarray.ufuncs import logical_and as xr_and
 from xarray.ufuncs import logical_or as xr_or
 from xarray.ufuncs import logical_not as xr_not
-import matplotlib as mpl
-import matplotlib.patches as mpatches
-import matplotlib.pyplot as plt
-from matplotlib.ticker import FuncFormatter
-from matplotlib.colors import LinearSegmentedColormap
-import seaborn as sns
-from scipy.interpolate import CubicSpline
 import time
-from scipy import stats
 import warnings
 
-from .curve_fitting import gaussian_fit, gaussian_filter_fit, poly_fit, fourier_fit
+from .lazy_import import lazy_import
+# Plotting and fitting dependencies are imported on first use.
+mpl = lazy_import('matplotlib')
+mpatches = lazy_import('matplotlib.patches')
+plt = lazy_import('matplotlib.pyplot')
+FuncFormatter = lazy_import('matplotlib.ticker', 'FuncFormatter')
+LinearSegmentedColormap = lazy_import('matplotlib.colors', 'LinearSegmentedColormap')
+sns = lazy_import('seaborn')
+CubicSpline = lazy_import('scipy.interpolate', 'CubicSpline')
+interp1d = lazy_import('scipy.interpolate', 'interp1d')
+stats = lazy_import('scipy.stats')
+gaussian_fit = lazy_import('.curve_fitting', 'gaussian_fit', __package__)
+gaussian_filter_fit = lazy_import('.curve_fitting', 'gaussian_filter_fit', __package__)
+poly_fit = lazy_import('.curve_fitting', 'poly_fit', __package__)
+fourier_fit = lazy_import('.curve_fitting', 'fourier_fit', __package__)
 from .scale import xr_scale, np_scale
 from .raster_filter import lone_object_filter
 from .dc_time import _n64_to_datetime, _n64_datetime_to_scalar, _scalar_to_n64_datetime
 
-from scipy.interpolate import interp1d
 
 
 def impute_missing_data_1D(data1D):
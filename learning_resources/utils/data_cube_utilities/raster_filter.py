@@ -1,8 +1,9 @@
 import numpy as np
 import xarray as xr
 from .clean_mask import create_circular_mask
-from skimage.filters.rank import modal
-from skimage.morphology import remove_small_objects
+from .lazy_import import lazy_import
+modal = lazy_import('skimage.filters.rank', 'modal')
+remove_small_objects = lazy_import('skimage.morphology', 'remove_small_objects')
 
 def lone_object_filter(image, min_size=2, connectivity=1, kernel_size=3):
     """
@@ -1,22 +1,27 @@
-import datacube
 import xarray as xr
 import datetime
 import warnings; warnings.simplefilter('ignore')
 import numpy as np
 from datetime import datetime
 from time import time 
-from sklearn import svm
 import warnings
 warnings.filterwarnings("ignore")
-import matplotlib.pyplot as plt
-import matplotlib.image as mpimg
-import scipy.ndimage 
-from sklearn.externals import joblib
 from .dc_water_classifier import wofs_classify
 import random
 import itertools
-from sklearn.metrics import f1_score, recall_score, precision_score
-dc = datacube.Datacube(app = 'wasard_test', config = '/home/localuser/.datacube.conf')
+from .lazy_import import lazy_import, LazyObject
+# Heavy dependencies are imported, and the Datacube connection created, on first use.
+datacube = lazy_import('datacube')
+svm = lazy_import('sklearn.svm')
+plt = lazy_import('matplotlib.pyplot')
+mpimg = lazy_import('matplotlib.image')
+ndimage = lazy_import('scipy.ndimage')
+joblib = lazy_import('sklearn.externals', 'joblib')
+f1_score = lazy_import('sklearn.metrics', 'f1_score')
+recall_score = lazy_import('sklearn.metrics', 'recall_score')
+precision_score = lazy_import('sklearn.metrics', 'precision_score')
+dc = LazyObject(lambda: datacube.Datacube(app = 'wasard_test', config = '/home/localuser/.datacube.conf'),
+                'datacube.Datacube')
 
 
 class wasard_classifier:
@@ -542,8 +547,8 @@ def _filter_isolated_cells(array, struct, max_size):
     """
     
     filtered_array                        = np.copy(array)
-    id_regions, num_ids                   = scipy.ndimage.label(filtered_array, structure=struct)
-    id_sizes                              = np.array(scipy.ndimage.sum(array, id_regions, range(num_ids + 1)))
+    id_regions, num_ids                   = ndimage.label(filtered_array, structure=struct)
+    id_sizes                              = np.array(ndimage.sum(array, id_regions, range(num_ids + 1)))
     area_mask                             = (id_sizes <= max_size)
     filtered_array[area_mask[id_regions]] = 0
     return filtered_array
@@ -0,0 +1,52 @@
+import unittest
+
+import numpy as np
+import xarray as xr
+import dask.array as da
+
+from data_cube_utilities import clean_mask
+
+
+class TestValuesIn(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.arrays = {dtype: rng.integers(np.iinfo(dtype).min, np.iinfo(dtype).max, (6, 50, 40),
+                                           endpoint=True, dtype=dtype)
+                       for dtype in [np.uint8, np.uint16, np.int16, np.int32]}
+        self.arrays[np.float32] = rng.integers(0, 20, (6, 50, 40)).astype(np.float32)
+        for arr in self.arrays.values():
+            # Make sure some values are found.
+            arr[:, :10] = np.arange(10).astype(arr.dtype)[:, None]
+        self.values = {
+            # Compared in place.
+            'few': [0, 3, 7],
+            # Mapped through a lookup table.
+            'many': list(range(0, 20)) + [255, 256, 65535],
+            # Out of the range of the dtype, negative, or not integers.
+            'out of range': [-32768, -1, 2, 1.5, 9, 70000, 200, 300, 400, 500, 600],
+            'none': [],
+        }
+
+    def test_values_in(self):
+        for dtype, arr in self.arrays.items():
+            for name, values in self.values.items():
+                with self.subTest(dtype=np.dtype(dtype).name, values=name):
+                    expected = np.isin(arr, values)
+                    self.assertTrue(np.array_equal(clean_mask._values_in(arr, values), expected))
+
+                    # Dask arrays are mapped lazily, block by block.
+                    lazy = clean_mask._values_in(da.from_array(arr, chunks=(2, 25, 20)), values)
+                    self.assertTrue(isinstance(lazy, da.Array))
+                    self.assertTrue(np.array_equal(lazy.compute(), expected))
+
+    def test_xarray_values_in(self):
+        dataset = xr.Dataset({'scl': (('time', 'latitude', 'longitude'), self.arrays[np.uint8]),
+                              'fmask': (('time', 'latitude', 'longitude'), self.arrays[np.int16])})
+        values = self.values['many']
+        expected = np.isin(dataset.scl.values, values) | np.isin(dataset.fmask.values, values)
+        self.assertTrue(np.array_equal(clean_mask.xarray_values_in(dataset, values), expected))
+        self.assertTrue(np.array_equal(clean_mask.xarray_values_in(dataset.chunk({'time': 2}), values).compute(),
+                                       expected))
+        self.assertTrue(np.array_equal(clean_mask.xarray_values_in(dataset, values, data_vars=['scl']),
+                                       np.isin(dataset.scl.values, values)))
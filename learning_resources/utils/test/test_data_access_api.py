@@ -47,6 +47,26 @@ class TestDataAccessApi(unittest.TestCase):
         self.assertIn('satellite', data)
         self.assertTrue(type(data) == xr.Dataset)
 
+    def test_get_stacked_datasets_by_extent_concurrent(self):
+        products = ['ls7_ledaps_meta_river', 'ls8_ledaps_meta_river']
+        fake_products = ['fake1', 'fake2']
+        kwargs = {
+            'time': (datetime(2015, 1, 1), datetime(2015, 3, 1)),
+            'longitude': (-71.6, -71.5),
+            'latitude': (4.5, 4.6),
+            'measurements': ['red', 'green', 'blue']
+        }
+        data = self.dc_api.get_stacked_datasets_by_extent_concurrent(products, max_workers=2, **kwargs)
+        sequential_data = self.dc_api.get_stacked_datasets_by_extent(products, **kwargs)
+        fake_data = self.dc_api.get_stacked_datasets_by_extent_concurrent(fake_products, **kwargs)
+
+        self.assertIsNone(fake_data)
+        self.assertIn('red', data)
+        self.assertNotIn('satellite', data.data_vars)
+        self.assertTrue(data.satellite.dims == ('time',))
+        self.assertTrue(np.all(np.diff(data.time.values) >= np.timedelta64(0)))
+        self.assertTrue(np.array_equal(data.red.values, sequential_data.red.values))
+
     def test_get_query_metadata(self):
         faked_data = self.dc_api.get_datacube_metadata('ls7_collections_sr_scene_fake')
         self.assertTrue(faked_data['scene_count'] == 0)
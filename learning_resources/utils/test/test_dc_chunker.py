@@ -55,6 +55,84 @@ class TestChunker(unittest.TestCase):
         self.assertTrue(len(combined_data.longitude) == 10)
         self.assertTrue(combined_data.test_data.values.shape == (101, 10))
 
+    def test_assemble_geographic_chunks(self):
+        longitude_values = list(range(0, 10, 1))
+        latitude_ranges = [list(range(x * 10, x * 10 + 11, 1)) for x in range(10)]
+
+        dataset_chunks = [
+            xr.Dataset(
+                {
+                    'test_data': (('latitude', 'longitude'), np.full((len(latitude_values), len(longitude_values)),
+                                                                     index, dtype=np.int16))
+                },
+                coords={'latitude': latitude_values,
+                        'longitude': longitude_values}) for index, latitude_values in enumerate(latitude_ranges)
+        ]
+
+        combined_data = dc_chunker.assemble_geographic_chunks(dataset_chunks)
+        self.assertTrue(len(combined_data.latitude) == 101)
+        self.assertTrue(len(combined_data.longitude) == 10)
+        self.assertTrue(combined_data.test_data.values.shape == (101, 10))
+        self.assertTrue(combined_data.test_data.dtype == np.int16)
+        self.assertTrue(np.all(combined_data.test_data.sel(latitude=10).values == 0))
+
+        combined_data = dc_chunker.assemble_geographic_chunks(dataset_chunks, overlap='last')
+        self.assertTrue(np.all(combined_data.test_data.sel(latitude=10).values == 1))
+
+        # Chunks with halos along both dimensions reassemble the original data.
+        latitudes, longitudes = np.arange(20)[::-1], np.arange(16)
+        data = np.random.rand(3, 20, 16)
+        dataset_chunks = [
+            xr.Dataset(
+                {
+                    'test_data': (('time', 'latitude', 'longitude'), data[:, lat_slice, lon_slice])
+                },
+                coords={'time': [1, 2, 3],
+                        'latitude': latitudes[lat_slice],
+                        'longitude': longitudes[lon_slice]})
+            for lat_slice in [slice(0, 12), slice(8, 20)] for lon_slice in [slice(0, 9), slice(7, 16)]
+        ]
+        for overlap in ['first', 'last', 'mean']:
+            combined_data = dc_chunker.assemble_geographic_chunks(dataset_chunks, overlap=overlap)
+            self.assertTrue(np.array_equal(combined_data.latitude.values, latitudes))
+            self.assertTrue(np.allclose(combined_data.test_data.values, data))
+
+        combined_data = dc_chunker.assemble_geographic_chunks([dataset_chunks[0], dataset_chunks[-1]])
+        self.assertTrue(np.isnan(combined_data.test_data.values).any())
+
+    def test_plan_chunks(self):
+        measurements = {'red': 'int16', 'nir': 'int16', 'pixel_qa': 'uint16'}
+        budget = 512 * 1024 * 1024
+        plan = dc_chunker.plan_chunks(measurements, (-0.00025, 0.00025), 100, budget, temp_copy_multiplier=3)
+
+        self.assertTrue(plan['time'] == 100)
+        self.assertTrue(plan['x'] * plan['y'] * plan['time'] * 6 * 3 <= budget)
+        self.assertTrue(plan['bytes'] <= budget)
+        self.assertTrue(np.isclose(plan['x_size'], plan['x'] * 0.00025))
+        self.assertTrue(np.isclose(plan['geographic_chunk_size'], plan['x_size'] * plan['y_size']))
+
+        # Too many time steps for the budget are split in time.
+        plan = dc_chunker.plan_chunks(measurements, (-30, 30), 10000, 64 * 64 * 6 * 100, temp_copy_multiplier=1)
+        self.assertTrue(plan['time'] == 100)
+        self.assertTrue(plan['x'] == 64 and plan['y'] == 64)
+
+        # Chunks are aligned to storage tiles and limited to the extents.
+        plan = dc_chunker.plan_chunks(measurements, (-1, 1), 10, budget, tile_size=(100, 100))
+        self.assertTrue(plan['x'] % 100 == 0 and plan['y'] % 100 == 0)
+        plan = dc_chunker.plan_chunks(measurements, (-1, 1), 10, budget, longitude=(0, 50), latitude=(0, 100000))
+        self.assertTrue(plan['x'] == 50)
+        self.assertTrue(plan['y'] > 50)
+
+        with self.assertRaises(ValueError):
+            dc_chunker.plan_chunks(measurements, (-1, 1), 10, 1)
+
+    def test_create_grid_chunks(self):
+        grid_chunks = dc_chunker.create_grid_chunks(self.negative_to_positive, self.negative_to_positive, 0.5, 1)
+
+        self.assertTrue(len(grid_chunks) == 8)
+        self.assertTrue(grid_chunks[0] == {'longitude': (-1, -0.5), 'latitude': (-1, 0)})
+        self.assertTrue(grid_chunks[-1] == {'longitude': (0.5, 1), 'latitude': (0, 1)})
+
     def test_create_time_chunks(self):
         date_groups = dc_chunker.create_time_chunks(self.dates, time_chunk_size=2)
         self.assertTrue(len(date_groups) == 3)
@@ -96,3 +174,21 @@ class TestChunker(unittest.TestCase):
         baseline = dc_chunker.generate_baseline(baseline_iterable, window_length=2)
         self.assertTrue(len(baseline) == 3)
         self.assertTrue(len(baseline[0]) == 3)
+
+    def test_apply_with_halo(self):
+        from scipy import ndimage
+        data = np.random.rand(3, 23, 17)
+        data_array = xr.DataArray(data, dims=('time', 'latitude', 'longitude'),
+                                  coords={'latitude': np.arange(23), 'longitude': np.arange(17)})
+
+        smooth = lambda block: ndimage.uniform_filter(block, size=(1, 5, 5), mode='nearest')
+        result = dc_chunker.apply_with_halo(smooth, data_array, (6, 5), 2)
+        self.assertTrue(result.dims == data_array.dims)
+        self.assertTrue(np.allclose(result.values, smooth(data)))
+
+        opening = lambda block: ndimage.binary_opening(block, structure=np.ones((3, 3))).astype(np.uint8)
+        mask = data[0] > 0.5
+        out = np.zeros(mask.shape, dtype=np.uint8)
+        result = dc_chunker.apply_with_halo(opening, mask, (4, 7), 2, out=out)
+        self.assertTrue(result is out)
+        self.assertTrue(np.array_equal(out, opening(mask)))
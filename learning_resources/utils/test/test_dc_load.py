@@ -0,0 +1,224 @@
+import unittest
+from unittest import mock
+
+import warnings
+from types import SimpleNamespace
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from data_cube_utilities import dc_load
+
+try:
+    from datacube.utils import geometry
+except ImportError:
+    geometry = None
+
+
+def spaced(times, inds, min_spacing):
+    """Keeps the acquisitions at least `min_spacing` after the previously kept one, one at a time."""
+    kept = []
+    for ind in sorted(inds, key=lambda ind: times[ind]):
+        if len(kept) == 0 or times[ind] - times[kept[-1]] >= min_spacing:
+            kept.append(ind)
+    return sorted(kept)
+
+
+class TestFindDesiredAcqInds(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        # Unsorted times, some on the same day.
+        self.times = np.array(pd.date_range('2020-01-01', periods=40, freq='2D')
+                              + pd.to_timedelta(rng.integers(0, 3, 40), unit='h'))[rng.permutation(40)]
+        self.clean_mask = xr.DataArray(rng.random((40, 5, 6)) < rng.random((40, 1, 1)),
+                                       dims=('time', 'latitude', 'longitude'), coords={'time': self.times})
+        self.dataset = xr.Dataset({'red': self.clean_mask.astype(np.float64).where(self.clean_mask)})
+
+    def test_without_spacing(self):
+        for pct_clean in [None, 0.2, 0.5, 1.1]:
+            expected = dc_load.find_desired_acq_inds(self.dataset, self.clean_mask, pct_clean=pct_clean)
+            result = dc_load.find_desired_acq_inds_vectorized(self.dataset, self.clean_mask, pct_clean=pct_clean)
+            self.assertTrue(result == sorted(expected))
+        # No acquisition is clean enough.
+        self.assertTrue(dc_load.find_desired_acq_inds_vectorized(clean_mask=self.clean_mask, pct_clean=1.1,
+                                                                 min_spacing='5D', max_acqs=3) == [])
+
+    def test_not_empty(self):
+        expected = dc_load.find_desired_acq_inds(self.dataset, not_empty=True)
+        result = dc_load.find_desired_acq_inds_vectorized(self.dataset, not_empty=True)
+        self.assertTrue(result == sorted(expected))
+
+    def test_min_spacing(self):
+        expected = dc_load.find_desired_acq_inds(self.dataset, self.clean_mask, pct_clean=0.3)
+        for min_spacing in ['0D', '1D', '5D', '365D']:
+            result = dc_load.find_desired_acq_inds_vectorized(self.dataset, self.clean_mask, pct_clean=0.3,
+                                                              min_spacing=min_spacing)
+            self.assertTrue(result == spaced(self.times, expected, pd.to_timedelta(min_spacing).to_timedelta64()))
+        # A spacing larger than the time range keeps only the earliest acquisition.
+        result = dc_load.find_desired_acq_inds_vectorized(clean_mask=self.clean_mask, min_spacing='365D')
+        self.assertTrue(result == [int(np.argmin(self.times))])
+        with self.assertRaises(ValueError):
+            dc_load.find_desired_acq_inds_vectorized(clean_mask=self.clean_mask, min_spacing='-1D')
+
+    def test_max_acqs(self):
+        result = dc_load.find_desired_acq_inds_vectorized(clean_mask=self.clean_mask, max_acqs=5)
+        clean_frac = self.clean_mask.mean(['latitude', 'longitude']).values
+        self.assertTrue(len(result) == 5)
+        self.assertTrue(clean_frac[result].min() >= np.sort(clean_frac)[-5])
+
+
+def search_result(lat, lon, time_begin, time_end):
+    """Returns a result of `dc.index.datasets.search_returning(['lat', 'lon', 'time'])`."""
+    return SimpleNamespace(lat=SimpleNamespace(begin=lat[0], end=lat[1]),
+                           lon=SimpleNamespace(begin=lon[0], end=lon[1]),
+                           time=SimpleNamespace(begin=time_begin, end=time_end))
+
+
+def mock_datacube(products):
+    """
+    Returns a mocked `datacube.Datacube` whose index holds products, given as a dictionary mapping
+    product names to 2-tuples of their definition and the results of `search_returning()`.
+    """
+    dc = mock.MagicMock()
+    dc.index.products.get_by_name.side_effect = \
+        lambda name: SimpleNamespace(definition=products[name][0]) if name in products else None
+    dc.index.datasets.search_returning.side_effect = lambda fields, product, **query: iter(products[product][1])
+    return dc
+
+
+class TestReduceOnDay(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        # Days with several scenes and days with a single scene.
+        times = pd.to_datetime(['2020-01-01T10:00', '2020-01-01T10:01', '2020-01-01T23:59', '2020-01-02T00:00',
+                                '2020-01-05T09:00', '2020-01-07T08:00', '2020-01-07T08:30'])
+        red = rng.random((len(times), 4, 5))
+        red[rng.random(red.shape) < 0.3] = np.nan
+        red[1:3, 0, 0] = np.nan # all-NaN values for a day
+        self.dataset = xr.Dataset({'red': (('time', 'latitude', 'longitude'), red),
+                                   'pixel_qa': (('time', 'latitude', 'longitude'),
+                                                rng.integers(0, 1000, red.shape).astype(np.int16))},
+                                  coords={'time': times, 'latitude': [4., 3., 2., 1.],
+                                          'longitude': [0., 1., 2., 3., 4.]})
+
+    def test_reduce_on_day_segments(self):
+        for reduction, reduction_func in [('mean', np.nanmean), ('max', np.nanmax), ('min', np.nanmin)]:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                expected = dc_load.reduce_on_day(self.dataset, reduction_func)
+            reduced = dc_load.reduce_on_day_segments(self.dataset, reduction)
+            self.assertTrue(reduced.time.values.tolist() == expected.time.values.tolist())
+            for name in self.dataset.data_vars:
+                self.assertTrue(reduced[name].dtype == expected[name].dtype)
+                self.assertTrue(np.allclose(reduced[name].values, expected[name].values, equal_nan=True))
+
+    def test_reduce_on_day_segments_unsorted(self):
+        shuffled = self.dataset.isel(time=[4, 0, 6, 2, 1, 5, 3])
+        for reduction in ['max', 'first', 'last']:
+            self.assertTrue(dc_load.reduce_on_day_segments(shuffled, reduction).identical(
+                dc_load.reduce_on_day_segments(self.dataset, reduction)))
+
+
+class TestConcatOnTime(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.datasets = []
+        for platform, times in [('LS7', ['2020-01-05', '2020-01-01', '2020-02-01']),
+                                ('LS8', ['2020-01-03', '2020-01-20'])]:
+            times = pd.to_datetime(times)
+            self.datasets.append(xr.Dataset(
+                {'red': (('time', 'latitude', 'longitude'), rng.integers(0, 100, (len(times), 3, 4)).astype(np.int16)),
+                 'nir': (('latitude', 'longitude', 'time'), rng.random((3, 4, len(times))))},
+                coords={'time': times, 'latitude': [3., 2., 1.], 'longitude': [0., 1., 2., 3.],
+                        'platform': ('time', [platform] * len(times)),
+                        'cloud_cover': ('time', rng.random(len(times)))},
+                attrs={'crs': 'EPSG:4326'}))
+
+    def expected(self, datasets):
+        return dc_load.xarray_sortby_coord(xr.concat(datasets, dim='time'), 'time')
+
+    def test_concat_on_time(self):
+        merged = dc_load._concat_on_time_preallocated(self.datasets)
+        self.assertTrue(merged.identical(self.expected(self.datasets)))
+        self.assertTrue(merged.platform.values.tolist() == ['LS7', 'LS8', 'LS7', 'LS8', 'LS7'])
+
+        data_arrays = [dataset.red for dataset in self.datasets]
+        self.assertTrue(dc_load._concat_on_time_preallocated(data_arrays).identical(self.expected(data_arrays)))
+
+    def test_concat_on_time_fallback(self):
+        # Inputs with a variable without 'time' and dask-backed inputs.
+        for datasets in [[dataset.assign(water=dataset.red.isel(time=0, drop=True)) for dataset in self.datasets],
+                         [dataset.chunk({'time': 1}) for dataset in self.datasets]]:
+            merged = dc_load._concat_on_time_preallocated(datasets)
+            self.assertTrue(merged.identical(self.expected(datasets)))
+
+
+class TestProductFootprint(unittest.TestCase):
+
+    def setUp(self):
+        self.dc = mock_datacube({
+            'ls8_ingested': ({'storage': {'crs': 'EPSG:4326',
+                                          'resolution': {'latitude': -0.00025, 'longitude': 0.00025}}},
+                             [search_result((46.0, 46.5), (6.0, 6.5), datetime(2020, 1, 1, 10), datetime(2020, 1, 1, 10)),
+                              search_result((46.2, 47.0), (6.2, 7.0), datetime(2020, 1, 17, 10), datetime(2020, 1, 17, 10)),
+                              search_result((45.5, 46.0), (5.5, 6.0), datetime(2020, 1, 17, 10), datetime(2020, 1, 17, 10))]),
+            's2_multi_utm': ({'metadata': {}},
+                             [search_result((46.0, 47.0), (6.0, 7.0),
+                                            datetime(2021, 5, 3, 10, tzinfo=timezone.utc),
+                                            datetime(2021, 5, 3, 10, tzinfo=timezone.utc))]),
+            'empty': ({'load': {'crs': 'EPSG:32632', 'resolution': {'y': -10, 'x': 10}}}, []),
+        })
+
+    def test_get_product_footprint(self):
+        with mock.patch.object(dc_load, '_extent_dim_sizes', return_value=(10, 20)) as extent_dim_sizes:
+            footprint = dc_load.get_product_footprint(self.dc, 'ls8_ingested')
+            # Footprints are memoized.
+            self.assertTrue(dc_load.get_product_footprint(self.dc, 'ls8_ingested') is footprint)
+            self.assertTrue(self.dc.index.datasets.search_returning.call_count == 1)
+            dc_load.get_product_footprint(self.dc, 'ls8_ingested', refresh=True)
+            self.assertTrue(self.dc.index.datasets.search_returning.call_count == 2)
+        extent_dim_sizes.assert_called_with((5.5, 7.0), (45.5, 47.0), 'EPSG:4326', (-0.00025, 0.00025))
+        self.assertTrue(footprint['lat_extents'] == (45.5, 47.0))
+        self.assertTrue(footprint['lon_extents'] == (5.5, 7.0))
+        self.assertTrue(footprint['time_extents'] == (datetime(2020, 1, 1, 10), datetime(2020, 1, 17, 10)))
+        self.assertTrue(footprint['scene_count'] == 3 and footprint['tile_count'] == 2)
+        self.assertTrue(footprint['pixel_count'] == 200)
+
+    def test_get_product_footprint_without_grid(self):
+        # Products that are not ingested and have no load hints have no single grid.
+        footprint = dc_load.get_product_footprint(self.dc, 's2_multi_utm')
+        self.assertTrue(footprint['crs'] is None and footprint['resolution'] is None)
+        self.assertTrue(footprint['pixel_count'] is None)
+        self.assertTrue(footprint['time_extents'] == (datetime(2021, 5, 3, 10), datetime(2021, 5, 3, 10)))
+
+    def test_get_product_footprint_empty(self):
+        footprint = dc_load.get_product_footprint(self.dc, 'empty')
+        self.assertTrue(footprint['crs'] == 'EPSG:32632' and footprint['resolution'] == (-10, 10))
+        self.assertTrue(footprint['time_extents'] == (None, None) and footprint['scene_count'] == 0)
+        footprint = dc_load.get_product_footprint(self.dc, 'unknown')
+        self.assertTrue(footprint['lat_extents'] == (None, None) and footprint['crs'] is None)
+
+    def test_match_dim_sizes(self):
+        with mock.patch.object(dc_load, '_extent_dim_sizes', return_value=(10, 20)) as extent_dim_sizes:
+            abs_res, same_dim_sizes = dc_load.match_dim_sizes(self.dc, ['ls8_ingested', 's2_multi_utm'],
+                                                              (6.0, 6.1), (46.0, 46.1),
+                                                              output_crs='EPSG:32632', resolution=(-10, 10))
+        self.assertTrue(abs_res == [20, 10] and same_dim_sizes)
+        self.assertTrue(extent_dim_sizes.call_count == 2)
+        # Sizing only reads the product definitions, without searching the datasets.
+        self.dc.index.datasets.search_returning.assert_not_called()
+
+    @unittest.skipIf(geometry is None, "requires datacube")
+    def test_extent_dim_sizes(self):
+        # Extents aligned with the pixel grid.
+        self.assertTrue(dc_load._extent_dim_sizes((6.0, 8.5), (46.0, 47.0), 'EPSG:4326', (-0.25, 0.25)) == (4, 10))
+        # Extents between pixels are snapped outwards to the grid, as by `dc.load()`.
+        self.assertTrue(dc_load._extent_dim_sizes((6.1, 8.6), (46.1, 47.1), 'EPSG:4326', (-0.25, 0.25)) == (5, 11))
+        geopolygon = geometry.box(6.0005, 46.0005, 6.0105, 46.0205, crs=geometry.CRS('EPSG:4326'))
+        geobox = geometry.GeoBox.from_geopolygon(geopolygon, (-10, 10), crs=geometry.CRS('EPSG:32632'))
+        self.assertTrue(dc_load._extent_dim_sizes((6.0005, 6.0105), (46.0005, 46.0205), 'EPSG:32632', (-10, 10))
+                        == geobox.shape)
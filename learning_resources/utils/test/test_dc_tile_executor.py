@@ -0,0 +1,94 @@
+import unittest
+
+import os
+import shutil
+import tempfile
+import numpy as np
+import xarray as xr
+
+from data_cube_utilities import dc_tile_executor, dc_chunker
+
+
+LATITUDES = 52.0 - np.arange(40) * 0.1
+LONGITUDES = -4.0 + np.arange(30) * 0.1
+
+
+def load_tile(longitude, latitude):
+    lat_mask = (LATITUDES >= latitude[0] - 1e-9) & (LATITUDES < latitude[1] - 1e-9)
+    lon_mask = (LONGITUDES >= longitude[0] - 1e-9) & (LONGITUDES < longitude[1] - 1e-9)
+    return xr.Dataset(
+        {
+            'test_data': (('latitude', 'longitude'), np.add.outer(LATITUDES[lat_mask], LONGITUDES[lon_mask]))
+        },
+        coords={'latitude': LATITUDES[lat_mask],
+                'longitude': LONGITUDES[lon_mask]})
+
+
+def double(dataset):
+    return (dataset.test_data * 2).rename('doubled')
+
+
+class TestTileExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output_path = os.path.join(self.directory, 'output.zarr')
+        self.tiles = dc_chunker.create_grid_chunks((-4.0, -1.0), (48.1, 52.1), 1.0, 1.0)
+        self.schema = {
+            'coords': {'latitude': LATITUDES, 'longitude': LONGITUDES},
+            'data_vars': {'doubled': (('latitude', 'longitude'), 'float32', np.nan)},
+            'chunks': {'latitude': 10, 'longitude': 10}
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_run_tiled(self):
+        completed = dc_tile_executor.run_tiled(self.tiles, load_tile, double, self.output_path, self.schema,
+                                               num_workers=1)
+        self.assertTrue(completed == list(range(len(self.tiles))))
+
+        output = xr.open_zarr(self.output_path)
+        self.assertTrue(output.doubled.dtype == np.float32)
+        self.assertTrue(np.allclose(output.doubled.values, np.add.outer(LATITUDES, LONGITUDES) * 2))
+
+    def test_run_tiled_resume(self):
+        dc_tile_executor.run_tiled(self.tiles, load_tile, double, self.output_path, self.schema, num_workers=1)
+        # Keep the header and 5 completed tiles, and a line cut short by an interrupted run.
+        manifest_path = self.output_path + '.manifest.jsonl'
+        with open(manifest_path) as manifest_file:
+            lines = manifest_file.read().splitlines()
+        self.assertTrue(len(lines) == len(self.tiles) + 1)
+        with open(manifest_path, 'w') as manifest_file:
+            manifest_file.write('\n'.join(lines[:6]) + '\n' + lines[6][:5])
+
+        loaded = []
+        def load_remaining(**tile):
+            loaded.append(tile)
+            return load_tile(**tile)
+        completed = dc_tile_executor.run_tiled(self.tiles, load_remaining, double, self.output_path, self.schema,
+                                               num_workers=1)
+        self.assertTrue(completed == list(range(len(self.tiles))))
+        self.assertTrue(len(loaded) == len(self.tiles) - 5)
+        # Tiles are appended after the cut line, so nothing is left to run.
+        loaded.clear()
+        dc_tile_executor.run_tiled(self.tiles, load_remaining, double, self.output_path, self.schema, num_workers=1)
+        self.assertTrue(len(loaded) == 0)
+        output = xr.open_zarr(self.output_path)
+        self.assertTrue(np.allclose(output.doubled.values, np.add.outer(LATITUDES, LONGITUDES) * 2))
+
+        with self.assertRaises(ValueError):
+            dc_tile_executor.run_tiled(self.tiles[:2], load_tile, double, self.output_path, self.schema,
+                                       num_workers=1)
+
+    def test_run_tiled_parallel(self):
+        # Tiles of 7 pixels are not aligned with the 10 pixel chunks of the store.
+        for x_size, y_size in [(1.0, 1.0), (0.7, 0.7)]:
+            tiles = dc_chunker.create_grid_chunks((-4.0, -1.0), (48.1, 52.1), x_size, y_size)
+            output_path = os.path.join(self.directory, 'output_{}.zarr'.format(x_size))
+            completed = dc_tile_executor.run_tiled(tiles, load_tile, double, output_path, self.schema,
+                                                   num_workers=4)
+            self.assertTrue(completed == list(range(len(tiles))))
+
+            output = xr.open_zarr(output_path)
+            self.assertTrue(np.allclose(output.doubled.values, np.add.outer(LATITUDES, LONGITUDES) * 2))
@@ -85,6 +85,24 @@ class TestDCUtilities(unittest.TestCase):
     def test_create_bit_mask(self):
         pass
 
+    def test_create_bit_field_mask(self):
+        # Clear (bit 1) with cloud confidence (bits 6-7) low, medium, high, and fill.
+        qa = np.array([[66, 130], [194, 1]], dtype=np.uint16)
+        criteria = {'clear': 1, 'cloud_confidence': 1}
+        fields = dc_utilities.LANDSAT_C1_PIXEL_QA_FIELDS
+        expected = np.array([[True, False], [False, False]])
+
+        self.assertTrue((dc_utilities.create_bit_field_mask(qa, criteria, fields) == expected).all())
+        self.assertTrue((dc_utilities.create_bit_field_mask(qa.astype(np.int32), criteria, fields) == expected).all())
+        self.assertTrue((dc_utilities.create_bit_field_mask(qa, {(0, 1): 1, (2, 1): 1}, how='any') ==
+                         np.array([[False, False], [False, True]])).all())
+
+        # Field names require the fields they are defined in.
+        with self.assertRaisesRegex(ValueError, 'fields'):
+            dc_utilities.create_bit_field_mask(qa, criteria)
+        with self.assertRaisesRegex(ValueError, 'cirrus'):
+            dc_utilities.create_bit_field_mask(qa, {'cirrus': 0}, fields)
+
     def test_add_timestamp_data_to_xr(self):
         pass
 
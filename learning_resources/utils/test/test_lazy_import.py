@@ -0,0 +1,32 @@
+import unittest
+
+import sys
+import json
+
+from data_cube_utilities import lazy_import
+
+
+class TestLazyImport(unittest.TestCase):
+
+    def test_lazy_import(self):
+        sys.modules.pop('json.tool', None)
+        tool = lazy_import.lazy_import('json.tool')
+        self.assertNotIn('json.tool', sys.modules)
+        self.assertTrue(callable(tool.main))
+        self.assertIn('json.tool', sys.modules)
+
+        dumps = lazy_import.lazy_import('json', 'dumps')
+        self.assertTrue(dumps([1]) == json.dumps([1]))
+
+    def test_lazy_object(self):
+        created = []
+        lazy_list = lazy_import.LazyObject(lambda: created.append(1) or [1, 2], 'list')
+        self.assertTrue(repr(lazy_list) == '<lazy list>')
+        self.assertTrue(len(created) == 0)
+        self.assertTrue(lazy_list[1] == 2)
+        self.assertTrue(lazy_list.index(2) == 1)
+        self.assertTrue(len(created) == 1)
+
+    def test_import_time(self):
+        self.assertTrue(lazy_import.import_time('csv', repeat=1, paths=[]) > 0)
+        self.assertIsNone(lazy_import.import_time('not_a_module', repeat=1, paths=[]))
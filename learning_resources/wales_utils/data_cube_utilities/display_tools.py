@@ -1,24 +1,12 @@
 import numpy as np
 import math
-from pyproj import Proj, transform
-from ipyleaflet import (
-    Map,
-    basemaps,
-    basemap_to_tiles,
-    ImageOverlay,
-    LayersControl,
-    Rectangle,
-    DrawControl,
-    WidgetControl
-)
-from ipywidgets import Layout, IntSlider, IntRangeSlider, RadioButtons, DatePicker
-from PIL import Image
-import matplotlib.cm as mcm
 from io import BytesIO
 from base64 import b64encode
-import rioxarray
 import datetime
 
+# pyproj, ipyleaflet, ipywidgets, PIL, matplotlib and rioxarray are imported by the functions
+# using them, so that importing this module stays fast for batch jobs that display nothing.
+
 
 
 def _degree_to_zoom_level(l1, l2, margin = 0.0):
@@ -44,6 +32,9 @@ def map_extent(extent = None):
     Output:
       m: the background map/service provided by ipyleaflet
     """
+    from pyproj import Proj, transform
+    from ipyleaflet import Map, basemaps, basemap_to_tiles, Rectangle, LayersControl
+    from ipywidgets import Layout
     
     # check options combination
     assert not(extent is None), \
@@ -106,6 +97,8 @@ def map_geom(geometry = None):
     Output:
       m: the background map/service provided by ipyleaflet with overlayed geometry
     """
+    from ipyleaflet import Map, basemaps, basemap_to_tiles, LayersControl
+    from ipywidgets import Layout
     
     lat_list=[]
     lon_list=[]
@@ -152,6 +145,8 @@ def draw_select(geometry = None):
     Output:
       m: the background map/service provided by ipyleaflet
     """
+    from ipyleaflet import Map, basemaps, basemap_to_tiles, DrawControl, WidgetControl, LayersControl
+    from ipywidgets import Layout, RadioButtons
     
     if (geometry == None):
         lat_ext = (51.508, 53.459)
@@ -244,7 +239,10 @@ def da_to_png64(da, cm):
       cm: str indicating a matplotlib colormap
     Output:
       imgurl: image URL 
-    """    
+    """
+    import matplotlib.cm as mcm
+    from PIL import Image
+
     arr = da.values
     
     # colorise xarray
@@ -279,6 +277,9 @@ def display_da(da, colormap):
     Output:
       m: map to interact with
     """
+    import rioxarray # registers the .rio accessor
+    from ipyleaflet import Map, basemaps, basemap_to_tiles, ImageOverlay, LayersControl
+    from ipywidgets import Layout
 
     # Check inputs
     assert 'dataarray.DataArray' in str(type(da)), "da must be an xarray.DataArray"
@@ -325,6 +326,7 @@ def display_da(da, colormap):
 
 
 def cloud_threshold_slider():
+    from ipywidgets import IntSlider
     cloud_slider = IntSlider(value=20, min=0, max=100,step=5,
               description='Max cloud cover:',)
 
@@ -332,6 +334,7 @@ def cloud_threshold_slider():
 
 
 def year_range_slider():
+    from ipywidgets import IntRangeSlider
     today_year = datetime.date.today().year
     year_range = IntRangeSlider(
         value=[today_year-1, today_year],
@@ -345,6 +348,7 @@ def year_range_slider():
 
 def calendar():
     from IPython.display import display, Javascript
+    from ipywidgets import DatePicker
     
     date = DatePicker(
         description='Pick a Date',
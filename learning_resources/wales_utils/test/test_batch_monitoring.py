@@ -0,0 +1,136 @@
+import unittest
+
+import os
+import sys
+import shutil
+import tempfile
+import importlib.util
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'themes_utilities'))
+import batch_monitoring
+
+
+def load_theme(theme, extent, start_date, end_date, resolution=(-10,10), max_cloud_cover=50):
+    """Returns Sentinel-1 VH and VV for an extent, flooded (below the thresholds) west of x = 1000."""
+    longitudes = np.arange(extent[0], extent[2], abs(resolution[1])) + abs(resolution[1]) / 2
+    latitudes = np.arange(extent[3], extent[1], -abs(resolution[0])) - abs(resolution[0]) / 2
+    times = pd.date_range(start_date, end_date, periods=3)
+    flooded = np.broadcast_to(longitudes < 1000, (len(times), len(latitudes), len(longitudes)))
+    return xr.Dataset({'VH': (('time', 'latitude', 'longitude'), np.where(flooded, -30., -10.)),
+                       'VV': (('time', 'latitude', 'longitude'), np.where(flooded, -20., -5.))},
+                      coords={'time': times, 'latitude': latitudes, 'longitude': longitudes})
+
+
+def run_group(theme, extent, sites, start_date, end_date, output_dir, resolution, max_cloud_cover):
+    """
+    Maps the merged extent of a group of sites with load_theme in a worker process, 
+    failing for extents east of x = 100000.
+    """
+    if extent[0] > 100000:
+        raise RuntimeError("no data")
+    theme_map = batch_monitoring._map_theme(theme, load_theme(theme, extent, start_date, end_date, resolution))
+    pixel_area_ha = abs(resolution[0] * resolution[1]) / 10000
+    return [batch_monitoring._summarise(theme, site_name, batch_monitoring._crop(theme_map, site_extent),
+                                        pixel_area_ha) for site_name, site_extent in sites]
+
+
+class TestBatchMonitoring(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self._load_theme = batch_monitoring._load_theme
+        batch_monitoring._load_theme = load_theme
+
+    def tearDown(self):
+        batch_monitoring._load_theme = self._load_theme
+        shutil.rmtree(self.directory)
+
+    def test_merge_extents(self):
+        extents = [(0, 0, 100, 100), (150, 0, 250, 100), (10000, 10000, 10100, 10100), (0, 180, 50, 250)]
+        groups = batch_monitoring.merge_extents(extents, max_gap=100)
+        self.assertTrue(groups == [((0, 0, 250, 250), [0, 1, 3]), ((10000, 10000, 10100, 10100), [2])])
+
+        groups = batch_monitoring.merge_extents(extents, max_gap=10)
+        self.assertTrue(len(groups) == 4)
+
+        # A chain of sites is not merged into an extent larger than max_area.
+        chain = [(index * 100, 0, index * 100 + 100, 100) for index in range(10)]
+        groups = batch_monitoring.merge_extents(chain, max_gap=0, max_area=300 * 100)
+        self.assertTrue(all((extent[2] - extent[0]) * (extent[3] - extent[1]) <= 300 * 100
+                            for extent, _ in groups))
+        self.assertTrue(sorted(index for _, indices in groups for index in indices) == list(range(10)))
+
+    def test_crop(self):
+        data = load_theme('flooding', (0, 0, 200, 100), '2020-01-01', '2020-01-03').VH
+        cropped = batch_monitoring._crop(data, (50, 20, 150, 60))
+        self.assertTrue(cropped.longitude.values.tolist() == [55, 65, 75, 85, 95, 105, 115, 125, 135, 145])
+        self.assertTrue(cropped.latitude.values.tolist() == [55, 45, 35, 25])
+
+        ascending = batch_monitoring._crop(data.sortby('latitude'), (50, 20, 150, 60))
+        self.assertTrue(ascending.latitude.values.tolist() == [25, 35, 45, 55])
+
+    def test_summarise(self):
+        site_map = xr.DataArray(np.array([[[1, np.nan], [1, 1]], [[np.nan, np.nan], [1, np.nan]]]),
+                                dims=('time', 'latitude', 'longitude'),
+                                coords={'time': pd.to_datetime(['2020-01-01', '2020-01-02'])})
+        area = batch_monitoring._summarise('flooding', 'wye', site_map, 0.01)['area']
+        self.assertTrue(area.columns.tolist() == ['site', 'time', 'area_ha'])
+        self.assertTrue(np.allclose(area.area_ha.values, [0.03, 0.01]))
+
+    @unittest.skipUnless(importlib.util.find_spec('ipywidgets'), "fires requires ipywidgets")
+    def test_summarise_fires(self):
+        site_map = xr.DataArray(np.array([[[1, np.nan]], [[1, 1]], [[np.nan, 1]]]),
+                                dims=('time', 'latitude', 'longitude'),
+                                coords={'time': pd.to_datetime(['2020-01-01', '2020-06-01', '2021-01-01'])})
+        max_extent = batch_monitoring._summarise('fires', 'Glanaman', site_map, 0.01)['max_burn_extent']
+        self.assertTrue(max_extent.year.tolist() == [2020, 2021])
+        self.assertTrue(np.allclose(max_extent.max_burnt_area_ha.values, [0.02, 0.01]))
+
+    def test_run_batch(self):
+        sites = ['wye', 'wye', (330000, 243000, 331000, 244000), (500, 0, 1500, 1000), (500, 0, 1500, 1000)]
+        summary = batch_monitoring.run_batch('flooding', sites, '2020-02-01', '2020-02-03', self.directory,
+                                             max_workers=1)
+
+        sites_table = pd.read_csv(os.path.join(self.directory, 'flooding_sites.csv'))
+        # Repeated sites and sites with the same extent are processed once.
+        self.assertTrue(sites_table.site.tolist() == ['wye', 'site_3', 'site_4'])
+        self.assertTrue((sites_table.status == 'done').all())
+        for site_name in sites_table.site:
+            self.assertTrue(os.path.exists(os.path.join(self.directory, 'flooding_{}.nc'.format(site_name))))
+
+        # Half of the 1 km2 site is flooded on each of the 3 dates.
+        site_4 = summary[summary.site == 'site_4']
+        self.assertTrue(len(site_4) == 3 and np.allclose(site_4.area_ha.values, 50))
+        self.assertTrue(pd.read_csv(os.path.join(self.directory, 'flooding_summary.csv')).shape == summary.shape)
+
+    def test_run_batch_failure(self):
+        def fail(*args, **kwargs):
+            raise RuntimeError("no data")
+        batch_monitoring._load_theme = fail
+
+        batch_monitoring.run_batch('flooding', ['wye'], '2020-02-01', '2020-02-03', self.directory, max_workers=1)
+        sites_table = pd.read_csv(os.path.join(self.directory, 'flooding_sites.csv'))
+        self.assertTrue(sites_table.status.tolist() == ['failed'])
+        self.assertTrue(sites_table.error.tolist() == ['RuntimeError: no data'])
+
+    def test_run_batch_spawn(self):
+        # Groups run in spawned processes, which do not inherit the load_theme stub of setUp.
+        _run_group = batch_monitoring._run_group
+        batch_monitoring._run_group = run_group
+        try:
+            sites = [(0, 0, 1000, 1000), (500, 0, 1500, 1000), (500, 0, 1500, 1000), (200000, 0, 201000, 1000),
+                     (50000, 0, 51000, 1000)]
+            summary = batch_monitoring.run_batch('flooding', sites, '2020-02-01', '2020-02-03', self.directory,
+                                                 max_gap=0, max_workers=2)
+        finally:
+            batch_monitoring._run_group = _run_group
+
+        sites_table = pd.read_csv(os.path.join(self.directory, 'flooding_sites.csv'))
+        self.assertTrue(sites_table.site.tolist() == ['site_1', 'site_2', 'site_4', 'site_5'])
+        self.assertTrue(sites_table.status.tolist() == ['done', 'done', 'failed', 'done'])
+        self.assertTrue(sites_table.error.fillna('').tolist() == ['', '', 'RuntimeError: no data', ''])
+        self.assertTrue(sorted(summary.site.unique()) == ['site_1', 'site_2', 'site_5'])
+        self.assertTrue(np.allclose(summary[summary.site == 'site_2'].area_ha.values, 50))
@@ -0,0 +1,64 @@
+import unittest
+
+import os
+import sys
+import importlib.util
+import numpy as np
+import pandas as pd
+import xarray as xr
+import dask.array as da
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'themes_utilities'))
+import change_detection
+import flooding
+if importlib.util.find_spec('ipywidgets'):
+    import fires
+
+
+def legacy_progression(series):
+    """flood_progression and burn_progression before they shared change_detection.progression."""
+    changes = series.isel(time=1).fillna(0)*2 - series.isel(time=0).fillna(0)
+    changes = changes.assign_coords(time=series.time[1].values).expand_dims('time')
+    for time in range(2, series.time.size):
+        diff_maps = series.isel(time=time).fillna(0)*2 - series.isel(time=time-1).fillna(0)
+        diff_maps = diff_maps.assign_coords(time=series.time[time].values).expand_dims('time')
+        changes = xr.concat([changes, diff_maps], 'time')
+    return changes.where(changes != 0)
+
+
+class TestChangeDetection(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        # Binary maps (1 or NaN) with latitude before time
+        maps = np.where(rng.random((4, 6, 5)) < 0.4, 1., np.nan)
+        self.series = xr.DataArray(maps, dims=('latitude', 'time', 'longitude'),
+                                   coords={'latitude': np.arange(4) * 10., 'longitude': np.arange(5) * 10.,
+                                           'time': pd.date_range('2020-01-01', periods=6)})
+
+    def test_transition_codes(self):
+        codes = change_detection.transition_codes(self.series)
+        self.assertTrue(codes.dims == ('time', 'latitude', 'longitude') and codes.dtype == np.int8)
+        self.assertTrue(codes.time.equals(self.series.time[1:]))
+        self.assertTrue(set(np.unique(codes.values)) == {change_detection.NEW, change_detection.PERSISTED,
+                                                         change_detection.RECEDED, change_detection.UNCHANGED})
+        expected = legacy_progression(self.series.transpose('time', ...)).fillna(0)
+        self.assertTrue(np.array_equal(codes.values, expected.values))
+
+        # Zeros are absent as NaN, and dask arrays stay lazy.
+        maps = self.series.transpose('time', ...).fillna(0).values
+        self.assertTrue(np.array_equal(change_detection.transition_codes(maps), codes.values))
+        lazy = change_detection.transition_codes(da.from_array(maps, chunks=(2, 2, 5)))
+        self.assertTrue(isinstance(lazy, da.Array) and np.array_equal(lazy.compute(), codes.values))
+        self.assertTrue(change_detection.transition_codes(maps[:1]).shape == (0, 4, 5))
+
+    def test_flood_progression(self):
+        expected = legacy_progression(self.series.transpose('time', ...))
+        progression = flooding.flood_progression(self.series)
+        self.assertTrue(progression.equals(expected))
+
+    @unittest.skipUnless(importlib.util.find_spec('ipywidgets'), "fires requires ipywidgets")
+    def test_burn_progression(self):
+        expected = legacy_progression(self.series.transpose('time', ...))
+        progression = fires.burn_progression(self.series)
+        self.assertTrue(progression.equals(expected))
@@ -0,0 +1,62 @@
+import unittest
+
+import os
+import sys
+import importlib.util
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'themes_utilities'))
+if importlib.util.find_spec('ipywidgets'):
+    import fires
+
+
+@unittest.skipUnless(importlib.util.find_spec('ipywidgets'), "fires requires ipywidgets")
+class TestFires(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        times = pd.to_datetime(['2020-03-01', '2020-04-15', '2020-08-01', '2021-05-01', '2022-02-01'])
+        burn = np.where(rng.random((len(times), 6, 7)) < 0.3, 1., np.nan)
+        self.burn = xr.DataArray(burn, dims=('time', 'latitude', 'longitude'), coords={'time': times})
+        # Reported, unreported (90, 150) and missing (NaN) habitats
+        classes = rng.choice([3., 4., 90., 150., 159., 202., np.nan], size=(6, 7))
+        self.habitat_map = xr.Dataset({'detailed': (('latitude', 'longitude'), classes)})
+
+    def test_report_burnt_habitats_table(self):
+        table = fires.report_burnt_habitats_table(self.burn, self.habitat_map, pixel_area_ha=0.01)
+        legacy = fires.report_burnt_habitats(self.burn, self.habitat_map)
+
+        self.assertTrue(table.index.tolist() == [int(year) for year in legacy])
+        for year, habitats in legacy.items():
+            self.assertTrue(table.columns.tolist() == list(habitats))
+            self.assertTrue(np.allclose(table.loc[int(year)].values, [float(area) for area in habitats.values()]))
+
+        # A year without burnt areas has a row of zeros
+        unburnt = self.burn.where(self.burn.time.dt.year < 2022)
+        table = fires.report_burnt_habitats_table(unburnt, self.habitat_map, pixel_area_ha=0.01)
+        self.assertTrue(table.index.tolist() == [2020, 2021, 2022] and (table.loc[2022] == 0).all())
+
+    def test_report_burnt_habitats_table_pixel_area(self):
+        # Without geobox, the pixel area is required
+        with self.assertRaises(ValueError):
+            fires.report_burnt_habitats_table(self.burn, self.habitat_map)
+
+        def loaded(projected):
+            return SimpleNamespace(geobox=SimpleNamespace(crs=SimpleNamespace(projected=projected),
+                                                          affine=SimpleNamespace(a=20., e=-20.)))
+        self.assertTrue(fires._pixel_area_ha(loaded(projected=True)) == 0.04)
+        with self.assertRaises(ValueError):
+            fires._pixel_area_ha(loaded(projected=False))
+
+    def test_report_max_burn_extent_table(self):
+        times = pd.to_datetime(['2019-06-01', '2019-07-01', '2019-08-01', '2020-01-01', '2020-06-01', '2021-03-01'])
+        burnt_area_ha = xr.DataArray([1.5, 12., 12., np.nan, 3.25, 0.], dims='time', coords={'time': times})
+        table = fires.report_max_burn_extent_table(burnt_area_ha)
+        legacy = fires.report_max_burn_extent(burnt_area_ha)
+
+        self.assertTrue(["{}: {} ha burnt by the {}".format(year, row.max_burnt_area_ha, row.date.date())
+                         for year, row in table.iterrows()] == legacy)
+        self.assertTrue(table.equals(fires.report_max_burn_extent_table(burnt_area_ha.to_series())))
@@ -0,0 +1,82 @@
+import unittest
+
+import os
+import sys
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'themes_utilities'))
+import flooding
+
+
+def s1_scenes(seed=0):
+    """Returns Sentinel-1 VH and VV scenes (dB) of a site flooded on some pixels, with missing values."""
+    rng = np.random.default_rng(seed)
+    times = pd.date_range('2020-01-01', periods=9, freq='6D')
+    shape = (len(times), 5, 7)
+    flooded = rng.random(shape) < np.linspace(0.1, 0.7, 7)
+    VH = np.where(flooded, rng.uniform(-30, -25, shape), rng.uniform(-20, -10, shape))
+    VV = np.where(flooded, rng.uniform(-22, -15, shape), rng.uniform(-12, -5, shape))
+    VH[rng.random(shape) < 0.1] = np.nan
+    VV[rng.random(shape) < 0.1] = np.nan
+    return xr.Dataset({'VH': (('time', 'latitude', 'longitude'), VH), 'VV': (('time', 'latitude', 'longitude'), VV)},
+                      coords={'time': times, 'latitude': np.arange(5)[::-1] * 10. + 5,
+                              'longitude': np.arange(7) * 10. + 5})
+
+
+class TestFloodMonitoringState(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.ds = s1_scenes()
+        self.full = flooding.FloodMonitoringState(site='wye')
+        self.full.update(self.ds)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_update(self):
+        state = flooding.FloodMonitoringState(site='wye')
+        self.assertTrue(state.update(self.ds.isel(time=slice(0, 0))) is None)
+        state.update(self.ds.isel(time=slice(0, 4)))
+        # Scenes already in the state are skipped.
+        progression = state.update(self.ds.isel(time=slice(2, 9)))
+        self.assertTrue(state.update(self.ds.isel(time=slice(5, 9))) is None)
+
+        self.assertTrue(state.state.identical(self.full.state))
+        self.assertTrue(state.last_time == self.ds.time.values[-1])
+        self.assertTrue(state.frequency().identical(self.full.frequency()))
+        self.assertTrue(state.frequency(per_observation=True).identical(self.full.frequency(per_observation=True)))
+
+        # Frequency and flood maps of the full series
+        flood_series = flooding.flood_mapping(self.ds)
+        expected = flooding.flood_frequency(flood_series, '2020-01-01', '2020-12-31')
+        self.assertTrue(np.allclose(state.frequency().values, expected.values, equal_nan=True))
+        self.assertTrue(state.last_flood_map().equals(flood_series.isel(time=-1, drop=True)))
+
+        # The progression of the new scenes continues from the last flood map of the state.
+        expected = flooding.flood_progression(flood_series).isel(time=slice(3, None))
+        self.assertTrue(np.array_equal(progression.values, expected.values, equal_nan=True))
+        self.assertTrue(progression.time.equals(expected.time))
+
+        with self.assertRaises(ValueError):
+            state.update(s1_scenes().assign_coords(time=self.ds.time + np.timedelta64(60, 'D'),
+                                                   longitude=self.ds.longitude + 5))
+
+    def test_save_load(self):
+        state = flooding.FloodMonitoringState(site='wye')
+        state.update(self.ds.isel(time=slice(0, 4)))
+        for name in ['state.nc', 'state.zarr']:
+            path = os.path.join(self.directory, name)
+            state.save(path)
+            loaded = flooding.FloodMonitoringState.load(path)
+            self.assertTrue(loaded.site == 'wye')
+            self.assertTrue(loaded.state.identical(state.state))
+
+            # A loaded state is updated as the state it was saved from.
+            loaded.update(self.ds)
+            self.assertTrue(loaded.frequency().identical(self.full.frequency()))
+            self.assertTrue(loaded.state.identical(self.full.state))
@@ -0,0 +1,196 @@
+import unittest
+
+import io
+import os
+import sys
+import math
+import contextlib
+import warnings
+import numpy as np
+import pandas as pd
+import xarray as xr
+import scipy.ndimage as ndimage
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'themes_utilities'))
+import forest
+
+
+def s1_series(start_date, end_date, missing_months=(), seed=0):
+    """
+    Returns Sentinel-1 VH (dB) observations about every 6 days, forested (high VH) in the west and 
+    with some missing values, without observations in missing_months (e.g. '2020-07').
+    """
+    rng = np.random.default_rng(seed)
+    times = pd.date_range(start_date, end_date, freq='6D')
+    times = times + pd.to_timedelta(rng.integers(0, 24, len(times)), unit='h')
+    times = times[~times.strftime('%Y-%m').isin(missing_months)]
+    longitudes = np.arange(8) * 10. + 5
+    latitudes = np.arange(6)[::-1] * 10. + 5
+    VH = rng.normal(np.linspace(-10, -20, len(longitudes)), 3, (len(times), len(latitudes), len(longitudes)))
+    VH[rng.random(VH.shape) < 0.1] = np.nan
+    return xr.Dataset({'VH': (('time', 'latitude', 'longitude'), VH.astype(np.float32))},
+                      coords={'time': times, 'latitude': latitudes, 'longitude': longitudes})
+
+
+def woody_series(seed=0):
+    """
+    Returns binary forest maps (1 or NaN) of 5 years, where forest is felled by patches 
+    (clearfells), lost on single pixels (removed by the opening) and regrows.
+    """
+    rng = np.random.default_rng(seed)
+    woody = np.ones((5, 30, 40))
+    woody[:, 20:, :10] = np.nan
+    for year in range(1, 5):
+        woody[year] = woody[year - 1]
+        for _ in range(3):
+            row, col, height, width = rng.integers(0, 27), rng.integers(0, 37), rng.integers(2, 6), rng.integers(2, 6)
+            woody[year, row:row + height, col:col + width] = np.nan
+        woody[year][rng.random((30, 40)) < 0.02] = np.nan
+        woody[year][rng.random((30, 40)) < 0.05] = 1
+    return xr.DataArray(woody, dims=('year', 'latitude', 'longitude'),
+                        coords={'year': [str(year) for year in range(2018, 2023)],
+                                'latitude': np.arange(30)[::-1] * 10. + 5, 'longitude': np.arange(40) * 10. + 5})
+
+
+def legacy_clearfell_reporting(site, clearfell_date):
+    """clearfell_reporting before it counted pixels with np.bincount."""
+    year_stats = np.unique(clearfell_date.fillna(0), return_counts=True)
+    stats_summary = "For the " + site.upper() + " forest site, we report : "
+    print(stats_summary)
+    for year_index in range(len(year_stats[0])):
+        year = year_stats[0][year_index]
+        if (year > 1900):
+            px = year_stats[1][year_index]
+            area_ha = (px * 100) / 10000
+            print(str(math.floor(area_ha)) + " hectares of clearfelling during " + str(int(year)))
+
+
+def quietly(function, *args, **kwargs):
+    """Calls a function without its progress messages and warnings."""
+    with open(os.devnull, 'w') as devnull, warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            return function(*args, **kwargs)
+        finally:
+            sys.stdout = stdout
+
+
+class TestForest(unittest.TestCase):
+
+    def setUp(self):
+        # Starting mid-year, with a month without observations
+        self.ds = s1_series('2019-03-10', '2021-11-20', missing_months=['2020-07'])
+
+    def test_group_data_by_year_month(self):
+        cube = forest.group_data_by_year_month(self.ds)
+        legacy = quietly(forest.group_data_by, self.ds)
+
+        self.assertTrue(cube.VH.dims == ('year', 'month', 'latitude', 'longitude'))
+        self.assertTrue(cube.year.values.tolist() == [2019, 2020, 2021])
+        self.assertTrue(cube.month.values.tolist() == list(range(1, 13)))
+        for year in [2019, 2020, 2021]:
+            expected = legacy['VH_{}'.format(year)].transpose('month', 'latitude', 'longitude')
+            self.assertTrue(np.allclose(cube.VH.sel(year=year, month=expected.month).values, expected.values,
+                                        equal_nan=True))
+        # Months without observations
+        self.assertTrue(cube.VH.sel(year=2020, month=7).isnull().all())
+        self.assertTrue(cube.VH.sel(year=2019, month=[1, 2]).isnull().all())
+
+        # DataArray and dask inputs
+        self.assertTrue(forest.group_data_by_year_month(self.ds.VH).identical(cube.VH))
+        lazy = forest.group_data_by_year_month(self.ds.chunk({'time': 20}))
+        self.assertTrue(lazy.VH.chunks is not None)
+        self.assertTrue(np.allclose(lazy.VH.transpose(*cube.VH.dims).values, cube.VH.values, equal_nan=True))
+
+    def test_forest_mapping_vectorized(self):
+        legacy = quietly(forest.forest_mapping, quietly(forest.group_data_by, self.ds))
+        self.assertTrue(legacy.notnull().any() and legacy.isnull().any())
+        # Time series, cubes from group_data_by_year_month and datasets from group_data_by
+        for S1_data in [self.ds, forest.group_data_by_year_month(self.ds), quietly(forest.group_data_by, self.ds)]:
+            woody = quietly(forest.forest_mapping_vectorized, S1_data)
+            self.assertTrue(woody.year.values.tolist() == legacy.year.values.tolist())
+            self.assertTrue(np.array_equal(woody.transpose(*legacy.dims).values, legacy.values, equal_nan=True))
+
+        # Without aligning months, the months of later years before the start of the series are counted.
+        woody = quietly(forest.forest_mapping_vectorized, self.ds, align_months=False)
+        woody_months = (forest.group_data_by_year_month(self.ds).VH > -15.).sum('month')
+        self.assertTrue(np.array_equal(woody.values, np.where(woody_months.values > 8, 1., np.nan), equal_nan=True))
+        self.assertTrue(np.array_equal(woody.sel(year='2019').values, legacy.sel(year='2019').values,
+                                       equal_nan=True))
+        self.assertFalse(np.array_equal(woody.values, legacy.values, equal_nan=True))
+
+        lazy = quietly(forest.forest_mapping_vectorized, self.ds.chunk({'time': 20}))
+        self.assertTrue(lazy.chunks is not None)
+        self.assertTrue(np.array_equal(lazy.values, legacy.values, equal_nan=True))
+
+    def test_clearfells_monitoring_vectorized(self):
+        woody = woody_series()
+        legacy = quietly(forest.clearfells_monitoring, woody)
+        self.assertTrue(legacy.notnull().any())
+
+        clear_cuts = quietly(forest.clearfells_monitoring_vectorized, woody)
+        self.assertTrue(clear_cuts.year.values.tolist() == legacy.year.values.tolist())
+        self.assertTrue(np.array_equal(clear_cuts.values, legacy.values, equal_nan=True))
+
+        # Without flipping, clearfells keep the coordinates of woody.
+        clear_cuts = quietly(forest.clearfells_monitoring_vectorized, woody, flipud=False)
+        self.assertTrue(np.array_equal(clear_cuts.values, legacy.values[:, ::-1], equal_nan=True))
+        self.assertTrue(clear_cuts.latitude.equals(woody.latitude))
+
+        # Dask inputs are opened by spatial chunks with a halo, as a whole array.
+        lazy = quietly(forest.clearfells_monitoring_vectorized, woody.chunk({'latitude': 7, 'longitude': 9}))
+        self.assertTrue(lazy.chunks is not None)
+        self.assertTrue(np.array_equal(lazy.values, legacy.values, equal_nan=True))
+
+    def test_mapping_clearfelling_dates_vectorized(self):
+        clear_cuts = quietly(forest.clearfells_monitoring_vectorized, woody_series(), flipud=False)
+        legacy = forest.mapping_clearfelling_dates(clear_cuts)
+
+        dates = forest.mapping_clearfelling_dates_vectorized(clear_cuts)
+        self.assertTrue(dates.dtype == np.uint16 and dates.attrs['nodata'] == 0)
+        self.assertTrue(dates.latitude.equals(clear_cuts.latitude))
+        # mapping_clearfelling_dates labels the first year 2018 and pixels never clearfelled NaN.
+        expected = legacy.where(legacy != 2018, int(clear_cuts.year.values[0])).fillna(0)
+        self.assertTrue(np.array_equal(dates.values, expected.values))
+        self.assertTrue(len(np.unique(dates.values)) > 2)
+
+    def test_clearfell_events(self):
+        clear_cuts = quietly(forest.clearfells_monitoring_vectorized, woody_series(), flipud=False)
+        dates = forest.mapping_clearfelling_dates_vectorized(clear_cuts)
+        events = forest.clearfell_events(dates, pixel_area_ha=0.04)
+        self.assertTrue(events.columns.tolist() == ['event', 'year', 'pixels', 'area_ha',
+                                                    'centroid_latitude', 'centroid_longitude'])
+
+        # Events labelled year by year
+        expected = []
+        for year in np.unique(dates.values[dates.values > 0]):
+            labels, n_events = ndimage.label(dates.values == year)
+            for label in range(1, n_events + 1):
+                rows, cols = np.nonzero(labels == label)
+                expected.append((year, len(rows), dates.latitude.values[rows].mean(),
+                                 dates.longitude.values[cols].mean()))
+        self.assertTrue(len(events) == len(expected) > 0)
+        self.assertTrue(events.event.is_unique and (events.year.diff().dropna() >= 0).all())
+        events = events.sort_values(['year', 'pixels', 'centroid_latitude', 'centroid_longitude'])
+        expected = np.array(sorted(expected))
+        self.assertTrue(np.array_equal(events.year.values, expected[:, 0]))
+        self.assertTrue(np.array_equal(events.pixels.values, expected[:, 1]))
+        self.assertTrue(np.allclose(events.area_ha.values, expected[:, 1] * 0.04))
+        self.assertTrue(np.allclose(events[['centroid_latitude', 'centroid_longitude']].values, expected[:, 2:]))
+
+        # Date maps with NaN for pixels never clearfelled give the same events
+        float_events = forest.clearfell_events(dates.where(dates > 0).astype(np.float64), pixel_area_ha=0.04)
+        self.assertTrue(float_events.equals(forest.clearfell_events(dates, pixel_area_ha=0.04)))
+
+    def test_clearfell_reporting(self):
+        clear_cuts = quietly(forest.clearfells_monitoring, woody_series())
+        for dates in [forest.mapping_clearfelling_dates(clear_cuts),
+                      forest.mapping_clearfelling_dates_vectorized(clear_cuts)]:
+            report, expected = io.StringIO(), io.StringIO()
+            with contextlib.redirect_stdout(report):
+                forest.clearfell_reporting('Clocaenog', dates)
+            with contextlib.redirect_stdout(expected):
+                legacy_clearfell_reporting('Clocaenog', dates)
+            self.assertTrue(report.getvalue() == expected.getvalue())
+            self.assertTrue(report.getvalue().count('hectares') > 1)
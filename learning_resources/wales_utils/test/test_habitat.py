@@ -0,0 +1,91 @@
+import unittest
+from unittest import mock
+
+import os
+import sys
+import shutil
+import tempfile
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'themes_utilities'))
+import habitat
+
+
+def geometry(min_x, min_y, size=100, crs='EPSG:27700'):
+    """Returns a stub of a datacube geometry with its bounding box and CRS."""
+    return SimpleNamespace(boundingbox=(min_x, min_y, min_x + size, min_y + size), crs=crs)
+
+
+def load(product, geopolygon, time, output_crs, resolution):
+    """Returns a stub of dc.load() of a habitat map, without data for extents west of x = 0."""
+    min_x, min_y, max_x, max_y = geopolygon.boundingbox
+    x = np.arange(min_x, max_x, abs(resolution[1])) + abs(resolution[1]) / 2
+    y = np.arange(max_y, min_y, -abs(resolution[0])) - abs(resolution[0]) / 2
+    classes = np.resize(np.array([3., 90., 202., 0.]), (1, len(y), len(x)))
+    if min_x < 0:
+        classes[:] = np.nan
+    return xr.Dataset({'detailed': (('time', 'y', 'x'), classes)},
+                      coords={'time': pd.to_datetime([time[0]]), 'y': y, 'x': x})
+
+
+class TestHabitatCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self._datacube = habitat._datacube
+        habitat._datacube = mock.MagicMock()
+        habitat._datacube.load.side_effect = load
+        habitat._habitat_cache = None
+
+    def tearDown(self):
+        habitat._datacube = self._datacube
+        habitat._habitat_cache = None
+        shutil.rmtree(self.directory)
+
+    def test_load_habitat_map_cached(self):
+        habitat_map = habitat.load_habitat_map_cached('2021-06-01', geometry(0, 0))
+        self.assertTrue(habitat_map.detailed.dims == ('latitude', 'longitude'))
+        self.assertTrue(habitat_map.detailed.dtype == np.uint8 and habitat_map.detailed.attrs['nodata'] == 0)
+        self.assertTrue(habitat.class_lookup(habitat_map.detailed)[202] == habitat.habitat_dict[202])
+        self.assertTrue(set(np.unique(habitat_map.detailed.values)) == {0, 3, 90, 202})
+
+        # Cache hit, for another date of the same year
+        self.assertTrue(habitat.load_habitat_map_cached('2021-12-31', geometry(0, 0)) is habitat_map)
+        self.assertTrue(habitat._datacube.load.call_count == 1)
+
+        # The CRS of the geometry is part of the key.
+        self.assertTrue(habitat.load_habitat_map_cached('2021-06-01', geometry(0, 0, crs='EPSG:4326'))
+                        is not habitat_map)
+        self.assertTrue(habitat._datacube.load.call_count == 2)
+
+    def test_load_habitat_map_cached_eviction(self):
+        first = habitat.load_habitat_map_cached('2021-06-01', geometry(0, 0))
+        for index in range(1, habitat.HABITAT_CACHE_SIZE):
+            habitat.load_habitat_map_cached('2021-06-01', geometry(index * 100, 0))
+        self.assertTrue(habitat.load_habitat_map_cached('2021-06-01', geometry(0, 0)) is first)
+        self.assertTrue(habitat._datacube.load.call_count == habitat.HABITAT_CACHE_SIZE)
+
+        # The least recently used map is evicted (the second one, as the first was used again).
+        habitat.load_habitat_map_cached('2021-06-01', geometry(10000, 0))
+        self.assertTrue(len(habitat._habitat_cache) == habitat.HABITAT_CACHE_SIZE)
+        self.assertTrue(habitat.load_habitat_map_cached('2021-06-01', geometry(0, 0)) is first)
+        habitat.load_habitat_map_cached('2021-06-01', geometry(100, 0))
+        self.assertTrue(habitat._datacube.load.call_count == habitat.HABITAT_CACHE_SIZE + 2)
+
+    def test_load_habitat_map_cached_no_data(self):
+        habitat_map = habitat.load_habitat_map_cached('2021-06-01', geometry(-500, 0))
+        self.assertTrue(habitat_map.detailed.dtype == np.uint8 and (habitat_map.detailed == 0).all())
+
+    def test_load_habitat_map_cached_directory(self):
+        habitat_map = habitat.load_habitat_map_cached('2021-06-01', geometry(0, 0), cache_dir=self.directory)
+        self.assertTrue(len(os.listdir(self.directory)) == 1)
+
+        # Maps are read back from the directory once evicted from memory.
+        habitat._habitat_cache = None
+        cached = habitat.load_habitat_map_cached('2021-06-01', geometry(0, 0), cache_dir=self.directory)
+        self.assertTrue(habitat._datacube.load.call_count == 1)
+        self.assertTrue(cached.detailed.equals(habitat_map.detailed))
+        self.assertTrue(habitat.class_lookup(cached.detailed) == habitat.class_lookup(habitat_map.detailed))
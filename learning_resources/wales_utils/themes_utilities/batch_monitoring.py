@@ -0,0 +1,303 @@
+'''
+Description: This file contains a set of python functions for running the themes
+(flooding, fires, forest) over many sites in a single job, writing per-site maps
+and summary tables to a local directory.
+'''
+import os
+import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+THEMES = ['flooding', 'fires', 'forest']
+
+
+def resolve_site(theme, site):
+    """
+    Takes a site and returns its name and extent (min_x, min_y, max_x, max_y) with EPSG:27700.
+    Last modified: October 2026
+
+    Parameters
+    ----------
+    theme : str of the theme ('flooding', 'fires' or 'forest')
+    site : site index of the theme (e.g. 1 or 'wye' for flooding, 'Glanaman' for fires),
+           tuple with (min_x, min_y, max_x, max_y) in EPSG: 27700
+           or datacube.utils.geometry.Geometry
+    """
+    if theme == 'flooding':
+        from flooding import select_flooded_site
+        resolve = select_flooded_site
+    elif theme == 'fires':
+        from fires import get_site_extent
+        resolve = get_site_extent
+    elif theme == 'forest':
+        from forest import select_forest_site
+        resolve = select_forest_site
+    else:
+        raise ValueError("The theme \"{}\" is not supported. "
+                         "Please choose one of {}.".format(theme, THEMES))
+
+    if isinstance(site, (int, str)):
+        extent = resolve(site)
+        if theme == 'fires':
+            # fires sites are in EPSG:4326
+            from wdc_datahandling import geom_fromextent
+            extent = tuple(geom_fromextent(extent).to_crs('epsg:27700').boundingbox)
+        return str(site), tuple(float(bound) for bound in extent)
+    if hasattr(site, 'to_crs'):
+        return None, tuple(float(bound) for bound in site.to_crs('epsg:27700').boundingbox)
+    return None, tuple(float(bound) for bound in site)
+
+
+def merge_extents(extents, max_gap=1000, max_area=4e8):
+    """
+    Takes site extents and groups the sites whose extents overlap or are closer than max_gap,
+    so that each group is loaded from the datacube once. Groups are only merged while their 
+    merged extent is not larger than max_area, so that a chain of sites does not grow into 
+    one huge extent.
+    Last modified: October 2026
+
+    Parameters
+    ----------
+    extents : list of tuples with (min_x, min_y, max_x, max_y) in EPSG: 27700
+    max_gap : float of the maximum distance (m) between merged extents
+    max_area : float of the maximum area (m2) of a merged extent (400 km2 by default)
+
+    Returns
+    -------
+    list of tuples with the merged extent and the indices of its sites in extents
+    """
+    groups = [(tuple(extent), [index]) for index, extent in enumerate(extents)]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(groups)):
+            for j in range(i + 1, len(groups)):
+                a, b = groups[i][0], groups[j][0]
+                extent = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                if (a[0] - max_gap <= b[2] and b[0] - max_gap <= a[2] and
+                    a[1] - max_gap <= b[3] and b[1] - max_gap <= a[3] and
+                    (extent[2] - extent[0]) * (extent[3] - extent[1]) <= max_area):
+                    groups[i] = (extent, groups[i][1] + groups[j][1])
+                    del groups[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return [(extent, sorted(indices)) for extent, indices in groups]
+
+
+def _load_theme(theme, extent, start_date, end_date, resolution=(-10,10), max_cloud_cover=50):
+    """
+    Loads the dataset of a theme for an extent with EPSG:27700, as in the case studies notebooks.
+    """
+    from habitat import get_datacube
+
+    dc = get_datacube()
+    query = {'x': (extent[0], extent[2]),
+             'y': (extent[1], extent[3]),
+             'crs': 'epsg:27700',
+             'time': (start_date, end_date),
+             'output_crs': 'epsg:27700',
+             'resolution': resolution}
+
+    if theme == 'fires':
+        from wdc_datahandling import cleaning_s2, cloud_coverage
+        dataset_in = dc.load(product='sen2_l2a_gcp', measurements=['nir', 'swir2', 'scl'], **query)
+        dataset_in = dataset_in.rename({'x': 'longitude', 'y': 'latitude'})
+        dataset_clean = cleaning_s2(dataset_in)
+        cloud_mask = cloud_coverage(dataset_clean) <= max_cloud_cover
+        return dataset_clean.where(cloud_mask.compute(), drop=True)
+
+    measurements = ['VH', 'VV'] if theme == 'flooding' else ['VH']
+    dataset_in = dc.load(product='sen1_rtc_pyroSNAP', measurements=measurements, **query)
+    dataset_in = dataset_in.where(dataset_in != 0)
+    dataset_in = dataset_in.dropna('time', how='all')
+    dataset_in = dataset_in.rename({'x': 'longitude', 'y': 'latitude'})
+    if theme == 'flooding':
+        # daily means of the scenes
+        dataset_in = dataset_in.groupby(dataset_in.time.dt.floor('D')).mean('time')
+    return dataset_in
+
+
+def _map_theme(theme, dataset):
+    """
+    Runs the mapping of a theme on its dataset and returns binary maps.
+    """
+    if theme == 'flooding':
+        from flooding import flood_mapping
+        return flood_mapping(dataset).rename('flood')
+    if theme == 'fires':
+        from fires import burn_mapping
+        return burn_mapping(dataset, normalise=False).rename('burn')
+    from forest import forest_mapping_vectorized
+    return forest_mapping_vectorized(dataset).rename('forest')
+
+
+def _crop(data_array, extent):
+    """
+    Crops a map with dims ('latitude', 'longitude') to an extent with EPSG:27700.
+    """
+    latitude = data_array.latitude.values
+    lat_slice = slice(extent[3], extent[1]) if len(latitude) > 1 and latitude[0] > latitude[-1] else slice(extent[1], extent[3])
+    return data_array.sel(latitude=lat_slice, longitude=slice(extent[0], extent[2]))
+
+
+def _summarise(theme, site_name, site_map, pixel_area_ha):
+    """
+    Returns the summary tables of the map of a site: mapped area (ha) for each date (or year),
+    and for fires the maximum burnt area of each year.
+    """
+    dim = 'year' if theme == 'forest' else 'time'
+    area_ha = (site_map > 0).sum(['latitude', 'longitude']).to_series().astype(np.float64) * pixel_area_ha
+    area = pd.DataFrame({'site': site_name, dim: area_ha.index, 'area_ha': area_ha.values})
+
+    if theme != 'fires':
+        return {'area': area}
+    from fires import report_max_burn_extent_table
+    max_extent = report_max_burn_extent_table(area_ha).reset_index()
+    max_extent.insert(0, 'site', site_name)
+    return {'area': area, 'max_burn_extent': max_extent}
+
+
+def _file_name(site_name):
+    """
+    Returns a file name for a site name.
+    """
+    return re.sub(r'[^A-Za-z0-9_-]+', '_', site_name).strip('_')
+
+
+def _unique_sites(resolved):
+    """
+    Returns the sites with unique extents and names (and file names): sites with the extent of 
+    a previous site (e.g. repeated, or given once by name and once by extent) are dropped and 
+    other sites sharing a name get a suffix.
+    """
+    unique, seen, file_names = [], {}, set()
+    for site_name, extent in resolved:
+        if extent in seen:
+            print("Site {} has the extent of site {}, processed once.".format(site_name, seen[extent]))
+            continue
+        name, suffix = site_name, 1
+        while _file_name(name) in file_names:
+            suffix += 1
+            name = '{}_{}'.format(site_name, suffix)
+        seen[extent] = name
+        file_names.add(_file_name(name))
+        unique.append((name, extent))
+    return unique
+
+
+def _run_group(theme, extent, sites, start_date, end_date, output_dir, resolution, max_cloud_cover):
+    """
+    Loads and maps the merged extent of a group of sites, then writes the map of each site
+    and returns their summary tables.
+    """
+    dataset = _load_theme(theme, extent, start_date, end_date,
+                          resolution=resolution, max_cloud_cover=max_cloud_cover)
+    theme_map = _map_theme(theme, dataset).compute()
+    pixel_area_ha = abs(resolution[0] * resolution[1]) / 10000
+
+    summaries = []
+    for site_name, site_extent in sites:
+        site_map = _crop(theme_map, site_extent)
+        site_map.to_dataset().to_netcdf(os.path.join(output_dir, '{}_{}.nc'.format(theme, _file_name(site_name))))
+        summaries.append(_summarise(theme, site_name, site_map, pixel_area_ha))
+    return summaries
+
+
+def run_batch(theme, sites, start_date, end_date, output_dir, max_gap=1000, max_area=4e8, max_workers=None,
+              resolution=(-10,10), max_cloud_cover=50):
+    """
+    Takes a list of sites and runs a theme pipeline (flood_mapping, burn_mapping or forest_mapping)
+    for each of them in a single job. Sites closer than max_gap are merged and loaded once, and
+    merged extents are processed on a pool of (spawned) processes. Writes the map of each site
+    (<theme>_<site>.nc), the summary tables (<theme>_summary.csv, and <theme>_max_burn_extent.csv
+    for fires) and the list of sites with their status and errors (<theme>_sites.csv) to output_dir.
+    Sites with the same extent are processed once and other sites sharing a name get a suffix (e.g. wye_2).
+    Last modified: October 2026
+
+    Parameters
+    ----------
+    theme : str of the theme ('flooding', 'fires' or 'forest')
+    sites : list of site indices, tuples with (min_x, min_y, max_x, max_y) in EPSG: 27700
+            or datacube.utils.geometry.Geometry (see resolve_site)
+    start_date : str with format 'YYYY-MM-DD'
+    end_date : str with format 'YYYY-MM-DD'
+    output_dir : str of the local directory of the results
+    max_gap : float of the maximum distance (m) between extents loaded together
+    max_area : float of the maximum area (m2) of extents loaded together
+    max_workers : int of the number of processes (1 runs in the calling process),
+                  by default the number of CPUs
+    resolution : tuple of the resolution (in epsg:27700)
+    max_cloud_cover : float of the maximum cloud cover (%) of the Sentinel-2 scenes kept (fires)
+
+    Returns
+    -------
+    pandas.DataFrame of the mapped area (ha) of each site and date (or year)
+    """
+    if theme not in THEMES:
+        raise ValueError("The theme \"{}\" is not supported. "
+                         "Please choose one of {}.".format(theme, THEMES))
+    os.makedirs(output_dir, exist_ok=True)
+
+    resolved = []
+    for index, site in enumerate(sites):
+        site_name, extent = resolve_site(theme, site)
+        resolved.append(('site_{}'.format(index + 1) if site_name is None else site_name, extent))
+    resolved = _unique_sites(resolved)
+    groups = merge_extents([extent for _, extent in resolved], max_gap=max_gap, max_area=max_area)
+    print("{} sites merged into {} extents".format(len(resolved), len(groups)))
+
+    sites_table = pd.DataFrame({'site': [site_name for site_name, _ in resolved],
+                                'min_x': [extent[0] for _, extent in resolved],
+                                'min_y': [extent[1] for _, extent in resolved],
+                                'max_x': [extent[2] for _, extent in resolved],
+                                'max_y': [extent[3] for _, extent in resolved],
+                                'extent': 0,
+                                'status': 'failed',
+                                'error': ''})
+    summaries = []
+
+    def finish(group_index, result):
+        summaries.extend(result)
+        sites_table.loc[groups[group_index][1], 'status'] = 'done'
+
+    def fail(group_index, error):
+        print("Extent {} failed: {}".format(group_index + 1, error))
+        sites_table.loc[groups[group_index][1], 'error'] = '{}: {}'.format(type(error).__name__, error)
+
+    def arguments(group_index):
+        extent, indices = groups[group_index]
+        sites_table.loc[indices, 'extent'] = group_index + 1
+        return (theme, extent, [resolved[index] for index in indices], start_date, end_date,
+                output_dir, resolution, max_cloud_cover)
+
+    if max_workers == 1:
+        for group_index in range(len(groups)):
+            try:
+                finish(group_index, _run_group(*arguments(group_index)))
+            except Exception as error:
+                fail(group_index, error)
+    else:
+        # Spawned workers open their own Datacube connection instead of inheriting the parent's one
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = {executor.submit(_run_group, *arguments(group_index)): group_index
+                       for group_index in range(len(groups))}
+            for future in as_completed(futures):
+                try:
+                    finish(futures[future], future.result())
+                except Exception as error:
+                    fail(futures[future], error)
+
+    sites_table.to_csv(os.path.join(output_dir, '{}_sites.csv'.format(theme)), index=False)
+    summary = pd.concat([site_summary['area'] for site_summary in summaries], ignore_index=True) \
+        if summaries else pd.DataFrame(columns=['site', 'year' if theme == 'forest' else 'time', 'area_ha'])
+    summary.to_csv(os.path.join(output_dir, '{}_summary.csv'.format(theme)), index=False)
+    if theme == 'fires' and summaries:
+        pd.concat([site_summary['max_burn_extent'] for site_summary in summaries], ignore_index=True) \
+            .to_csv(os.path.join(output_dir, 'fires_max_burn_extent.csv'), index=False)
+    print("{} of {} sites done.".format(int((sites_table.status == 'done').sum()), len(sites_table)))
+    return summary
@@ -0,0 +1,59 @@
+'''
+Description: This file contains a set of python functions shared by the themes utilities
+for detecting changes in series of binary maps (e.g., flooded or burnt areas).
+'''
+import numpy as np
+import xarray as xr
+
+# Transition codes between consecutive binary maps
+NEW = 2
+PERSISTED = 1
+RECEDED = -1
+UNCHANGED = 0
+
+
+def transition_codes(series, dim='time'):
+    """
+    Takes series of binary maps and returns the transition code of each pair of consecutive maps,
+    computed for all pairs with one shifted comparison into a preallocated int8 array:
+    2 (NEW) present only in the later map, 1 (PERSISTED) present in both, -1 (RECEDED) present
+    only in the earlier map and 0 (UNCHANGED) absent in both. Present means non-NaN and non-zero.
+    Dask inputs stay lazy.
+    Last modified: October 2026
+
+    Parameters
+    ----------
+    series : xarray.DataArray of binary maps with dim `dim` (returns an xarray.DataArray labelled with
+             the later date of each pair), or numpy/dask array with the series as first axis
+    dim : str of the dimension of the series
+    """
+    if isinstance(series, xr.DataArray):
+        series = series.transpose(dim, ...)
+        codes = transition_codes(series.data)
+        later = series.isel({dim: slice(1, None)})
+        return xr.DataArray(codes, dims=later.dims, coords=later.coords)
+
+    # NaN is not equal to itself, so NaN counts as absent
+    present = (series == series) & (series != 0)
+    if not isinstance(present, np.ndarray):
+        # dask arrays
+        return present[1:].astype(np.int8) * 2 - present[:-1].astype(np.int8)
+    codes = np.empty((max(len(present) - 1, 0),) + present.shape[1:], dtype=np.int8)
+    np.multiply(present[1:], 2, out=codes, casting='unsafe')
+    np.subtract(codes, present[:-1], out=codes, casting='unsafe')
+    return codes
+
+
+def progression(series, dim='time'):
+    """
+    Takes series of binary maps and returns a map of their progression: the transition codes of
+    transition_codes as floats, with NaN where unchanged (as flood_progression and burn_progression).
+    Last modified: October 2026
+
+    Parameters
+    ----------
+    series : xarray.DataArray of binary maps with dims (`dim`, 'latitude', 'longitude')
+    dim : str of the dimension of the series
+    """
+    codes = transition_codes(series, dim=dim)
+    return codes.astype(np.float64).where(codes != UNCHANGED)
@@ -104,28 +104,20 @@ def burn_mapping(ds, normalise=False):
 
 def burn_progression(burnt_series):
     """
-    Takes series of binary burn maps and returns a map of burn progression.  
-    Last modified: June 2022
+    Takes series of binary burn maps and returns a map of burn progression 
+    (2 newly burnt, 1 still burnt, -1 growing back, NaN otherwise).  
+    Last modified: October 2026
     
     Parameters
     ----------
     burnt_series : xarray.DataArray of binary burnt areas maps with dims ('time', 'latitude', 'longitude')
     """
-    import xarray as xr
+    try:
+        from .change_detection import progression
+    except ImportError:
+        from change_detection import progression
     
-    strDate = burnt_series.time[1].values
-    burnt_changes = burnt_series.isel(time=1).fillna(0)*2 - burnt_series.isel(time=0).fillna(0)
-    burnt_changes = burnt_changes.assign_coords(time=strDate).expand_dims('time')
-
-    for date in range(2,burnt_series.time.size):
-        strDate = burnt_series.time[date].values
-        previous_date = date-1
-
-        diff_maps = burnt_series.isel(time=date).fillna(0)*2 - burnt_series.isel(time=previous_date).fillna(0)
-        diff_maps = diff_maps.assign_coords(time=strDate).expand_dims('time')
-        burnt_changes = xr.concat([burnt_changes, diff_maps], 'time')
-    
-    return burnt_changes.where(burnt_changes!=0)
+    return progression(burnt_series)
 
 
 def report_max_burn_extent(burnt_area_ha):
@@ -142,6 +134,41 @@ def report_max_burn_extent(burnt_area_ha):
     return report_total_annual_burnt_area
 
 
+def report_max_burn_extent_table(burnt_area_ha):
+    """
+    Takes a time series of burnt areas (ha) and returns a table of the maximum burnt area of 
+    each year and the date when it happened (as report_max_burn_extent), found for all years 
+    with one sort over the (year, burnt area) key instead of a loop over the years.  
+    Last modified: October 2026
+    
+    Parameters
+    ----------
+    burnt_area_ha : xarray.DataArray with dim 'time' or pandas.Series indexed by date of burnt areas (ha)
+    """
+    import numpy as np
+    import pandas as pd
+    
+    if isinstance(burnt_area_ha, pd.Series):
+        dates = pd.DatetimeIndex(burnt_area_ha.index).values
+        values = burnt_area_ha.values.astype(np.float64)
+    else:
+        dates = burnt_area_ha.time.values
+        values = burnt_area_ha.values.astype(np.float64)
+    
+    valid = ~np.isnan(values)
+    dates, values = dates[valid], values[valid]
+    years = dates.astype('datetime64[Y]').astype(int) + 1970
+    
+    # Sort by year, then decreasing burnt area, then date: the first row of each year is its maximum
+    order = np.lexsort((dates, -values, years))
+    years = years[order]
+    first = np.concatenate(([True], years[1:] != years[:-1]))
+    
+    return pd.DataFrame({'max_burnt_area_ha': values[order][first], 
+                         'date': pd.DatetimeIndex(dates[order][first]).normalize()}, 
+                        index=pd.Index(years[first], name='year'))
+
+
 def report_burnt_habitats(burn, habitat_map):
     """
     Takes a binary burn map and habitat map and returns a report about burnt habitats (ha and year).  
@@ -171,4 +198,68 @@ def report_burnt_habitats(burn, habitat_map):
     for dic in report_burnt_habitats:
         report_burnt_habitats[dic] = {key: value for key, value in sorted(report_burnt_habitats[dic].items())}
 
-    return report_burnt_habitats
\ No newline at end of file
+    return report_burnt_habitats
+
+def _pixel_area_ha(data):
+    """
+    Returns the area of a pixel (ha) of a dataset loaded from the datacube in a projected CRS, 
+    from its geobox.
+    """
+    geobox = getattr(data, 'geobox', None)
+    if geobox is None or geobox.crs is None or not geobox.crs.projected:
+        raise ValueError("The pixel area cannot be found from the geobox of the habitat map "
+                         "(it has no geobox or is not in a projected CRS): pixel_area_ha is required.")
+    affine = geobox.affine
+    return abs(affine.a * affine.e) / 10000
+
+
+def report_burnt_habitats_table(burn, habitat_map, pixel_area_ha=None):
+    """
+    Takes a binary burn map and habitat map and returns a table of burnt habitats (ha) by year 
+    (as report_burnt_habitats, with years as rows and habitats as columns), computed with one 
+    np.bincount over a combined (year, habitat class) key.  
+    Last modified: October 2026
+    
+    Parameters
+    ----------
+    burn : xarray.DataArray of binary burn maps with dims ('time', 'latitude', 'longitude')
+    habitat_map : xarray.Dataset with variable detailed (e.g., from load_habitat_map), on the grid of burn
+    pixel_area_ha : float of the area of a pixel (ha), by default from the geobox of habitat_map 
+                    (required if habitat_map has no geobox in a projected CRS)
+    """
+    import numpy as np
+    import pandas as pd
+    
+    if pixel_area_ha is None:
+        pixel_area_ha = _pixel_area_ha(habitat_map)
+    
+    # Burnt pixels of each year
+    burn = burn.sortby('time')
+    spatial_dims = [dim for dim in burn.dims if dim != 'time']
+    burnt = burn.transpose('time', *spatial_dims).fillna(0).values > 0
+    years = burn.time.dt.year.values
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(years)) + 1))
+    burnt_years = np.logical_or.reduceat(burnt, starts, axis=0).reshape(len(starts), -1)
+    years = years[starts]
+    
+    habitats = habitat_map.detailed.transpose(*spatial_dims).values.ravel()
+    valid = np.isfinite(habitats) if np.issubdtype(habitats.dtype, np.floating) else np.ones(habitats.shape, bool)
+    classes = np.where(valid, habitats, 0).astype(np.int64)
+    n_classes = max(int(classes.max()) + 1, 1) if classes.size > 0 else 1
+    
+    # Combined (year, habitat class) key of burnt pixels with a habitat
+    year_index, pixel = np.nonzero(burnt_years & valid)
+    counts = np.bincount(year_index * n_classes + classes[pixel], 
+                         minlength=len(years) * n_classes).reshape(len(years), n_classes)
+    
+    # Keep habitats reported by report_burnt_habitats
+    class_values = np.arange(n_classes)
+    reported = ((class_values < 134) | (class_values == 159) | (class_values == 202)) & (class_values != 90)
+    reported &= (counts > 0).any(axis=0)
+    reported[0] = False # no data
+    
+    table = pd.DataFrame(counts[:, reported] * pixel_area_ha, index=pd.Index(years, name='year'), 
+                         columns=[habitat_dict.get(int(value), str(value)) for value in class_values[reported]])
+    # Classes sharing a habitat name are summed
+    table = table.T.groupby(level=0).sum().T
+    return table[sorted(table.columns)]
@@ -105,28 +105,20 @@ def flood_mapping(ds):
 
 def flood_progression(flood_series):
     """
-    Takes series of binary flood maps and returns a map of flood progression.  
-    Last modified: June 2022
+    Takes series of binary flood maps and returns a map of flood progression 
+    (2 newly flooded, 1 still flooded, -1 receded, NaN otherwise).  
+    Last modified: October 2026
     
     Parameters
     ----------
     flood_series : xarray.DataArray of binary flood maps with dims ('time', 'latitude', 'longitude')
     """
-    import xarray as xr
+    try:
+        from .change_detection import progression
+    except ImportError:
+        from change_detection import progression
     
-    strDate = flood_series.time[1].values
-    water_changes = flood_series.isel(time=1).fillna(0)*2 - flood_series.isel(time=0).fillna(0)
-    water_changes = water_changes.assign_coords(time=strDate).expand_dims('time')
-
-    for time in range(2,flood_series.time.size):
-        strDate = flood_series.time[time].values
-        previous_time = time-1
-
-        diff_maps = flood_series.isel(time=time).fillna(0)*2 - flood_series.isel(time=previous_time).fillna(0)
-        diff_maps = diff_maps.assign_coords(time=strDate).expand_dims('time')
-        water_changes = xr.concat([water_changes, diff_maps], 'time')
-    
-    return water_changes.where(water_changes!=0)
+    return progression(flood_series)
 
 def flood_frequency(flood_series, start_date, end_date):
     """
@@ -146,4 +138,151 @@ def flood_frequency(flood_series, start_date, end_date):
 
     frequency = (wet_feb / nb_images_feb).rename("frequency")
     
-    return frequency
\ No newline at end of file
+    return frequency
+
+class FloodMonitoringState:
+    """
+    Persistent flood monitoring state of a site, updated with new Sentinel-1 scenes only 
+    (so the update cost is proportional to the new data, not to the full archive). It holds 
+    the last flood map, per-pixel flood and observation counts, and first/last flood dates, 
+    and can be saved to and loaded from a NetCDF file or Zarr store.  
+    Last modified: October 2026
+    
+    Parameters
+    ----------
+    site : str indicating site name
+    """
+    
+    def __init__(self, site=None):
+        self.site = site
+        self.state = None
+    
+    @property
+    def last_time(self):
+        """Time of the last scene of the state (None before the first update)."""
+        import numpy as np
+        
+        if self.state is None:
+            return None
+        return np.datetime64(self.state.attrs['last_time'])
+    
+    def update(self, ds):
+        """
+        Takes a Sentinel-1 dataset and updates the state with its scenes acquired after the last update. 
+        Returns the flood progression (as flood_progression: 2 new flood, 1 flooded, -1 receding, 
+        NaN unchanged) of the new scenes, starting from the last flood map of the state, 
+        or None if there is no new scene.
+        
+        Parameters
+        ----------
+        ds : xarray.Dataset with dims ('time', 'latitude', 'longitude') and variables VH and VV
+        """
+        import numpy as np
+        import xarray as xr
+        
+        ds = ds.sortby('time')
+        if self.state is not None:
+            ds = ds.sel(time=ds.time > self.last_time)
+            for dim in ['latitude', 'longitude']:
+                if not np.array_equal(ds[dim].values, self.state[dim].values):
+                    raise ValueError("The {} coordinates of the new scenes do not match the state.".format(dim))
+        if ds.time.size == 0:
+            return None
+        
+        times = ds.time.values
+        flooded = flood_mapping(ds).notnull().transpose('time', 'latitude', 'longitude').values
+        observed = (ds.VH.notnull() & ds.VV.notnull()).transpose('time', 'latitude', 'longitude').values
+        any_flooded = flooded.any(axis=0)
+        first_flood = np.where(any_flooded, times[np.argmax(flooded, axis=0)], np.datetime64('NaT'))
+        last_flood = np.where(any_flooded, times[len(times) - 1 - np.argmax(flooded[::-1], axis=0)], 
+                              np.datetime64('NaT'))
+        
+        if self.state is None:
+            previous = np.zeros(flooded.shape[1:], dtype=bool)
+            coords = {'latitude': ds.latitude, 'longitude': ds.longitude}
+            dims = ('latitude', 'longitude')
+            zeros = np.zeros(flooded.shape[1:], dtype=np.uint16)
+            self.state = xr.Dataset({'flood_count': (dims, zeros), 
+                                     'observation_count': (dims, zeros.copy()), 
+                                     'first_flood_date': (dims, first_flood), 
+                                     'last_flood_date': (dims, last_flood)}, 
+                                    coords=coords, attrs={'scene_count': 0})
+            if self.site is not None:
+                self.state.attrs['site'] = self.site
+        else:
+            previous = self.state.last_flood_map.values > 0
+            state_first = self.state.first_flood_date.values
+            self.state['first_flood_date'].values = np.where(np.isnat(state_first), first_flood, state_first)
+            self.state['last_flood_date'].values = np.where(any_flooded, last_flood, 
+                                                            self.state.last_flood_date.values)
+        
+        self.state['flood_count'].values = self.state.flood_count.values + flooded.sum(axis=0, dtype=np.uint16)
+        self.state['observation_count'].values = (self.state.observation_count.values + 
+                                                  observed.sum(axis=0, dtype=np.uint16))
+        self.state['last_flood_map'] = (('latitude', 'longitude'), flooded[-1].astype(np.uint8))
+        self.state.attrs['scene_count'] = int(self.state.attrs['scene_count']) + len(times)
+        self.state.attrs['last_time'] = str(np.datetime_as_string(times[-1]))
+        
+        # Flood progression of the new scenes, from the last flood map of the state
+        try:
+            from .change_detection import transition_codes
+        except ImportError:
+            from change_detection import transition_codes
+        
+        water_changes = transition_codes(np.concatenate([previous[None], flooded]))
+        water_changes = xr.DataArray(water_changes, dims=('time', 'latitude', 'longitude'), 
+                                     coords={'time': times, 'latitude': ds.latitude, 'longitude': ds.longitude})
+        return water_changes.where(water_changes != 0)
+    
+    def last_flood_map(self):
+        """Returns the last binary flood map (1 flooded, NaN otherwise), as flood_mapping."""
+        return self.state.last_flood_map.where(self.state.last_flood_map > 0).astype(float)
+    
+    def frequency(self, per_observation=False):
+        """
+        Returns the frequency of floods since the first update, as flood_frequency.
+        
+        Parameters
+        ----------
+        per_observation : bool, if True the flood count of each pixel is divided by its number of valid 
+                          observations instead of the number of scenes
+        """
+        flood_count = self.state.flood_count.where(self.state.flood_count > 0)
+        if per_observation:
+            frequency = flood_count / self.state.observation_count
+        else:
+            frequency = flood_count / self.state.attrs['scene_count']
+        return frequency.rename("frequency")
+    
+    def save(self, path):
+        """
+        Saves the state to a Zarr store (path ending with .zarr) or a NetCDF file.
+        
+        Parameters
+        ----------
+        path : str of the output path
+        """
+        if path.rstrip('/').endswith('.zarr'):
+            self.state.to_zarr(path, mode='w')
+        else:
+            self.state.to_netcdf(path, mode='w')
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a state saved with save.
+        
+        Parameters
+        ----------
+        path : str of a Zarr store (path ending with .zarr) or a NetCDF file
+        """
+        import xarray as xr
+        
+        if path.rstrip('/').endswith('.zarr'):
+            state = xr.open_zarr(path).load()
+        else:
+            with xr.open_dataset(path) as state:
+                state = state.load()
+        monitoring_state = cls(site=state.attrs.get('site'))
+        monitoring_state.state = state
+        return monitoring_state
@@ -100,6 +100,67 @@ def group_data_by(ds, period="month"):
     print("Done. Data grouped by month.")
     return S1_dataset
     
+def _monthly_means(values, keys):
+    """
+    Takes an array with time as first axis and sorted integer group keys (one per time) and 
+    returns the NaN-aware mean of each group of consecutive times, in a single pass.
+    """
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+    valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(valid, values, 0), starts, axis=0)
+    counts = np.add.reduceat(valid, starts, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(counts > 0, sums / counts, np.nan).astype(values.dtype, copy=False)
+    return keys[starts], means
+
+
+def group_data_by_year_month(ds):
+    """
+    Takes Sentinel-1 data and returns monthly means for every year, as a cube with dims 
+    ('year', 'month', ...). The (year, month) groups are reduced in a single pass over time, 
+    and data loaded with dask (e.g. dc.load with dask_chunks) stays lazy.  
+    Months without data (e.g. before the start of the time series) are NaN.  
+    Last modified: October 2026
+    
+    Parameters
+    ----------
+    ds : xarray.Dataset or xarray.DataArray with dims ('time', 'latitude', 'longitude') (e.g., VH and VV)
+    """
+    ds = ds.sortby('time')
+    year_month = (ds.time.dt.year * 100 + ds.time.dt.month).rename('year_month')
+    
+    if isinstance(ds, xr.Dataset):
+        data_arrays = ds.data_vars.values()
+    else:
+        data_arrays = [ds]
+    if any(data_array.chunks is not None for data_array in data_arrays):
+        # One groupby on the combined key, then split the key into year and month.
+        grouped = ds.groupby(year_month).mean('time')
+        grouped = grouped.assign_coords(year=('year_month', (grouped.year_month.values // 100)), 
+                                        month=('year_month', (grouped.year_month.values % 100)))
+        return grouped.set_index(year_month=['year', 'month']).unstack('year_month').transpose('year', 'month', ...)
+    
+    keys = year_month.values
+    group_keys = None
+    cubes = {}
+    for data_array in data_arrays:
+        dtype = data_array.dtype if np.issubdtype(data_array.dtype, np.floating) else np.float64
+        values = data_array.transpose('time', ...).values.astype(dtype, copy=False)
+        group_keys, means = _monthly_means(values, keys)
+        years, year_index = np.unique(group_keys // 100, return_inverse=True)
+        months, month_index = np.unique(group_keys % 100, return_inverse=True)
+        cube = np.full((len(years), len(months)) + means.shape[1:], np.nan, dtype=means.dtype)
+        cube[year_index, month_index] = means
+        dims = [dim for dim in data_array.dims if dim != 'time']
+        coords = {dim: data_array[dim] for dim in dims if dim in data_array.coords}
+        coords.update(year=years, month=months)
+        cubes[data_array.name] = xr.DataArray(cube, dims=['year', 'month'] + dims, coords=coords, 
+                                              name=data_array.name, attrs=data_array.attrs)
+    
+    if isinstance(ds, xr.Dataset):
+        return xr.Dataset(cubes, attrs=ds.attrs)
+    return cubes[ds.name]
+    
 def forest_mapping(S1_dataset):
     """
     Takes Sentinel-1 dataset and returns a binary forest map.  
@@ -131,6 +192,57 @@ def forest_mapping(S1_dataset):
 
 
 
+def forest_mapping_vectorized(S1_data, threshold=-15., min_months=8, align_months=True):
+    """
+    Takes Sentinel-1 VH monthly means and returns binary forest maps for all years at once 
+    (as forest_mapping, without growing the result year by year). The threshold is applied once 
+    to the whole series and months are counted with one sum, so dask inputs stay lazy.  
+    group_data_by aligns every year to the months of the first year, so when the series starts 
+    mid-year forest_mapping ignores the earlier months of the later years. align_months reproduces 
+    this, otherwise the woody months of all 12 months are counted and the maps can differ.  
+    Last modified: October 2026
+    
+    Parameters
+    ----------
+    S1_data : either a cube of VH monthly means with dims ('year', 'month', 'latitude', 'longitude') 
+              (xarray.DataArray, or xarray.Dataset with variable VH) from group_data_by_year_month, 
+              an xarray.Dataset with dims ('time', 'latitude', 'longitude') and variable VH, 
+              or an xarray.Dataset with variables VH_<year> from group_data_by
+    threshold : float of the VH backscatter (dB) above which a month is woody
+    min_months : int, a pixel is forest when more than min_months months are woody
+    align_months : bool, only count the months of the first year (as forest_mapping with group_data_by)
+    """
+    if isinstance(S1_data, xr.Dataset):
+        if 'VH' in S1_data.data_vars:
+            S1_data = S1_data.VH
+        else:
+            # Stack the VH_<year> variables of group_data_by in a single concatenation
+            names = list(S1_data.data_vars)
+            S1_data = xr.concat([S1_data[name] for name in names], dim='year')
+            S1_data = S1_data.assign_coords(year=list(map(get_year, names)))
+    first_months = None
+    if 'time' in S1_data.dims:
+        times = S1_data.time.dt
+        first_months = np.unique(times.month.values[times.year.values == times.year.values.min()])
+        S1_data = group_data_by_year_month(S1_data)
+    
+    print("Mapping forests ... ")
+    woody_months = S1_data > threshold
+    if align_months:
+        if first_months is None:
+            # months of the first year with data
+            spatial_dims = [dim for dim in S1_data.dims if dim not in ('year', 'month')]
+            first_months = S1_data.isel(year=0).notnull().any(spatial_dims)
+        else:
+            first_months = S1_data.month.isin(first_months)
+        woody_months = woody_months & first_months
+    woody_count = woody_months.sum(dim='month')
+    woody = xr.where(woody_count > min_months, 1., np.nan)
+    woody = woody.assign_coords(year=[str(year) for year in woody.year.values])
+    print("Done." )
+    return woody
+
+
 def clearfells_monitoring(woody):
     """
     Takes series of binary forest maps and returns annual clearfells.  
@@ -173,6 +285,59 @@ def clearfells_monitoring(woody):
     return clear_cuts_clean
 
 
+def _open_clearfells(loss):
+    """
+    Takes a boolean array of forest loss with dims ('year', 'latitude', 'longitude') and returns 
+    its morphological opening with a 3x3 structure in every year (a single ndimage call), as uint8.
+    """
+    clear_cuts = np.zeros(loss.shape, dtype=np.uint8)
+    ndimage.binary_opening(loss, structure=np.ones((1,3,3)), output=clear_cuts)
+    return clear_cuts
+
+
+def clearfells_monitoring_vectorized(woody, flipud=True):
+    """
+    Takes series of binary forest maps and returns annual clearfells, as clearfells_monitoring, 
+    for all years at once: forest loss is computed with one shifted comparison and opened with a 
+    structure of size 1 along the year axis in a single ndimage call, into a preallocated uint8 array.  
+    Dask inputs stay lazy and are processed by spatial chunks read with a 2 pixels halo, 
+    so the result is identical to a whole-array run.  
+    Last modified: October 2026
+    
+    Parameters
+    ----------
+    woody : xarray.DataArray of binary forest maps with dims ('year', 'latitude', 'longitude')
+    flipud : bool, if True the clearfells are flipped along latitude and returned without 
+             latitude/longitude coordinates, as clearfells_monitoring does
+    """
+    print("Detecting clearfells that occurred in: ")
+    for year in woody.year.values[1:]:
+        print(year)
+    
+    woody = woody.transpose('year', 'latitude', 'longitude').fillna(0)
+    # Loss between each year and the next, for all years at once
+    loss = woody.data[1:] < woody.data[:-1]
+    
+    if hasattr(loss, 'map_overlap'):
+        clear_cuts = loss.map_overlap(_open_clearfells, depth={0: 0, 1: 2, 2: 2}, boundary='none', 
+                                      dtype=np.uint8)
+    else:
+        clear_cuts = _open_clearfells(loss)
+    
+    years = [str(year) for year in woody.year.values[1:]]
+    if flipud:
+        clear_cuts = clear_cuts[:, ::-1]
+        clear_cuts = xr.DataArray(clear_cuts, dims=('year','latitude','longitude'), coords={'year': years})
+    else:
+        clear_cuts = xr.DataArray(clear_cuts, dims=('year','latitude','longitude'), 
+                                  coords={'year': years, 'latitude': woody.latitude, 
+                                          'longitude': woody.longitude})
+    print("Done.")
+    
+    clear_cuts = clear_cuts.where(clear_cuts>0)
+    return clear_cuts
+
+
 def mapping_clearfelling_dates(clear_cuts_clean):
     """
     Takes annual clearfell maps and returns a map of clearfell dates (i.e., year).  
@@ -195,6 +360,78 @@ def mapping_clearfelling_dates(clear_cuts_clean):
     return annual_clear_cuts
 
 
+def mapping_clearfelling_dates_vectorized(clear_cuts_clean):
+    """
+    Takes annual clearfell maps and returns a map of clearfell dates (i.e., year of first detection), 
+    as mapping_clearfelling_dates, with one argmax over years and one gather of the years. 
+    Pixels never clearfelled are 0. Unlike mapping_clearfelling_dates (which labels the first 
+    year 2018), every year is labelled with its own value.  
+    Last modified: October 2026
+    
+    Parameters
+    ----------
+    clear_cuts_clean : xarray.DataArray of clearfells with dims ('year', 'latitude', 'longitude')
+    """
+    clear_cuts = clear_cuts_clean.transpose('year', ...).fillna(0).values > 0
+    first_year = np.argmax(clear_cuts, axis=0)
+    years = np.array([int(year) for year in clear_cuts_clean.year.values] + [0], dtype=np.uint16)
+    # Pixels never clearfelled gather the trailing 0
+    first_year[~clear_cuts.any(axis=0)] = len(years) - 1
+    dates = years[first_year]
+    
+    dims = [dim for dim in clear_cuts_clean.transpose('year', ...).dims if dim != 'year']
+    coords = {dim: clear_cuts_clean[dim] for dim in dims if dim in clear_cuts_clean.coords}
+    return xr.DataArray(dates, dims=dims, coords=coords, attrs={'nodata': 0})
+
+
+def clearfell_events(clearfell_date, pixel_area_ha=0.01):
+    """
+    Takes a map of clearfell dates and returns a table of clearfell events, i.e., connected 
+    clearfelled pixels of the same year, with their year, area (ha) and centroid. All events are 
+    labelled in a single ndimage call (over a one-hot year stack, without connectivity across years).  
+    Last modified: October 2026
+    
+    Parameters
+    ----------
+    clearfell_date : xarray.DataArray of clearfell dates (e.g., from mapping_clearfelling_dates_vectorized)
+    pixel_area_ha : float of the area of a pixel in hectares (0.01 for 10 m pixels)
+    """
+    import pandas as pd
+    
+    dates = np.nan_to_num(np.asarray(clearfell_date.values, dtype=np.float64)).astype(np.int64)
+    dates[dates < 1900] = 0
+    years, year_index = np.unique(dates, return_inverse=True)
+    year_index = year_index.reshape(dates.shape)
+    
+    # One-hot stack of clearfells by year, labelled without connectivity across years
+    stack = year_index[None] == np.arange(len(years))[:, None, None]
+    stack &= (dates > 0)[None]
+    structure = np.zeros((3,3,3), dtype=bool)
+    structure[1] = ndimage.generate_binary_structure(2, 1)
+    labels, n_events = ndimage.label(stack, structure=structure)
+    
+    # Per event pixel count, year and centroid in one pass over labelled pixels
+    flat_index = np.flatnonzero(labels)
+    event = labels.ravel()[flat_index] - 1
+    plane, row, col = np.unravel_index(flat_index, labels.shape)
+    pixels = np.bincount(event, minlength=n_events)
+    event_year = np.zeros(n_events, dtype=np.int64)
+    event_year[event] = years[plane]
+    rows = np.bincount(event, weights=row, minlength=n_events) / np.maximum(pixels, 1)
+    cols = np.bincount(event, weights=col, minlength=n_events) / np.maximum(pixels, 1)
+    
+    events = pd.DataFrame({'event': np.arange(1, n_events + 1), 'year': event_year, 'pixels': pixels, 
+                           'area_ha': pixels * pixel_area_ha})
+    y_dim, x_dim = clearfell_date.dims[-2:]
+    for dim, index in [(y_dim, rows), (x_dim, cols)]:
+        if dim in clearfell_date.coords:
+            coords = clearfell_date[dim].values
+            events['centroid_' + dim] = np.interp(index, np.arange(len(coords)), coords)
+        else:
+            events['centroid_' + dim] = index
+    return events.sort_values(['year', 'event']).reset_index(drop=True)
+
+
 def clearfell_reporting(site, clearfell_date):
     """
     Takes the name of the site of interest and a map of clearfell dates and returns a report summarising 
@@ -208,12 +445,12 @@ def clearfell_reporting(site, clearfell_date):
     """
     import math
     
-    year_stats = np.unique(clearfell_date.fillna(0), return_counts=True)
+    # Pixel count per year in one pass over the date map (float with NaN or uint16 with 0)
+    dates = np.nan_to_num(np.asarray(clearfell_date.values, dtype=np.float64)).astype(np.int64).ravel()
+    year_counts = np.bincount(dates[dates > 1900])
     stats_summary = "For the " + site.upper() + " forest site, we report : "
     print(stats_summary)
-    for year_index in range(len(year_stats[0])):
-        year = year_stats[0][year_index]
-        if (year > 1900):
-            px = year_stats[1][year_index]
-            area_ha = (px * 100) / 10000
-            print(str(math.floor(area_ha)) + " hectares of clearfelling during " + str(int(year)))
+    for year in np.flatnonzero(year_counts):
+        px = year_counts[year]
+        area_ha = (px * 100) / 10000
+        print(str(math.floor(area_ha)) + " hectares of clearfelling during " + str(int(year)))
@@ -74,3 +74,132 @@ def load_habitat_map(date, geom_extent):
     habitat_map = habitat_map.rename({'x': 'longitude', 'y': 'latitude'})
     habitat_map = habitat_map.squeeze(dim='time')
     return habitat_map
+
+
+# Maximum number of habitat maps kept in memory by load_habitat_map_cached
+HABITAT_CACHE_SIZE = 16
+
+_datacube = None
+_habitat_cache = None
+
+
+def get_datacube():
+    """
+    Returns a Datacube connection shared by the loaders of this file, created on first use.
+    Last modified: October 2026
+    """
+    global _datacube
+    if _datacube is None:
+        import datacube
+        _datacube = datacube.Datacube(app='habitat')
+    return _datacube
+
+
+def habitat_year(date):
+    """
+    Returns the year (str) of the habitat map to use for a date, as habitat maps are only 
+    available from 2020 to last year.
+    Last modified: October 2026
+    """
+    import datetime as dt
+    
+    year = int(dt.datetime.strptime(date, "%Y-%m-%d").strftime("%Y"))
+    return str(min(max(year, 2020), dt.datetime.now().year - 1))
+
+
+def class_lookup(data_array):
+    """
+    Returns the lookup {class value: class name} attached to a categorical map 
+    loaded with load_habitat_map_cached.
+    Last modified: October 2026
+    """
+    values = data_array.attrs.get('flag_values', [])
+    names = data_array.attrs.get('flag_meanings', '').split()
+    return {int(value): name.replace('_', ' ') for value, name in zip(values, names)}
+
+
+def _categorical(data_array, lookup):
+    """
+    Casts a map of classes to the smallest unsigned integer type (0 being no data) 
+    and attaches its class lookup as CF flag attributes.
+    """
+    import numpy as np
+    
+    values = data_array.values
+    if values.size == 0 or (np.issubdtype(values.dtype, np.floating) and np.isnan(values).all()):
+        # e.g. an area without habitat data
+        max_value = 0
+    else:
+        max_value = int(np.nanmax(values))
+    dtype = np.uint8 if max_value <= np.iinfo(np.uint8).max else np.uint16
+    data_array = data_array.fillna(0).astype(dtype)
+    data_array.attrs['nodata'] = 0
+    if lookup:
+        data_array.attrs['flag_values'] = np.array(list(lookup.keys()), dtype=dtype)
+        data_array.attrs['flag_meanings'] = ' '.join(name.replace(' ', '_') for name in lookup.values())
+    return data_array
+
+
+def load_habitat_map_cached(date, geom_extent, product='lw_habitats_lw', resolution=(-10,10), cache_dir=None):
+    """
+    Load habitat (or land cover) map for specified extent and date as load_habitat_map, but reusing 
+    a shared Datacube connection and keeping the last HABITAT_CACHE_SIZE maps in memory, keyed by 
+    (product, year, geometry bounds and CRS, resolution). Maps can also be persisted in a local directory. 
+    Classes are returned as uint8/uint16 with 0 as no data and their lookup in the attributes 
+    (see class_lookup). Returned maps are shared by the cache and should not be modified in place.
+    Last modified: October 2026
+    
+    Parameters
+    ----------
+    date : str of the date ('%Y-%m-%d')
+    geom_extent : datacube.utils.geometry.Geometry of the area
+    product : str of the product ('lw_habitats_lw' or 'lw_landcover_lw')
+    resolution : tuple of the resolution (in epsg:27700)
+    cache_dir : str of the local directory of cached maps (NetCDF), or None to only cache in memory
+    """
+    import os
+    import re
+    import xarray as xr
+    from collections import OrderedDict
+    global _habitat_cache
+    
+    if _habitat_cache is None:
+        _habitat_cache = OrderedDict()
+    
+    year = habitat_year(date)
+    bounds = tuple(round(float(bound), 6) for bound in geom_extent.boundingbox)
+    crs = str(geom_extent.crs)
+    key = (product, year, bounds, crs, tuple(resolution))
+    if key in _habitat_cache:
+        _habitat_cache.move_to_end(key)
+        return _habitat_cache[key]
+    
+    cache_path = None
+    if cache_dir is not None:
+        name = '_'.join([product, year, re.sub(r'[^A-Za-z0-9]+', '', crs)] + 
+                        ['{:.6f}'.format(bound) for bound in bounds] + 
+                        ['{:g}'.format(abs(res)) for res in resolution])
+        cache_path = os.path.join(cache_dir, name + '.nc')
+    
+    if cache_path is not None and os.path.exists(cache_path):
+        habitat_map = xr.open_dataset(cache_path).load()
+    else:
+        query = {'product': product,
+                 'geopolygon': geom_extent,
+                 'time': (year+"-01-01",year+"-12-31"),
+                 'output_crs': 'epsg:27700',
+                 'resolution': resolution}
+        habitat_map = get_datacube().load(**query)
+        lookup = habitat_dict if product == 'lw_habitats_lw' else {}
+        for var in habitat_map.data_vars:
+            habitat_map[var] = _categorical(habitat_map[var], lookup)
+        habitat_map = habitat_map.rename({'x': 'longitude', 'y': 'latitude'})
+        habitat_map = habitat_map.squeeze(dim='time')
+        if cache_path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            habitat_map.to_netcdf(cache_path)
+    
+    _habitat_cache[key] = habitat_map
+    while len(_habitat_cache) > HABITAT_CACHE_SIZE:
+        _habitat_cache.popitem(last=False)
+    return habitat_map